@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('font/times.ttf', 'font')],
-    hiddenimports=[],
+    hiddenimports=['tomli'],   # pdf.layout.load_toml: na Pythonu 3.10 místo tomllib
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
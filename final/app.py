@@ -1,15 +1,49 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import time
+_T0 = time.perf_counter()   # začátek měření času do prvního okna (--startup-profile)
+
 import sys
-from PySide6.QtWidgets import QApplication
-from ui.main_window import MainWindow
+import multiprocessing
+
+PROFILE_FLAG = "--startup-profile"
+
 
 def main() -> int:
+    # --startup-profile: profil importů (jako -X importtime) a kontrola rozpočtu startu,
+    # po prvním vykreslení okna skončí s kódem 0 (v rozpočtu) / 1 (překročeno)
+    profile = PROFILE_FLAG in sys.argv
+    timer = None
+    if profile:
+        sys.argv.remove(PROFILE_FLAG)
+        from startup_profile import ImportTimer
+        timer = ImportTimer().install()
+
+    from PySide6.QtWidgets import QApplication
+    from ui.main_window import MainWindow
+
     app = QApplication(sys.argv)
     w = MainWindow()
+
+    if profile:
+        from config import STARTUP_BUDGET_MS, STARTUP_DEFERRED_MODULES
+        from startup_profile import check_startup
+
+        def first_window():
+            elapsed = time.perf_counter() - _T0
+            timer.uninstall()
+            ok, report = check_startup(elapsed, timer, STARTUP_BUDGET_MS, STARTUP_DEFERRED_MODULES)
+            print("\n".join(timer.importtime_lines()))
+            print(report)
+            app.exit(0 if ok else 1)
+
+        w.first_painted.connect(first_window)
+
     w.show()
     return app.exec()
 
 if __name__ == "__main__":
-    raise SystemExit(main())
\ No newline at end of file
+    # PyInstaller bundle: procesy exportního poolu se spouští přes tentýž binár
+    multiprocessing.freeze_support()
+    raise SystemExit(main())
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Headless dávkové generování nabídek – bez Qt.
+
+Použití:
+    python cli.py nabidky/              # všechny *.json/*.toml ve složce
+    python cli.py a.toml b.json -o out/ -j 8
+    python cli.py --catalog pool/segmenty -o out/   # katalog celého poolu (katalog_segmentu.pdf)
+    python cli.py nabidka.toml --mail-merge prijemci.csv -o out/   # PDF pro každý řádek CSV
+    python cli.py nabidky/ --max-memory 400   # úsporný režim: celá dávka pod 400 MB
+    python cli.py nabidky/ --stress 200 --threads 16   # souběžné exporty ve vláknech jednoho procesu
+    python cli.py nabidky/ --layout siroke.toml   # jiný layout (pdf.layout) pro všechny specifikace
+    python cli.py nabidky/ --cache   # stránky a hotová PDF z cache (~/.cache/cenove_nabidky)
+
+Každá specifikace = jedna úloha; úlohy běží souběžně v procesním poolu
+a pro každou se vypíše doba renderu.
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+from pathlib import Path
+
+from pdf.layout import LayoutProfile, load_layout
+from quote_spec import find_spec_files, load_spec, export_spec
+
+
+def _output_path(spec_path: Path, spec, out_dir: Path | None) -> Path:
+    name = spec.output or f"{spec_path.stem}.pdf"
+    return (out_dir or spec_path.parent) / name
+
+
+def run_job(spec_path: str, out_dir: str | None, memory_limit_mb: float | None = None,
+            layout: LayoutProfile | None = None, cache: bool = False) -> tuple[str, str, float, str]:
+    """Jedna úloha v procesu poolu. Vrací (spec, výstup, sekundy, poznámka)."""
+    t0 = time.perf_counter()
+    spec = load_spec(spec_path)
+    if layout is not None:
+        spec = replace(spec, layout=layout)
+    out = _output_path(Path(spec_path), spec, Path(out_dir) if out_dir else None)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    # paralelizace je na úrovni úloh => uvnitř úlohy sekvenčně
+    result = export_spec(spec, str(out), workers=1, memory_limit_mb=memory_limit_mb, cache=cache)
+    note = result.describe() if result is not None else ""
+    if memory_limit_mb:
+        from pdf.low_memory import peak_rss_mb
+        peak = peak_rss_mb()
+        if peak is not None:
+            note = (note + "; " if note else "") + f"špička {peak:.0f}/{memory_limit_mb:.0f} MB"
+    if spec.cover_variants:
+        variants = f"{len(spec.cover_variants)} variant titulní strany: " + ", ".join(
+            Path(v.out_path).name for v in spec.cover_variant_list(out))
+        note = (note + "; " if note else "") + variants
+    return spec_path, str(out), time.perf_counter() - t0, note
+
+
+CATALOG_FILENAME = "katalog_segmentu.pdf"
+
+
+def run_catalog(pool_dir: str, out_dir: str | None, jobs: int | None, cache: bool = False) -> int:
+    """
+    Katalog celého poolu segmentů (pdf.catalog); dekódování paralelně v `jobs` procesech.
+    cache: zmenšeniny z / do cache stránek (--cache).
+    """
+    from pdf.catalog import export_catalog, list_pool_segments
+
+    t0 = time.perf_counter()
+    try:
+        paths = list_pool_segments(pool_dir)
+    except OSError as e:
+        print(f"[CHYBA] {pool_dir}: {e}", file=sys.stderr)
+        return 2
+    if not paths:
+        print(f"Žádné segmenty (PNG/PDF/SVG) v {pool_dir}.", file=sys.stderr)
+        return 2
+    out = Path(out_dir or ".") / CATALOG_FILENAME
+    out.parent.mkdir(parents=True, exist_ok=True)
+    pages = export_catalog(str(out), paths, workers=jobs, cache=cache)
+    print(f"[OK] {time.perf_counter() - t0:7.2f} s  {len(paths)} segmentů, {pages} stran -> {out}")
+    return 0
+
+
+def run_mail_merge(spec_path: str, csv_path: str, out_dir: str | None, jobs: int | None,
+                   layout: LayoutProfile | None = None) -> int:
+    """Hromadná korespondence (pdf.mail_merge): segmenty a ceník ze specifikace, příjemci z CSV."""
+    from pdf.mail_merge import export_mail_merge, read_recipients
+
+    t0 = time.perf_counter()
+    try:
+        spec = load_spec(spec_path)
+        recipients = read_recipients(csv_path, spec.title, spec.date_style, spec.use_today)
+    except (OSError, ValueError) as e:
+        print(f"[CHYBA] {e}", file=sys.stderr)
+        return 2
+    if not recipients:
+        print(f"Žádní příjemci v {csv_path}.", file=sys.stderr)
+        return 2
+    out = Path(out_dir or Path(spec_path).parent)
+    written = export_mail_merge(recipients, out, list(spec.segments), spec.price_image, workers=jobs,
+                                layout=layout or spec.layout)
+    print(f"[OK] {time.perf_counter() - t0:7.2f} s  {len(written)} nabídek -> {out}")
+    return 0
+
+
+def run_stress(spec_files: list[str], count: int, threads: int, layout: LayoutProfile | None = None) -> int:
+    """
+    Zátěžová kontrola re-entrantnosti: `count` exportů ve `threads` vláknech jednoho procesu
+    (střídavě bez cache, průběžně a přes sdílenou cache stránek). Každý výsledek se porovná
+    bajt po bajtu s referencí vyrenderovanou předem sekvenčně. S `layout` se každá
+    specifikace exportuje i v tomto layoutu – souběžně s vlastním. Průběžně zapsané
+    reference se navíc kontrolují strukturálně (/Parent stránek, pdf.stream_writer).
+    """
+    import io
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    from pdf.context import ExportContext
+    from pdf.export import export_pdf
+    from pdf.page_cache import PageCache
+    from pdf.stream_writer import page_parent_errors
+
+    specs = [load_spec(p) for p in spec_files]
+    if layout is not None:
+        specs += [replace(s, layout=layout) for s in specs]
+        spec_files = spec_files + [f"{p} [{layout.name}]" for p in spec_files]
+    modes = ("render", "stream", "cache")
+    with tempfile.TemporaryDirectory(prefix="stress-") as cache_dir:
+        shared_cache = PageCache(cache_dir)
+
+        def export(spec, mode: str) -> bytes:
+            ctx = ExportContext.create(1, cache=shared_cache if mode == "cache" else False, export_cache=False)
+            buf = io.BytesIO()
+            export_pdf(buf, **spec.export_kwargs(), streaming=mode != "render", context=ctx)
+            return buf.getvalue()
+
+        reference = {(i, m): export(spec, m if m != "cache" else "stream")
+                     for i, spec in enumerate(specs) for m in modes}
+        # struktura průběžně zapsaných PDF: /Parent stránek => kořen stromu stránek
+        broken = 0
+        for (i, mode), data in reference.items():
+            if mode == "stream":
+                for err in page_parent_errors(data):
+                    broken += 1
+                    print(f"[CHYBA] {spec_files[i]} ({mode}): {err}", file=sys.stderr)
+        if broken:
+            return 1
+        tasks = [(i % len(specs), modes[i % len(modes)]) for i in range(count)]
+
+        def check(task) -> bool:
+            i, mode = task
+            return export(specs[i], mode) == reference[(i, mode)]
+
+        t0 = time.perf_counter()
+        failed = 0
+        with ThreadPoolExecutor(max_workers=threads) as ex:
+            for task, fut in [(t, ex.submit(check, t)) for t in tasks]:
+                try:
+                    ok = fut.result()
+                except Exception as e:
+                    ok = False
+                    print(f"[CHYBA] {spec_files[task[0]]} ({task[1]}): {e}", file=sys.stderr)
+                failed += not ok
+    secs = time.perf_counter() - t0
+    state = "všechny bajtově shodné s referencí" if not failed else f"{failed} NESHODNÝCH nebo s chybou"
+    print(f"[{'OK' if not failed else 'CHYBA'}] {count} exportů v {threads} vláknech za {secs:.2f} s – {state}")
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Dávkové generování cenových nabídek (PDF) ze specifikací.")
+    ap.add_argument("specs", nargs="*", help="soubory .json/.toml nebo složky s nimi")
+    ap.add_argument("-o", "--out-dir", help="výstupní složka (výchozí: vedle specifikace)")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="počet souběžných úloh (výchozí: počet CPU)")
+    ap.add_argument("--catalog", metavar="SLOZKA", help="místo nabídek katalog všech segmentů ve složce")
+    ap.add_argument("--mail-merge", metavar="CSV", help="jedna specifikace + CSV příjemců => PDF pro každý řádek")
+    ap.add_argument("--max-memory", type=float, metavar="MB",
+                    help="úsporný režim: strop paměti celé dávky (výchozí LOW_MEMORY_MAX_MB)")
+    ap.add_argument("--stress", type=int, metavar="N",
+                    help="zátěžová kontrola: N souběžných exportů ve vláknech (výsledky se porovnají)")
+    ap.add_argument("--threads", type=int, default=8, help="počet vláken pro --stress (výchozí 8)")
+    ap.add_argument("--layout", metavar="SOUBOR",
+                    help="layout (.toml/.json, viz pdf.layout) místo layoutu ze specifikací")
+    ap.add_argument("--cache", action="store_true",
+                    help="cache stránek, hotových PDF a zmenšenin katalogu (PAGE_CACHE_DIR, EXPORT_CACHE_DIR) – rychlé opakované dávky")
+    args = ap.parse_args(argv)
+
+    layout = None
+    if args.layout:
+        try:
+            layout = load_layout(args.layout)
+        except (OSError, ValueError) as e:
+            print(f"[CHYBA] {args.layout}: {e}", file=sys.stderr)
+            return 2
+
+    if args.catalog:
+        return run_catalog(args.catalog, args.out_dir, args.jobs, args.cache)
+    if args.mail_merge:
+        specs = [str(p) for s in args.specs for p in find_spec_files(s)]
+        if len(specs) != 1:
+            print("--mail-merge potřebuje právě jednu specifikaci (segmenty, ceník).", file=sys.stderr)
+            return 2
+        return run_mail_merge(specs[0], args.mail_merge, args.out_dir, args.jobs, layout)
+
+    spec_files = [str(p) for s in args.specs for p in find_spec_files(s)]
+    if not spec_files:
+        print("Žádné specifikace k vyrenderování.", file=sys.stderr)
+        return 2
+    if args.stress:
+        return run_stress(spec_files, args.stress, args.threads, layout)
+
+    from pdf.low_memory import MemoryBudget
+
+    jobs, limit = args.jobs, None
+    budget = MemoryBudget.from_config(args.max_memory)
+    if budget is not None:
+        jobs, per_job = budget.split(min(args.jobs or multiprocessing.cpu_count(), len(spec_files)))
+        limit = per_job.max_mb
+
+    t0 = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        futures = {ex.submit(run_job, p, args.out_dir, limit, layout, args.cache): p for p in spec_files}
+        for fut in as_completed(futures):
+            try:
+                spec_path, out, secs, note = fut.result()
+            except Exception as e:
+                failed += 1
+                print(f"[CHYBA] {futures[fut]}: {e}", file=sys.stderr)
+                continue
+            print(f"[OK] {secs:7.2f} s  {spec_path} -> {out}" + (f"  ({note})" if note else ""))
+
+    total = time.perf_counter() - t0
+    print(f"Hotovo: {len(spec_files) - failed}/{len(spec_files)} úloh za {total:.2f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    raise SystemExit(main())
@@ -3,9 +3,7 @@ import sys
 import datetime
 from pathlib import Path
 
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.lib.units import mm
 
 def resource_path(*parts) -> Path:
     """
@@ -29,11 +27,79 @@ CUSTOM_FONT_TTF = resource_path("font", "times.ttf")
 # Výchozí složka pro export PDF
 DEFAULT_EXPORT_DIR = Path("/Users/jirka/Desktop")  # uprav dle potřeby
 
+# Limit pro export „max. velikost“ (e-mail). Příloha se v e-mailu kóduje base64 (+33 %),
+# takže 7 MB PDF je zhruba 9,5 MB zprávy – pod běžným limitem 10 MB.
+EXPORT_MAX_SIZE_MB = 7.0
+
+# Počet procesů pro přípravu obrázků při exportu (None = počet CPU, 1 = bez paralelizace)
+EXPORT_WORKERS = None
+# Kolik hotových/rozpracovaných dlaždic smí čekat na jeden proces (omezuje paměť)
+PREPARE_QUEUE_PER_WORKER = 2
+
+# Úsporný režim paměti (export_pdf(memory_limit_mb=…), cli.py --max-memory): strop RSS v MB
+# pro export včetně procesů přípravy; None = vypnuto. Odhady paměti slouží k rozpočtu procesů.
+LOW_MEMORY_MAX_MB = None
+LOW_MEMORY_MAIN_MB = 70      # hlavní proces (interpret, reportlab, jedna stránka, dekódování bez poolu)
+LOW_MEMORY_WORKER_MB = 60    # jeden proces přípravy (jeden dekódovaný segment)
+# Kam se odkládají hotové obrazové streamy čekající na vykreslení; None = systémový temp
+LOW_MEMORY_SPILL_DIR = None
+
+# Cache vyrenderovaných stránek (PDF fragmenty podle hashe vstupů stránky); None = vypnuto.
+# Obě cache používá jen export, který si o ně řekne (GUI export, cli.py --cache).
+PAGE_CACHE_DIR = Path.home() / ".cache" / "cenove_nabidky" / "pages"
+# Strop velikosti cache – nejdéle nepoužité stránky se mažou
+PAGE_CACHE_MAX_MB = 500
+# Cache hotových PDF podle hashu celé nabídky (stejný export = kopie souboru); None = vypnuto
+EXPORT_CACHE_DIR = Path.home() / ".cache" / "cenove_nabidky" / "exports"
+EXPORT_CACHE_MAX_MB = 1000
+
+# Export obrázků stránek vedle PDF (WhatsApp, e-shop): šířky v px a formáty (png | jpeg | webp)
+RASTER_WIDTHS_PX = (1080, 2160)
+RASTER_FORMATS = ("png", "jpeg", "webp")
+RASTER_JPEG_QUALITY = 85
+RASTER_WEBP_QUALITY = 80
+# Počet vláken pro kódování obrázků stránek (None = počet CPU)
+RASTER_ENCODE_THREADS = None
+
+# Katalog celého poolu segmentů (cli.py --catalog): mřížka náhledů s názvy souborů
+CATALOG_COLS = 3
+CATALOG_ROWS = 8
+CATALOG_MARGIN_CM = 1.0
+CATALOG_GAP_CM = 0.3
+CATALOG_CAPTION_SIZE_PT = 7
+CATALOG_THUMB_DPI = 150
+CATALOG_JPEG_QUALITY = 80
+# Kolik stránek katalogu se skládá najednou (jeden PDF fragment) – omezuje paměť
+CATALOG_BATCH_PAGES = 8
+
+# Rychlý koncept PDF z obrázků náhledu (bez zdrojových segmentů): JPEG kvalita
+DRAFT_JPEG_QUALITY = 75
+
+# Spekulativní export v GUI: když se vstupy po náhledu nemění DELAY ms, PDF se na pozadí
+# připraví do paměti a „Export PDF…“ ho jen zapíše. Větší PDF než MAX_MB se nedrží.
+SPECULATIVE_EXPORT = True
+SPECULATIVE_EXPORT_DELAY_MS = 1500
+SPECULATIVE_EXPORT_MAX_MB = 150
+
+# Render služba (server.py): kořen, mimo který JSON specifikace nesmí odkazovat (segmenty,
+# ceník, layout); relativní cesty se berou vůči němu. None = SEGMENT_POOL_DIR.
+SERVER_ROOT_DIR = None
+
+# Studený start GUI (app.py --startup-profile): rozpočet času do prvního okna a moduly,
+# které se smí načíst až při použití (náhled, export) – před prvním oknem je to chyba
+STARTUP_BUDGET_MS = 600
+STARTUP_DEFERRED_MODULES = (
+    "pdf.export", "pdf.page_raster", "reportlab.pdfgen", "reportlab.platypus", "reportlab.pdfbase.ttfonts",
+    "PIL.Image", "PIL.ImageQt", "pdf.vector",
+)
+
 COVER_TITLE_OFFSET_MM = -5.0
 
 #margin pouze na segmenty
 COMPONENT_MARGIN_MM = 6.0
 # ---- Layout ----
+# Výchozí hodnoty layoutu (pdf.layout.DEFAULT_LAYOUT); jiný layout = soubor .toml/.json
+# načtený za běhu (GUI „Načíst layout…“, cli.py --layout, `layout` ve specifikaci).
 SEGMENTS_PER_PAGE_FIXED = 4
 MARGIN_CM_DEFAULT = 2.0
 GAP_CM_DEFAULT = 0.5
@@ -42,9 +108,11 @@ PRICE_TOP_OFFSET_CM = 2
 
 # Pevná šířka screenshotu ceníku (v cm)
 PRICE_IMAGE_WIDTH_CM = 13.0
+# Vysoký screenshot ceníku rozřezat na pásy přes víc stránek (jinak se zmenší na jednu)
+PRICE_SPLIT_TALL = True
 
-# A4
-A4_W_PT, A4_H_PT = A4
+# A4 (jako reportlab.lib.pagesizes.A4 – bez importu celého reportlabu při startu)
+A4_W_PT, A4_H_PT = 210 * mm, 297 * mm
 
 # ---- Titulní strana ----
 COVER_TITLE_COLOR_HEX = "#2E6F82"
@@ -72,33 +140,25 @@ def english_date_upper(d=None):
         d = datetime.date.today()
     return d.strftime("%B %d, %Y").upper()
 
-def try_register_font():
+def font_candidates():
     """
-    Vrací (font_name, ttf_path|None). Preferuje CUSTOM_FONT_TTF,
-    pak DejaVuSans.ttf vedle configu, jinak spadne na Helvetica.
+    [(font_name, ttf_path|None)] v pořadí preference jen podle existence souborů – bez
+    parsování TTF: CUSTOM_FONT_TTF, DejaVuSans.ttf vedle configu, nakonec Helvetica.
+    Registraci do reportlabu dělá až fonts.ensure_fonts() při prvním použití – poškozený
+    TTF přeskočí a vybere první kandidát, který se načetl (jméno vrací ensure_fonts()).
     """
-    # 1) explicitně zadaný TTF
-    if CUSTOM_FONT_TTF:
+    result = []
+    if CUSTOM_FONT_TTF and Path(CUSTOM_FONT_TTF).exists():
         p = Path(CUSTOM_FONT_TTF)
-        if p.exists():
-            name = p.stem
-            try:
-                pdfmetrics.registerFont(TTFont(name, str(p)))
-                return name, str(p)
-            except Exception:
-                pass
-
-    # 2) DejaVuSans.ttf vedle config.py
+        result.append((p.stem, str(p)))
     ttf_path = Path(__file__).with_name("DejaVuSans.ttf")
     if ttf_path.exists():
-        try:
-            pdfmetrics.registerFont(TTFont("DejaVuSans", str(ttf_path)))
-            return "DejaVuSans", str(ttf_path)
-        except Exception:
-            pass
+        result.append(("DejaVuSans", str(ttf_path)))
+    result.append(("Helvetica", None))
+    return result
 
-    # 3) fallback
-    return "Helvetica", None
 
-# Předregistruj (nevadí volat víckrát)
-FONT_NAME, PREVIEW_TTF = try_register_font()
\ No newline at end of file
+def try_register_font():
+    """Pojistí registraci fontu (fonts.ensure_fonts) a vrací vybraný (font_name, ttf_path|None)."""
+    from fonts import ensure_fonts, font_file
+    return ensure_fonts(), font_file()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Fonty aplikace – registrace až při prvním použití a sdílené parsované objekty.
+
+config jen seřadí kandidáty podle existence souborů (config.font_candidates) – bez importu
+reportlabu a bez parsování TTF, takže start GUI za fonty nic neplatí. Parsování proběhne
+jednou, při prvním měření/kreslení textu:
+- ensure_fonts(): zaregistruje první kandidát, který jde načíst (poškozený TTF => další,
+  nakonec vestavěná Helvetica), a vrátí jeho jméno (jednou, pod zámkem, bezpečné z víc
+  vláken; další volání je jen čtení). Vybraný font se zapíše jen jednou a pak se nemění;
+  config zůstává beze změn. Export bere jméno z ExportContext.font_name, ostatní kreslení
+  z ensure_fonts();
+- font_file(): TTF vybraného fontu (None = vestavěná Helvetica);
+- pil_font(size_px): ImageFont pro náhledy – jeden objekt na velikost, sdílený mezi
+  rendery i vlákny (LRU);
+- face_metrics(): ascent/descent z reportlabu (1/1000 em) – PDF i náhled kladou řádky
+  podle stejných čísel místo PIL getmetrics.
+"""
+import threading
+from functools import lru_cache
+from typing import Tuple
+
+import config
+
+PIL_FALLBACK_TTF = "DejaVuSans.ttf"
+
+_lock = threading.RLock()
+_font: Tuple[str, str | None] | None = None   # (jméno, TTF) vybraného fontu – zapíše se jednou
+
+
+def _resolve() -> Tuple[str, str | None]:
+    global _font
+    font = _font
+    if font is not None:
+        return font
+    with _lock:
+        if _font is None:
+            from reportlab.pdfbase import pdfmetrics
+
+            for name, path in config.font_candidates():
+                if path is None or name in pdfmetrics.getRegisteredFontNames():
+                    break   # Helvetica je vestavěná, registrovaný font už načtený je
+                from reportlab.pdfbase.ttfonts import TTFont
+                try:
+                    pdfmetrics.registerFont(TTFont(name, path))
+                    break
+                except Exception:
+                    continue   # poškozený TTF => další kandidát
+            _font = (name, path)
+        return _font
+
+
+def ensure_fonts() -> str:
+    """Zaregistruje font do reportlabu, pokud ještě není; vrací jméno vybraného fontu."""
+    return _resolve()[0]
+
+
+def font_file() -> str | None:
+    """TTF vybraného fontu (po ensure_fonts); None = vestavěná Helvetica."""
+    return _resolve()[1]
+
+
+@lru_cache(maxsize=8)
+def _face_metrics(font_name: str) -> Tuple[float, float]:
+    from reportlab.pdfbase import pdfmetrics
+    return pdfmetrics.getAscent(font_name), abs(pdfmetrics.getDescent(font_name))
+
+
+def face_metrics(font_name: str | None = None) -> Tuple[float, float]:
+    """(ascent, descent) fontu v 1/1000 em, descent kladně – stejné hodnoty jako v PDF."""
+    name = ensure_fonts()
+    return _face_metrics(font_name or name)
+
+
+@lru_cache(maxsize=64)
+def _load_pil_font(path: str, size: float):
+    from PIL import ImageFont
+    try:
+        try:
+            return ImageFont.truetype(path, size)
+        except TypeError:   # starší Pillow bere jen celé velikosti
+            return ImageFont.truetype(path, max(1, int(round(size))))
+    except Exception:
+        return ImageFont.load_default()
+
+
+def pil_font(size_px: float):
+    """
+    ImageFont (TTF vybraného fontu, jinak DejaVuSans) ve velikosti size_px. Velikost se zaokrouhlí
+    na 1/64 px (rozlišení FreeType), aby si blízké velikosti z přepočtu pt -> px sdílely objekt.
+    """
+    return _load_pil_font(font_file() or PIL_FALLBACK_TTF, round(size_px * 64) / 64)
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Katalog segmentů: celý pool (PNG ve složce, seřazené jako v galerii) jako mřížka
+zmenšenin s názvy souborů, CATALOG_COLS × CATALOG_ROWS na stránku.
+
+Určeno pro tisíce segmentů:
+  - zmenšeniny se dekódují paralelně (iter_prepared, omezená fronta) a rovnou
+    zmenšují (JPEG přes draft už při dekódování), do PDF jde malý JPEG,
+  - s cache (export_catalog(cache=True), cli.py --catalog … --cache) se hotové zmenšeniny
+    ukládají do cache stránek (PAGE_CACHE_DIR), takže další katalog téhož poolu se jen skládá;
+    bez ní se na disk nic nezapisuje,
+  - PDF se zapisuje průběžně po dávkách CATALOG_BATCH_PAGES stránek
+    (StreamingPdfWriter) – paměť nezávisí na velikosti poolu.
+"""
+import io
+import math
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, List
+
+from PIL import Image
+from reportlab.lib.colors import HexColor
+
+from config import (
+    A4_W_PT, A4_H_PT, COVER_TITLE_COLOR_HEX,
+    CATALOG_COLS, CATALOG_ROWS, CATALOG_MARGIN_CM, CATALOG_GAP_CM, CATALOG_CAPTION_SIZE_PT,
+    CATALOG_THUMB_DPI, CATALOG_JPEG_QUALITY, CATALOG_BATCH_PAGES,
+)
+from fonts import ensure_fonts
+from price_table import fit_cell_text
+from pdf.export import PT_PER_CM, iter_prepared, page_fragment
+from pdf.images import KIND_PHOTO, PreparedImage, draw_prepared_image
+from pdf.page_cache import PageCache, file_identity, page_key
+from pdf.stream_writer import StreamingPdfWriter
+from pdf.vector import SEGMENT_SUFFIXES, is_vector_segment, vector_image
+
+CATALOG_HEADER_PT = 24.0
+CATALOG_TITLE_SIZE_PT = 12
+CATALOG_FRAME_COLOR_HEX = "#D0D0D0"
+
+
+def list_pool_segments(pool_dir: str | Path) -> List[str]:
+    """Segmenty (PNG, PDF, SVG) ve složce, seřazené (stejně jako galerie v GUI)."""
+    pool_dir = Path(pool_dir)
+    return [str(p) for p in sorted(pool_dir.iterdir()) if p.suffix.lower() in SEGMENT_SUFFIXES and p.is_file()]
+
+
+def catalog_cell_pt():
+    """(šířka buňky, výška buňky, výška boxu zmenšeniny) v bodech."""
+    margin = CATALOG_MARGIN_CM * PT_PER_CM
+    gap = CATALOG_GAP_CM * PT_PER_CM
+    cell_w = (A4_W_PT - 2 * margin - (CATALOG_COLS - 1) * gap) / CATALOG_COLS
+    cell_h = (A4_H_PT - 2 * margin - CATALOG_HEADER_PT - (CATALOG_ROWS - 1) * gap) / CATALOG_ROWS
+    return cell_w, cell_h, cell_h - CATALOG_CAPTION_SIZE_PT * 1.8
+
+
+def _jpeg_prepared(data: bytes) -> PreparedImage:
+    w, h = Image.open(io.BytesIO(data)).size   # jen hlavička
+    return PreparedImage(width=w, height=h, color_space="DeviceRGB", bits=8,
+                         filter="DCTDecode", data=data, kind=KIND_PHOTO)
+
+
+def prepare_catalog_thumb(path: str, max_w_px: int, max_h_px: int,
+                          cache: PageCache | None = None) -> PreparedImage:
+    """Zmenšenina segmentu jako JPEG stream (z cache, je-li zadaná, nebo dekódovat a zmenšit teď)."""
+    key = page_key("catalog-thumb", file_identity(path), max_w_px, max_h_px, CATALOG_JPEG_QUALITY)
+    data = cache.get(key) if cache is not None else None
+    if data is None:
+        try:
+            if is_vector_segment(path):
+                im = vector_image(path, max_w_px, max_h_px, cache)
+            else:
+                im = Image.open(path)
+                im.draft("RGB", (max_w_px, max_h_px))   # JPEG: zmenšení už při dekódování
+                scale = min(max_w_px / im.width, max_h_px / im.height, 1.0)
+                # BOX = průměr bloků, jeden průchod – u velkého zmenšení stejně dobré a 2× rychlejší než thumbnail
+                im = im.resize((max(1, round(im.width * scale)), max(1, round(im.height * scale))), Image.BOX)
+        except Exception:
+            im = Image.new("RGB", (max_w_px, max(1, max_w_px // 3)), "lightgray")
+        if im.mode in ("RGBA", "LA", "PA") or (im.mode == "P" and "transparency" in im.info):
+            rgba = im.convert("RGBA")
+            im = Image.new("RGB", rgba.size, "white")
+            im.paste(rgba, mask=rgba.getchannel("A"))
+        elif im.mode != "RGB":
+            im = im.convert("RGB")
+        buf = io.BytesIO()
+        im.save(buf, "JPEG", quality=CATALOG_JPEG_QUALITY, optimize=True)
+        data = buf.getvalue()
+        if cache is not None:
+            cache.put(key, data)
+    return _jpeg_prepared(data)
+
+
+def draw_catalog_page(c, title: str, page_no: int, n_pages: int,
+                      paths: List[str], thumbs: List[PreparedImage]):
+    margin = CATALOG_MARGIN_CM * PT_PER_CM
+    gap = CATALOG_GAP_CM * PT_PER_CM
+    cell_w, cell_h, box_h = catalog_cell_pt()
+    top = A4_H_PT - margin
+
+    font = ensure_fonts()
+    c.setFillColor(HexColor(COVER_TITLE_COLOR_HEX))
+    c.setFont(font, CATALOG_TITLE_SIZE_PT)
+    c.drawString(margin, top - CATALOG_TITLE_SIZE_PT, title)
+    c.drawRightString(A4_W_PT - margin, top - CATALOG_TITLE_SIZE_PT, f"{page_no} / {n_pages}")
+
+    c.setStrokeColor(HexColor(CATALOG_FRAME_COLOR_HEX))
+    c.setLineWidth(0.5)
+    c.setFont(font, CATALOG_CAPTION_SIZE_PT)
+    c.setFillColor(HexColor("#000000"))
+    for i, (path, thumb) in enumerate(zip(paths, thumbs)):
+        row, col = divmod(i, CATALOG_COLS)
+        x = margin + col * (cell_w + gap)
+        y_top = top - CATALOG_HEADER_PT - row * (cell_h + gap)
+        box_y = y_top - box_h
+        c.rect(x, box_y, cell_w, box_h, stroke=1, fill=0)
+        # contain – celý segment, na střed boxu
+        scale = min(cell_w / thumb.width, box_h / thumb.height)
+        w, h = thumb.width * scale, thumb.height * scale
+        draw_prepared_image(c, thumb, x + (cell_w - w) / 2, box_y + (box_h - h) / 2, w, h)
+        name = fit_cell_text(Path(path).name, font, CATALOG_CAPTION_SIZE_PT, cell_w)
+        c.drawCentredString(x + cell_w / 2, box_y - CATALOG_CAPTION_SIZE_PT * 1.3, name)
+    c.showPage()
+
+
+def export_catalog(out_path: str | BinaryIO, paths: List[str], title: str = "Katalog segmentů",
+                   workers: int | None = None, cache: PageCache | bool = False) -> int:
+    """
+    Zapíše katalog segmentů `paths` do out_path (cesta nebo binární stream, i nepřevíjitelný).
+    Vrací počet stránek. cache jako u export_pdf: True = PageCache.default(), nebo vlastní
+    PageCache; False (výchozí) = zmenšeniny se nikam neukládají a cache se nečistí.
+    """
+    if cache is True:
+        cache = PageCache.default()
+    cache = cache or None
+    if not hasattr(out_path, "write"):
+        with open(out_path, "wb") as fh:
+            return export_catalog(fh, paths, title, workers, cache)
+
+    per_page = CATALOG_COLS * CATALOG_ROWS
+    n_pages = max(1, math.ceil(len(paths) / per_page))
+    cell_w, _, box_h = catalog_cell_pt()
+    max_w_px = max(1, round(cell_w / 72.0 * CATALOG_THUMB_DPI))
+    max_h_px = max(1, round(box_h / 72.0 * CATALOG_THUMB_DPI))
+    thumbs = iter_prepared([(prepare_catalog_thumb, (p, max_w_px, max_h_px, cache)) for p in paths], workers)
+
+    def draw_batch(c, first: int, last: int):
+        for page in range(first, last):
+            chunk = paths[page * per_page:(page + 1) * per_page]
+            draw_catalog_page(c, title, page + 1, n_pages, chunk, list(islice(thumbs, len(chunk))))
+
+    writer = StreamingPdfWriter(out_path)
+    for first in range(0, n_pages, CATALOG_BATCH_PAGES):
+        last = min(first + CATALOG_BATCH_PAGES, n_pages)
+        writer.add_fragment(page_fragment(lambda c: draw_batch(c, first, last)))
+    writer.close()
+    if cache is not None:
+        cache.prune()
+    return n_pages
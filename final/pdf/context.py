@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Kontext jednoho exportu – aby šlo v jednom procesu bezpečně exportovat z víc vláken
+(služba pro víc operátorů, GUI + export na pozadí).
+
+Každý export dostane vlastní ExportContext: vlastní instance cache (včetně počítadel),
+vyřešený počet procesů, rozpočet paměti a layout (pdf.layout). Sdílené zůstává jen to, co je po startu
+neměnné (config, zaregistrované fonty) nebo chráněné zámkem (LRU v pdf.price_ingest
+a pdf.vector, atomické zápisy do cache). Fonty registruje fonts.ensure_fonts – jednou,
+pod zámkem, při prvním použití; vytvoření kontextu (config.try_register_font) ji pojistí
+a vybraný font (po případném náhradním za poškozený TTF) uloží do font_name, odkud ho
+bere kreslení exportu.
+"""
+from dataclasses import dataclass, replace
+
+from config import try_register_font
+from pdf.layout import DEFAULT_LAYOUT, LayoutProfile
+from pdf.low_memory import MemoryBudget
+from pdf.page_cache import ExportCache, PageCache
+
+
+@dataclass(frozen=True)
+class ExportContext:
+    font_name: str
+    workers: int | None = None
+    cache: PageCache | None = None
+    export_cache: ExportCache | None = None
+    memory: MemoryBudget | None = None
+    layout: LayoutProfile = DEFAULT_LAYOUT
+
+    @classmethod
+    def create(cls, workers: int | None = None, cache: PageCache | bool = False,
+               export_cache: ExportCache | bool = False,
+               memory_limit_mb: float | None = None,
+               layout: LayoutProfile | None = None) -> "ExportContext":
+        """Parametry jako u export_pdf: True = výchozí cache z configu, False = bez ní."""
+        font_name, _ = try_register_font()
+        memory = MemoryBudget.from_config(memory_limit_mb)
+        return cls(
+            font_name=font_name,
+            workers=memory.workers(workers) if memory is not None else workers,
+            cache=PageCache.default() if cache is True else (cache or None),
+            export_cache=ExportCache.default() if export_cache is True else (export_cache or None),
+            memory=memory,
+            layout=layout or DEFAULT_LAYOUT,
+        )
+
+    def without_export_cache(self) -> "ExportContext":
+        return replace(self, export_cache=None)
+
+    def with_layout(self, layout: LayoutProfile) -> "ExportContext":
+        return self if layout == self.layout else replace(self, layout=layout)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Několik variant titulní strany (EN/CZ datum, jiný nadpis) v jednom běhu.
+
+Stránky komponent a ceník se připraví, zakódují a rozparsují jen jednou a stejný
+fragment se zapíše do všech výstupů; liší se jen titulní strana. Každá varianta
+je bajtově stejná jako samostatný průběžný export (export_pdf(streaming=True)),
+takže se ukládá i do ExportCache a hotové varianty se jen zkopírují.
+"""
+import contextlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, List, Sequence
+
+from pdf.export import draw_body_page, draw_cover_page, iter_page_fragments, page_plan, quote_key
+from pdf.images import ImageEncoding, LOSSLESS
+from pdf.layout import DEFAULT_LAYOUT, LayoutProfile
+from pdf.page_cache import ExportCache, PageCache
+from pdf.stream_writer import PdfFragment, StreamingPdfWriter
+
+
+@dataclass(frozen=True)
+class CoverVariant:
+    out_path: str | BinaryIO
+    title_text: str
+    info_lines_text: str
+    date_style: str
+    use_today: bool = True
+
+
+def variant_path(out_path: str | Path, label: str) -> Path:
+    """„nabidka.pdf“ + „CZ“ => „nabidka-CZ.pdf“ (vedle sebe)."""
+    out_path = Path(out_path)
+    return out_path.with_name(f"{out_path.stem}-{label}{out_path.suffix or '.pdf'}")
+
+
+def date_variants(out_path: str | Path, title_text: str, info_lines_text: str, use_today: bool,
+                  date_styles: Sequence[str] = ("EN", "CZ")) -> List[CoverVariant]:
+    """Stejná titulní strana ve všech formátech data, soubory „<jméno>-EN.pdf“ atd."""
+    return [CoverVariant(str(variant_path(out_path, ds)), title_text, info_lines_text, ds, use_today)
+            for ds in date_styles]
+
+
+def export_pdf_variants(
+    variants: Sequence[CoverVariant],
+    order_paths: List[str],
+    price_image_path: str | None,
+    encoding: ImageEncoding = LOSSLESS,
+    workers: int | None = None,
+    cache: PageCache | bool = False,
+    export_cache: ExportCache | bool = False,
+    layout: LayoutProfile = DEFAULT_LAYOUT,
+) -> int:
+    """
+    Zapíše všechny varianty; společné stránky se renderují jednou (s cache=True i z PageCache).
+    Vrací počet variant, které se opravdu renderovaly (zbytek byl v ExportCache).
+    """
+    if cache is True:
+        cache = PageCache.default()
+    cache = cache or None
+    if export_cache is True:
+        export_cache = ExportCache.default()
+
+    todo = []
+    for v in variants:
+        key = quote_key(order_paths, 0.0, 0.0, v.title_text, v.info_lines_text, v.date_style,
+                        v.use_today, price_image_path, encoding, layout=layout)
+        if export_cache and export_cache.copy_to(key, v.out_path):
+            continue
+        todo.append((v, key))
+    if not todo:
+        return 0
+
+    with contextlib.ExitStack() as stack:
+        writers = []
+        for v, key in todo:
+            if export_cache:
+                fh = stack.enter_context(export_cache.recording(key, v.out_path))
+            elif hasattr(v.out_path, "write"):
+                fh = v.out_path
+            else:
+                fh = stack.enter_context(open(v.out_path, "wb"))
+            writer = StreamingPdfWriter(fh)
+            cover = page_plan(v.title_text, v.info_lines_text, v.date_style, v.use_today,
+                              order_paths, price_image_path, encoding, layout, cache)[0]
+            writer.add_fragment(next(iter_page_fragments(
+                [cover], lambda c, kind, images, v=v: draw_cover_page(
+                    c, v.title_text, v.info_lines_text, v.date_style, v.use_today, layout),
+                workers, cache)))
+            writers.append(writer)
+
+        v0 = todo[0][0]
+        body = page_plan(v0.title_text, v0.info_lines_text, v0.date_style, v0.use_today,
+                         order_paths, price_image_path, encoding, layout, cache)[1:]
+
+        def draw(c, kind, images):
+            draw_body_page(c, kind, images, layout)
+
+        for data in iter_page_fragments(body, draw, workers, cache):
+            frag = PdfFragment.parse(data)   # parsuje se jednou pro všechny výstupy
+            for writer in writers:
+                writer.add_fragment(frag)
+        for writer in writers:
+            writer.close()
+    if cache is not None:
+        cache.prune()
+    return len(todo)
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Rychlý koncept PDF „co je na obrazovce“ – z hotových obrázků náhledu (preview_pages),
+bez sahání na zdrojové segmenty. Každá stránka = jeden JPEG přes celou stránku;
+kódování běží ve vláknech (Pillow při něm uvolňuje GIL). Plnohodnotný export je
+zvlášť (pdf.export) – tady jde jen o rychlost a malý soubor do chatu.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, List
+
+from PIL import Image
+from reportlab.pdfgen import canvas as pdfcanvas
+
+from config import A4_W_PT, DRAFT_JPEG_QUALITY
+from pdf.images import draw_prepared_image, encode_jpeg
+
+
+def export_draft_pdf(out_path: str | BinaryIO, pages: List[Image.Image],
+                     quality: int = DRAFT_JPEG_QUALITY) -> int:
+    """Zapíše stránky náhledu jako PDF (šířka A4, výška podle poměru stránky); vrací počet stran."""
+    if not pages:
+        raise ValueError("Náhled je prázdný – není z čeho udělat koncept.")
+    with ThreadPoolExecutor() as ex:
+        images = list(ex.map(lambda im: encode_jpeg(im, quality, optimize=False), pages))
+
+    c = pdfcanvas.Canvas(out_path, invariant=1)
+    for img in images:
+        w, h = A4_W_PT, A4_W_PT * img.height / img.width
+        c.setPageSize((w, h))
+        draw_prepared_image(c, img, 0, 0, w, h)
+        c.showPage()
+    c.save()
+    return len(images)
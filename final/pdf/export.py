@@ -1,135 +1,116 @@
 # -*- coding: utf-8 -*-
-import math
+import contextlib
+import io
+import multiprocessing
 import os
-from typing import List
-
-from PIL import Image, ImageDraw, ImageFont
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator, List
+
+from PIL import Image, ImageDraw
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas as pdfcanvas
-from reportlab.lib.utils import ImageReader
 from reportlab.lib.colors import HexColor
-from reportlab.pdfbase import pdfmetrics  # pro ascent/descent
+from reportlab.platypus import Table, TableStyle
 
 from config import (
     # Rozměry A4 v bodech
     A4_W_PT, A4_H_PT,
-    # Fonty pro PDF / náhled
-    FONT_NAME, PREVIEW_TTF,
-    # Logika dokumentu
-    SEGMENTS_PER_PAGE_FIXED, PRICE_TOP_OFFSET_CM,
-    # Titulní strana
-    COVER_TITLE_COLOR_HEX, COVER_LINE_THICKNESS_PT, COVER_SIDE_MARGIN_CM,
-    COVER_BAND_TOP_CM, COVER_BAND_BOTTOM_CM, COVER_TITLE_SIZE_PT,
-    COVER_INFO_BLOCK_LEFT_CM, COVER_INFO_BLOCK_BOTTOM_CM, COVER_INFO_SIZE_PT,
-    COVER_TITLE_OFFSET_MM,                          # jemný posun nadpisu v mm ( + nahoru )
-    COVER_TOP_LINE_COLOR_HEX, COVER_BOTTOM_LINE_COLOR_HEX,COMPONENT_MARGIN_MM,  # barvy linek pásu
     # Datumové helpery
     czech_date, english_date_upper,
-    # Pevná šířka screenshotu ceníku (v cm)
-    PRICE_IMAGE_WIDTH_CM,
+    # Paralelní příprava obrázků
+    EXPORT_WORKERS, PREPARE_QUEUE_PER_WORKER,
+)
+from price_table import (
+    PriceTable, TABLE_BOLD_FILL_HEX, TABLE_GRID_COLOR_HEX, TABLE_GRID_WIDTH_PT,
+    fit_cell_text, is_price_table, layout_price_table, load_price_table,
 )
+from pdf.images import ImageEncoding, LOSSLESS, PreparedImage, encode_image, draw_prepared_image, open_rgb
+from pdf.linearize import linearize_pdf, require_linearize
+from fonts import ensure_fonts, pil_font
+from pdf.context import ExportContext
+from pdf.layout import DEFAULT_LAYOUT, LayoutProfile
+from pdf.low_memory import restore, spilled_call
+from pdf.price_ingest import ingest_price_image, iter_price_bands, price_image_size
+from pdf.page_cache import ExportCache, PageCache, export_key, file_identity, page_key
+from pdf.stream_writer import StreamingPdfWriter
+from pdf.text_fit import fit_text
+from pdf.vector import VectorTile, draw_vector_tile, is_vector_segment, prepare_vector_tile
+
+PT_PER_CM = 72.0 / 2.54
+PT_PER_MM = 72.0 / 25.4
+
+
+def cover_band_pt(layout: LayoutProfile = DEFAULT_LAYOUT):
+    """Pás nadpisu titulní strany v bodech PDF (Y odspodu): (left, right, y_top, y_bot)."""
+    left_pt = layout.cover_side_margin_cm * PT_PER_CM
+    right_pt = A4_W_PT - left_pt
+    y_top_pt = A4_H_PT - (layout.cover_band_top_cm * PT_PER_CM)        # horní linka pásu (větší Y)
+    y_bot_pt = A4_H_PT - (layout.cover_band_bottom_cm * PT_PER_CM)     # dolní linka pásu (menší Y)
+    return left_pt, right_pt, y_top_pt, y_bot_pt
+
+
+def cover_title_block(title_text: str, layout: LayoutProfile = DEFAULT_LAYOUT, font_name: str | None = None):
+    """
+    Rozvržení nadpisu titulní strany pro PDF i náhled (page_raster): TextFit (velikost,
+    řádky) a [(x, baseline)] každého řádku v bodech PDF (Y odspodu), 1. řádek nahoře.
+    Wrap max. 2 řádky, auto-shrink do 22 pt, blok centrovaný v pásu + cover_title_offset_mm.
+    font_name: font exportu (ExportContext.font_name); None = fonts.ensure_fonts().
+    """
+    left_pt, right_pt, y_top_pt, y_bot_pt = cover_band_pt(layout)
+    band_h = max(1.0, y_top_pt - y_bot_pt)                        # výška pásu
+    max_w = right_pt - left_pt
+    offset_pt = layout.cover_title_offset_mm * PT_PER_MM          # + nahoru, - dolů
 
+    title = (title_text.strip() or "CENOVÁ NABÍDKA").upper()
+    fit = fit_text(title, font_name or ensure_fonts(), max_w, band_h, layout.cover_title_size_pt, 22, max_lines=2, leading=1.12)
 
-def export_pdf(
-    out_path: str,
-    order_paths: List[str],
-    margin_cm: float,      # ignorováno (komponenty jedou edge-to-edge)
-    gap_cm: float,         # ignorováno
-    title_text: str,
-    info_lines_text: str,
-    date_style: str,
-    use_today: bool,
-    price_image_path: str | None,
-):
+    top_y = y_bot_pt + (band_h - fit.block_height) / 2.0          # spodní okraj textového bloku
+    baseline_y = top_y + fit.ascent + offset_pt + (len(fit.lines) - 1) * fit.line_height
+    positions = []
+    for line_w in fit.widths:
+        positions.append((left_pt + (max_w - line_w) / 2.0, baseline_y))   # horizontální střed pásu
+        baseline_y -= fit.line_height
+    return fit, positions
+
+
+def draw_cover_page(c, title_text: str, info_lines_text: str, date_style: str, use_today: bool,
+                    layout: LayoutProfile = DEFAULT_LAYOUT, font_name: str | None = None):
     """
-    Export PDF:
-      - Titulní strana: jen spodní linka je viditelná (horní je bílá), nadpis je centrovaný
-        mezi linkami; jemný posun přes COVER_TITLE_OFFSET_MM.
-      - Stránky komponent: 4 „dlaždice“ na výšku, edge-to-edge, cover ořez (bez deformace).
-      - Poslední strana: screenshot ceníku s horním odsazením PRICE_TOP_OFFSET_CM a pevnou
-        šířkou PRICE_IMAGE_WIDTH_CM (výška se dopočítá). Obrázek se NEpřevzorkovává — vkládá se
-        v plném rozlišení a škáluje se až při vykreslení do PDF.
-    """
-    c = pdfcanvas.Canvas(out_path, pagesize=A4)
-    W, H = A4_W_PT, A4_H_PT  # body (1 pt = 1/72")
-    pt_per_cm = 72.0 / 2.54
-    pt_per_mm = 72.0 / 25.4
-    offset_pt = COVER_TITLE_OFFSET_MM * pt_per_mm  # + nahoru, - dolů
+    Titulní strana: jen spodní linka je viditelná (horní je bílá), nadpis je centrovaný
+    mezi linkami; jemný posun přes layout.cover_title_offset_mm.
+    """
+    pt_per_cm = PT_PER_CM
+    font = font_name or ensure_fonts()
 
     # === Titulní strana ======================================================
-    title_col   = HexColor(COVER_TITLE_COLOR_HEX)
-    line_top    = HexColor(COVER_TOP_LINE_COLOR_HEX)
-    line_bottom = HexColor(COVER_BOTTOM_LINE_COLOR_HEX)
+    title_col   = HexColor(layout.cover_title_color_hex)
+    line_top    = HexColor(layout.cover_top_line_color_hex)
+    line_bottom = HexColor(layout.cover_bottom_line_color_hex)
 
-    left_pt = COVER_SIDE_MARGIN_CM * pt_per_cm
-    right_pt = W - left_pt
-    y_top_pt = H - (COVER_BAND_TOP_CM * pt_per_cm)        # horní linka pásu (větší Y)
-    y_bot_pt = H - (COVER_BAND_BOTTOM_CM * pt_per_cm)     # dolní linka pásu (menší Y)
-    band_h   = max(1.0, y_top_pt - y_bot_pt)              # výška pásu
+    left_pt, right_pt, y_top_pt, y_bot_pt = cover_band_pt(layout)
 
     # Linky pásu (horní na bílo = "neviditelná", spodní v barvě)
-    c.setLineWidth(COVER_LINE_THICKNESS_PT)
+    c.setLineWidth(layout.cover_line_thickness_pt)
     c.setStrokeColor(line_top)
     c.line(left_pt, y_top_pt, right_pt, y_top_pt)
     c.setStrokeColor(line_bottom)
     c.line(left_pt, y_bot_pt, right_pt, y_bot_pt)
 
-    # --- Nadpis: wrap (max 2 řádky) + auto-shrink + centrování H/V ---
-    title = (title_text.strip() or "CENOVÁ NABÍDKA").upper()
-    max_w = right_pt - left_pt
-    leading_factor = 1.12
-    fs = COVER_TITLE_SIZE_PT
-    min_fs = 22
-
-    def wrap_lines(text: str, fs_pt: float) -> list[str]:
-        words = text.split()
-        lines, cur = [], ""
-        for w in words:
-            test = (cur + " " + w).strip()
-            if c.stringWidth(test, FONT_NAME, fs_pt) <= max_w:
-                cur = test
-            else:
-                if cur:
-                    lines.append(cur)
-                cur = w
-        if cur:
-            lines.append(cur)
-        return lines
-
-    def block_metrics(fs_pt: float):
-        asc = pdfmetrics.getAscent(FONT_NAME)  * fs_pt / 1000.0
-        dsc = abs(pdfmetrics.getDescent(FONT_NAME)) * fs_pt / 1000.0
-        line_h = (asc + dsc) * leading_factor
-        return asc, dsc, line_h
-
-    lines = wrap_lines(title, fs)
-    asc, dsc, line_h = block_metrics(fs)
-
-    while (
-        len(lines) > 2
-        or any(c.stringWidth(L, FONT_NAME, fs) > max_w for L in lines)
-        or (len(lines) * line_h) > band_h
-    ) and fs > min_fs:
-        fs -= 1
-        lines = wrap_lines(title, fs)
-        asc, dsc, line_h = block_metrics(fs)
-
-    block_h   = len(lines) * line_h
-    top_y     = y_bot_pt + (band_h - block_h) / 2.0      # horní okraj textového bloku
-    baseline_y = top_y + asc + offset_pt                  # baseline 1. řádku (aplikuje offset)
-
+    # --- Nadpis: wrap (max 2 řádky) + auto-shrink + centrování H/V (sdílené s náhledem) ---
+    fit, positions = cover_title_block(title_text, layout, font)
     c.setFillColor(title_col)
-    for L in lines:
-        c.setFont(FONT_NAME, fs)
-        line_w = c.stringWidth(L, FONT_NAME, fs)
-        x = left_pt + (max_w - line_w) / 2.0             # horizontální střed pásu
+    for L, (x, baseline_y) in zip(fit.lines, positions):
+        c.setFont(font, fit.size)
         c.drawString(x, baseline_y, L)
-        baseline_y += line_h
 
     # --- Spodní blok: adresa + (volitelně) datum nad adresou ---
-    info_x = COVER_INFO_BLOCK_LEFT_CM * pt_per_cm
-    info_y_base = COVER_INFO_BLOCK_BOTTOM_CM * pt_per_cm
-    fs_info = COVER_INFO_SIZE_PT
+    info_x = layout.cover_info_block_left_cm * pt_per_cm
+    info_y_base = layout.cover_info_block_bottom_cm * pt_per_cm
+    fs_info = layout.cover_info_size_pt
     leading_info = fs_info * 1.15
     gap_date = 6
 
@@ -139,113 +120,541 @@ def export_pdf(
     y_info = info_y_base
     c.setFillColor(title_col)
     for ln in info_lines:
-        c.setFont(FONT_NAME, fs_info)
+        c.setFont(font, fs_info)
         c.drawString(info_x, y_info, ln)
         y_info += leading_info
 
     if use_today:
-        c.setFont(FONT_NAME, fs_info)
+        c.setFont(font, fs_info)
         date_str = english_date_upper() if date_style == "EN" else czech_date()
         c.drawString(info_x, y_info + gap_date, date_str)
 
     c.showPage()
 
-        # === Komponentové stránky: 4 dlaždice s marginy v mm, cover-řez =============
-    if order_paths:
-        # rozbal margin v bodech
-        def unpack_margin_mm(m):
-            if isinstance(m, (list, tuple)) and len(m) == 4:
-                ml, mt, mr, mb = m
-            else:
-                ml = mt = mr = mb = float(m)
-            return ml * pt_per_mm, mt * pt_per_mm, mr * pt_per_mm, mb * pt_per_mm
-
-        ml_pt, mt_pt, mr_pt, mb_pt = unpack_margin_mm(COMPONENT_MARGIN_MM)
-
-        inner_w = max(1.0, W - ml_pt - mr_pt)
-        inner_h = max(1.0, H - mt_pt - mb_pt)
-
-        spp = SEGMENTS_PER_PAGE_FIXED  # 4
-        total_pages = math.ceil(len(order_paths) / spp)
-        cell_h_pt = inner_h / spp                       # výška dlaždice uvnitř marginů
-        target_ratio = inner_w / cell_h_pt              # poměr w:h dlaždice (pro cover crop)
-
-        for p in range(total_pages):
-            start = p * spp
-            end = min(start + spp, len(order_paths))
-            y_top = H - mt_pt                           # začínáme pod horním marginem
-            for path in order_paths[start:end]:
-                im = Image.open(path).convert("RGB")
-                iw, ih = im.size
-                img_ratio = iw / ih
-
-                # cover ořez do poměru inner_w : cell_h_pt
-                if img_ratio > target_ratio:
-                    new_w = int(ih * target_ratio)
-                    x0 = max(0, (iw - new_w) // 2)
-                    box = (x0, 0, x0 + new_w, ih)
-                else:
-                    new_h = int(iw / target_ratio)
-                    y0 = max(0, (ih - new_h) // 2)
-                    box = (0, y0, iw, y0 + new_h)
-
-                tile = im.crop(box)  # bez resamplingu – RL škáluje při kreslení
-                img_reader = ImageReader(tile)
-                y_top -= cell_h_pt
-                c.drawImage(
-                    img_reader,
-                    ml_pt,                 # x = levý margin
-                    y_top,                 # y v rámci vnitřního obdélníku
-                    width=inner_w,
-                    height=cell_h_pt,
-                    preserveAspectRatio=False,
-                    mask='auto'
-                )
-            c.showPage()
 
-    # === Cenová stránka: pevná šířka v cm, horní odsazení, bez re-samplingu ==
-    top_offset_pt = PRICE_TOP_OFFSET_CM * pt_per_cm
-    target_w_pt   = PRICE_IMAGE_WIDTH_CM * pt_per_cm
-    max_h_pt      = H - top_offset_pt
 
-    # Načtení screenshotu (PNG doporučeno kvůli ostrosti textu)
-    if price_image_path and os.path.exists(price_image_path):
-        im = Image.open(price_image_path).convert("RGB")
+# === Komponentové stránky: 4 dlaždice s marginy v mm, cover-řez ==============
+
+def _unpack_margin_mm(m):
+    if isinstance(m, (list, tuple)) and len(m) == 4:
+        ml, mt, mr, mb = m
     else:
-        # Placeholder, když obrázek není k dispozici
-        im = Image.new("RGB", (1200, 800), "white")
-        dr = ImageDraw.Draw(im)
-        try:
-            f = ImageFont.truetype(PREVIEW_TTF or "DejaVuSans.ttf", 36)
-        except Exception:
-            f = ImageFont.load_default()
-        txt = "Cenová tabulka (obrázek nenahrán)"
-        tw, th = dr.textbbox((0, 0), txt, font=f)[2:4]
-        dr.text(((1200 - tw) // 2, (800 - th) // 2), txt, fill="black", font=f)
+        ml = mt = mr = mb = float(m)
+    return ml * PT_PER_MM, mt * PT_PER_MM, mr * PT_PER_MM, mb * PT_PER_MM
 
-    w0, h0 = im.size  # pixely
 
-    # Výška v bodech při pevné šířce (poměr stran)
-    height_pt = (h0 / w0) * target_w_pt
+def component_cell_pt(layout: LayoutProfile = DEFAULT_LAYOUT):
+    """Vrátí (ml_pt, mt_pt, inner_w, cell_h_pt) – geometrie dlaždic na komponentové stránce."""
+    ml_pt, mt_pt, mr_pt, mb_pt = _unpack_margin_mm(layout.component_margin_mm)
+    inner_w = max(1.0, A4_W_PT - ml_pt - mr_pt)
+    inner_h = max(1.0, A4_H_PT - mt_pt - mb_pt)
+    cell_h_pt = inner_h / layout.segments_per_page     # výška dlaždice uvnitř marginů
+    return ml_pt, mt_pt, inner_w, cell_h_pt
+
 
-    # Když by výška přesáhla dostupný prostor pod horním odsazením,
-    # zmenši úměrně i šířku (stále bez re-samplingu originálu).
+def cover_crop_box(iw: int, ih: int, target_ratio: float):
+    """Box pro cover ořez obrázku iw × ih do poměru target_ratio (w:h), na střed."""
+    img_ratio = iw / ih
+    if img_ratio > target_ratio:
+        new_w = int(ih * target_ratio)
+        x0 = max(0, (iw - new_w) // 2)
+        return (x0, 0, x0 + new_w, ih)
+    new_h = int(iw / target_ratio)
+    y0 = max(0, (ih - new_h) // 2)
+    return (0, y0, iw, y0 + new_h)
+
+
+def load_segment_tile(path: str, layout: LayoutProfile = DEFAULT_LAYOUT) -> Image.Image:
+    """Načte segment a ořízne ho (cover) na poměr dlaždice – bez resamplingu."""
+    _, _, inner_w, cell_h_pt = component_cell_pt(layout)
+    return open_rgb(path, lambda w, h: cover_crop_box(w, h, inner_w / cell_h_pt))
+
+
+def prepare_segment_tile(path: str, encoding: ImageEncoding = LOSSLESS,
+                         layout: LayoutProfile = DEFAULT_LAYOUT) -> PreparedImage | VectorTile:
+    """Dlaždice pro PDF: hotový obrazový stream, nebo vektorový segment (.pdf/.svg, viz pdf.vector)."""
+    if is_vector_segment(path):
+        return prepare_vector_tile(path)
+    _, _, inner_w, cell_h_pt = component_cell_pt(layout)
+    return encode_image(load_segment_tile(path, layout), inner_w, cell_h_pt, encoding)
+
+
+def draw_component_pages(c, tiles: Iterable[PreparedImage], layout: LayoutProfile = DEFAULT_LAYOUT):
+    """
+    Vykreslí dlaždice po layout.segments_per_page na stránku (edge-to-edge uvnitř marginů).
+    tiles může být i generátor – dlaždice se spotřebovávají průběžně, jak jsou hotové.
+    """
+    for page in iter_component_pages(tiles, layout):
+        draw_component_page(c, page, layout)
+
+
+def iter_component_pages(tiles: Iterable[PreparedImage],
+                         layout: LayoutProfile = DEFAULT_LAYOUT) -> Iterator[List[PreparedImage]]:
+    """Rozdělí (i průběžně vznikající) dlaždice po layout.segments_per_page na stránky."""
+    it = iter(tiles)
+    while True:
+        page = list(islice(it, layout.segments_per_page))
+        if not page:
+            return
+        yield page
+
+
+def draw_component_page(c, page_tiles: List[PreparedImage], layout: LayoutProfile = DEFAULT_LAYOUT):
+    """Jedna komponentová stránka: až layout.segments_per_page dlaždic pod sebou."""
+    ml_pt, mt_pt, inner_w, cell_h_pt = component_cell_pt(layout)
+    y_top = A4_H_PT - mt_pt                             # začínáme pod horním marginem
+    for tile in page_tiles:
+        y_top -= cell_h_pt
+        if isinstance(tile, VectorTile):
+            draw_vector_tile(c, tile, ml_pt, y_top, inner_w, cell_h_pt)
+        else:
+            draw_prepared_image(c, tile, ml_pt, y_top, inner_w, cell_h_pt)
+    c.showPage()
+
+
+def _pool_context():
+    """
+    Fork z procesu, kde běží další vlákna (souběžné exporty, GUI), může zdědit zamčený
+    zámek (cache, LRU) a proces přípravy by visel – pak se startuje přes forkserver.
+    (macOS a Windows startují procesy přes spawn, tam se nic nemění.)
+    """
+    if (threading.active_count() > 1 and multiprocessing.get_context().get_start_method() == "fork"
+            and "forkserver" in multiprocessing.get_all_start_methods()):
+        return multiprocessing.get_context("forkserver")
+    return None
+
+
+def iter_prepared(jobs: List[tuple], workers: int | None = None,
+                  spill_dir: str | None = None) -> Iterator[PreparedImage]:
+    """
+    Spustí přípravu obrázků (dekódování, ořez, resampling, kódování) dopředu v procesním
+    poolu a vrací výsledky ve stejném pořadí jako `jobs` = [(funkce, args), ...].
+    Rozpracovaných úloh je nejvýš PREPARE_QUEUE_PER_WORKER × workers, takže paměť
+    je omezená i pro dlouhé nabídky. workers=1 => vše sekvenčně v tomto procesu.
+    spill_dir: hotové streamy čekají ve frontě jako soubory (úsporný režim, pdf.low_memory).
+    """
+    if workers is None:
+        workers = EXPORT_WORKERS or os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+    if workers == 1:
+        for fn, args in jobs:
+            yield fn(*args)
+        return
+
+    if spill_dir is not None:
+        jobs = [(spilled_call, (fn, args, spill_dir)) for fn, args in jobs]
+    max_pending = workers * PREPARE_QUEUE_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as ex:
+        pending = deque()
+        todo = iter(jobs)
+        for fn, args in islice(todo, max_pending):
+            pending.append(ex.submit(fn, *args))
+        while pending:
+            fut = pending.popleft()
+            nxt = next(todo, None)
+            if nxt is not None:
+                pending.append(ex.submit(nxt[0], *nxt[1]))
+            yield restore(fut.result())
+
+
+# === Cenová stránka: pevná šířka v cm, horní odsazení =======================
+
+def load_price_image(price_image_path: str | None, cache: PageCache | None = None) -> Image.Image:
+    """
+    Screenshot ceníku (PNG doporučeno kvůli ostrosti textu) – ořezaný a případně
+    v bezeztrátové paletě (pdf.price_ingest, zpracuje se jednou); jinak placeholder.
+    cache: PageCache exportu pro zpracovaný ceník (None = jen v paměti).
+    """
+    if price_image_path and os.path.exists(price_image_path):
+        return ingest_price_image(price_image_path, cache=cache)
+    # Placeholder, když obrázek není k dispozici
+    im = Image.new("RGB", (1200, 800), "white")
+    dr = ImageDraw.Draw(im)
+    f = pil_font(36)
+    txt = "Cenová tabulka (obrázek nenahrán)"
+    tw, th = dr.textbbox((0, 0), txt, font=f)[2:4]
+    dr.text(((1200 - tw) // 2, (800 - th) // 2), txt, fill="black", font=f)
+    return im
+
+
+def price_box_pt(w0: int, h0: int, layout: LayoutProfile = DEFAULT_LAYOUT):
+    """
+    Vrátí (x, y, width_pt, height_pt) pro ceník w0 × h0 px: pevná šířka layout.price_image_width_cm,
+    a když by výška přesáhla prostor pod horním odsazením, zmenší se úměrně i šířka.
+    """
+    top_offset_pt = layout.price_top_offset_cm * PT_PER_CM
+    target_w_pt = layout.price_image_width_cm * PT_PER_CM
+    max_h_pt = A4_H_PT - top_offset_pt
+
+    height_pt = (h0 / w0) * target_w_pt
     if height_pt > max_h_pt:
         scale = max_h_pt / height_pt
         width_pt = target_w_pt * scale
         height_pt = max_h_pt
     else:
         width_pt = target_w_pt
+    x = (A4_W_PT - width_pt) / 2
+    y = A4_H_PT - top_offset_pt - height_pt
+    return x, y, width_pt, height_pt
 
-    # Vlož originální bitmapu v plném rozlišení, jen ji „vykresli“ na daný box.
-    img_reader_price = ImageReader(im)
-    x = (W - width_pt) / 2
-    y = H - top_offset_pt - height_pt
-    c.drawImage(
-        img_reader_price, x, y,
-        width=width_pt, height=height_pt,
-        preserveAspectRatio=False, mask='auto'
-    )
 
-    c.showPage()
-    c.save()
\ No newline at end of file
+def price_band_px(width_px: int, layout: LayoutProfile = DEFAULT_LAYOUT) -> int:
+    """Nejvyšší pás ceníku (px) pro obrázek široký width_px – stránka při pevné šířce, odsazení nahoře i dole."""
+    top_offset_pt = layout.price_top_offset_cm * PT_PER_CM
+    return int((A4_H_PT - 2 * top_offset_pt) * width_px / (layout.price_image_width_cm * PT_PER_CM))
+
+
+def is_tall_price(price_image_path: str | None, layout: LayoutProfile = DEFAULT_LAYOUT,
+                  cache: PageCache | None = None) -> bool:
+    """Screenshot ceníku, který se při pevné šířce nevejde na stránku (a layout.price_split_tall je zapnuté)."""
+    if not (layout.price_split_tall and price_image_path and os.path.exists(price_image_path)):
+        return False
+    if is_price_table(price_image_path):
+        return False
+    w, h = price_image_size(price_image_path, cache)
+    return h > price_band_px(w, layout)
+
+
+def iter_price_band_images(price_image_path: str, layout: LayoutProfile = DEFAULT_LAYOUT,
+                           cache: PageCache | None = None) -> Iterator[Image.Image]:
+    """Pásy vysokého ceníku shora dolů – v paměti vždy jen jeden (viz pdf.price_ingest)."""
+    w, _ = price_image_size(price_image_path, cache)
+    return iter_price_bands(price_image_path, price_band_px(w, layout), cache)
+
+
+def prepare_price_image(price_image_path: str | None, encoding: ImageEncoding = LOSSLESS,
+                        layout: LayoutProfile = DEFAULT_LAYOUT,
+                        cache: PageCache | None = None) -> PreparedImage | PriceTable | List[PreparedImage]:
+    """
+    Ceník pro stránku: hotový obrazový stream, PriceTable pro .xlsx/.csv,
+    nebo seznam streamů po pásech pro vysoký screenshot (každý pás = stránka).
+    cache: PageCache exportu pro mezivýsledky ceníku (None = na disk nic).
+    """
+    if is_price_table(price_image_path):
+        return load_price_table(price_image_path)
+    if is_tall_price(price_image_path, layout, cache):
+        bands = []
+        for band in iter_price_band_images(price_image_path, layout, cache):
+            _, _, width_pt, height_pt = price_box_pt(*band.size, layout)
+            bands.append(encode_image(band, width_pt, height_pt, encoding))
+        return bands
+    im = load_price_image(price_image_path, cache)
+    _, _, width_pt, height_pt = price_box_pt(*im.size, layout)
+    return encode_image(im, width_pt, height_pt, encoding)
+
+
+def price_table_layout(table: PriceTable, layout: LayoutProfile = DEFAULT_LAYOUT, font_name: str | None = None):
+    """Rozvržení tabulkového ceníku: šířka jako screenshot, stejné horní odsazení i dole."""
+    top_offset_pt = layout.price_top_offset_cm * PT_PER_CM
+    return layout_price_table(table, font_name or ensure_fonts(), layout.price_image_width_cm * PT_PER_CM,
+                              A4_H_PT - 2 * top_offset_pt)
+
+
+def draw_price_table_pages(c, table: PriceTable, layout: LayoutProfile = DEFAULT_LAYOUT,
+                           font_name: str | None = None):
+    """Ceník z tabulky jako vektorový text (reportlab Table); dlouhá tabulka pokračuje na další stránce."""
+    font = font_name or ensure_fonts()
+    lay = price_table_layout(table, layout, font)
+    x = (A4_W_PT - lay.width) / 2
+    top_y = A4_H_PT - layout.price_top_offset_cm * PT_PER_CM
+    for r0, r1 in lay.pages:
+        if r1 <= r0:
+            c.showPage()
+            continue
+        rows = [
+            [fit_cell_text(text, font, lay.font_size, w - 2 * lay.padding)
+             for text, w in zip(table.rows[r], lay.col_widths)]
+            for r in range(r0, r1)
+        ]
+        style = [
+            ("FONTNAME", (0, 0), (-1, -1), font),
+            ("FONTSIZE", (0, 0), (-1, -1), lay.font_size),
+            ("LEADING", (0, 0), (-1, -1), lay.font_size * 1.2),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("LEFTPADDING", (0, 0), (-1, -1), lay.padding),
+            ("RIGHTPADDING", (0, 0), (-1, -1), lay.padding),
+            ("TOPPADDING", (0, 0), (-1, -1), 0),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+            ("GRID", (0, 0), (-1, -1), TABLE_GRID_WIDTH_PT, HexColor(TABLE_GRID_COLOR_HEX)),
+        ]
+        for i, r in enumerate(range(r0, r1)):
+            if table.row_is_bold(r):
+                style.append(("BACKGROUND", (0, i), (-1, i), HexColor(TABLE_BOLD_FILL_HEX)))
+            for col, numeric in enumerate(table.numeric[r]):
+                if numeric:
+                    style.append(("ALIGN", (col, i), (col, i), "RIGHT"))
+        t = Table(rows, colWidths=list(lay.col_widths), rowHeights=[lay.row_height] * (r1 - r0),
+                  style=TableStyle(style))
+        t.wrapOn(c, lay.width, A4_H_PT)
+        t.drawOn(c, x, top_y - lay.row_height * (r1 - r0))
+        c.showPage()
+
+
+def draw_price_page(c, price: PreparedImage | PriceTable | List[PreparedImage],
+                    layout: LayoutProfile = DEFAULT_LAYOUT, font_name: str | None = None):
+    if isinstance(price, PriceTable):
+        draw_price_table_pages(c, price, layout, font_name)
+        return
+    # Box se počítá z rozměrů streamu – podvzorkování zachovává poměr stran.
+    for part in (price if isinstance(price, list) else [price]):
+        x, y, width_pt, height_pt = price_box_pt(part.width, part.height, layout)
+        draw_prepared_image(c, part, x, y, width_pt, height_pt)
+        c.showPage()
+
+
+def render_pdf(
+    out,
+    title_text: str,
+    info_lines_text: str,
+    date_style: str,
+    use_today: bool,
+    tiles: Iterable[PreparedImage],
+    price: PreparedImage,
+    layout: LayoutProfile = DEFAULT_LAYOUT,
+    font_name: str | None = None,
+):
+    """
+    Složí PDF z hotových obrazových streamů (jednovláknově – jen registruje a kreslí).
+    out = cesta nebo binární file-like objekt.
+    """
+    c = pdfcanvas.Canvas(out, pagesize=A4, invariant=1)
+    draw_cover_page(c, title_text, info_lines_text, date_style, use_today, layout, font_name)
+    draw_component_pages(c, tiles, layout)
+    draw_price_page(c, price, layout, font_name)
+    c.save()
+
+
+def page_fragment(draw) -> bytes:
+    """
+    Vyrenderuje jednu stránku jako samostatné PDF v paměti (draw(c) kreslí a volá showPage).
+    Canvas i jeho obrázky se po návratu uvolní.
+    """
+    buf = io.BytesIO()
+    c = pdfcanvas.Canvas(buf, pagesize=A4, invariant=1)
+    draw(c)
+    c.save()
+    return buf.getvalue()
+
+
+def _cover_date_text(date_style: str, use_today: bool) -> str:
+    """Datum, které draw_cover_page vypíše (kvůli klíči cache – mění se denně)."""
+    if not use_today:
+        return ""
+    return english_date_upper() if date_style == "EN" else czech_date()
+
+
+def page_plan(title_text, info_lines_text, date_style, use_today, order_paths, price_image_path, encoding,
+              layout: LayoutProfile = DEFAULT_LAYOUT, cache: PageCache | None = None):
+    """
+    Stránky dokumentu jako [(druh, klíč cache, úlohy přípravy obrázků)].
+    Klíč = hash všeho, co stránku ovlivňuje včetně layoutu (viz pdf.page_cache).
+    Layout jede i v argumentech úloh, takže jeden pool obslouží nabídky s různými layouty;
+    stejně tak cache exportu (mezivýsledky úloh jdou na disk jen s ní).
+    """
+    date_text = _cover_date_text(date_style, use_today)
+    plan = [("cover", page_key("cover", title_text, info_lines_text, date_text, layout), [])]
+    spp = layout.segments_per_page
+    for i in range(0, len(order_paths), spp):
+        chunk = order_paths[i:i + spp]
+        key = page_key("components", [file_identity(p) or p for p in chunk], encoding, layout)
+        plan.append(("components", key, [(prepare_segment_tile, (p, encoding, layout)) for p in chunk]))
+    key = page_key("price", file_identity(price_image_path), encoding, layout)
+    plan.append(("price", key, [(prepare_price_image, (price_image_path, encoding, layout, cache))]))
+    return plan
+
+
+def _stream_pdf(
+    fh: BinaryIO,
+    title_text: str,
+    info_lines_text: str,
+    date_style: str,
+    use_today: bool,
+    order_paths: List[str],
+    price_image_path: str | None,
+    encoding: ImageEncoding,
+    workers: int | None,
+    cache: PageCache | None,
+    spill_dir: str | None = None,
+    layout: LayoutProfile = DEFAULT_LAYOUT,
+    font_name: str | None = None,
+):
+    """
+    Průběžný zápis: každá stránka = fragment, zapsaný a zahozený hned po vykreslení.
+    S cache se stránky se stejnými vstupy jen zkopírují z dřívějších exportů a obrázky
+    se připravují (v poolu) jen pro stránky, které v cache nejsou.
+    """
+    plan = page_plan(title_text, info_lines_text, date_style, use_today, order_paths, price_image_path,
+                     encoding, layout, cache)
+
+    def draw(c, kind, images):
+        if kind == "cover":
+            draw_cover_page(c, title_text, info_lines_text, date_style, use_today, layout, font_name)
+        else:
+            draw_body_page(c, kind, images, layout, font_name)
+
+    writer = StreamingPdfWriter(fh)
+    for data in iter_page_fragments(plan, draw, workers, cache, spill_dir):
+        writer.add_fragment(data)
+    writer.close()
+    if cache is not None:
+        cache.prune()
+
+
+def draw_body_page(c, kind: str, images: list, layout: LayoutProfile = DEFAULT_LAYOUT,
+                   font_name: str | None = None):
+    """Stránka z plánu kromě titulní (komponenty / ceník) z připravených obrázků."""
+    if kind == "components":
+        draw_component_page(c, images, layout)
+    else:
+        draw_price_page(c, images[0], layout, font_name)
+
+
+def iter_page_fragments(plan, draw, workers: int | None, cache: PageCache | None,
+                        spill_dir: str | None = None) -> Iterator[bytes]:
+    """
+    Fragmenty stránek plánu (viz page_plan) v pořadí: z cache, nebo vykreslené přes
+    draw(c, druh, obrázky). Obrázky se připravují v poolu jen pro stránky mimo cache.
+    """
+    missing = {i for i, (_, key, _) in enumerate(plan) if cache is None or key not in cache}
+    prepared = iter_prepared([job for i in sorted(missing) for job in plan[i][2]], workers, spill_dir)
+    for i, (kind, key, jobs) in enumerate(plan):
+        data = cache.get(key) if cache is not None and i not in missing else None
+        if data is None:
+            if i in missing:
+                images = list(islice(prepared, len(jobs)))
+            else:
+                # mezitím smazáno (prune jiného procesu) – připrav tady
+                images = [fn(*args) for fn, args in jobs]
+            data = page_fragment(lambda c: draw(c, kind, images))
+            images = None   # dlaždice pustit hned, ne až s další stránkou
+            if cache is not None:
+                cache.put(key, data)
+        yield data
+
+
+def quote_key(
+    order_paths: List[str],
+    margin_cm: float,      # ignorováno
+    gap_cm: float,         # ignorováno
+    title_text: str,
+    info_lines_text: str,
+    date_style: str,
+    use_today: bool,
+    price_image_path: str | None,
+    encoding: ImageEncoding = LOSSLESS,
+    linearize: bool = False,
+    layout: LayoutProfile = DEFAULT_LAYOUT,
+) -> str:
+    """Hash nabídky se stejnými parametry jako export_pdf (viz export_key) – mění se s každým vstupem."""
+    return export_key(order_paths, price_image_path, title_text, info_lines_text,
+                      _cover_date_text(date_style, use_today), encoding, linearize, True, layout)
+
+
+def export_pdf(
+    out_path: str | BinaryIO,
+    order_paths: List[str],
+    margin_cm: float,      # ignorováno (komponenty jedou edge-to-edge)
+    gap_cm: float,         # ignorováno
+    title_text: str,
+    info_lines_text: str,
+    date_style: str,
+    use_today: bool,
+    price_image_path: str | None,
+    encoding: ImageEncoding = LOSSLESS,
+    workers: int | None = None,
+    streaming: bool = False,
+    cache: PageCache | bool = False,
+    linearize: bool = False,
+    export_cache: ExportCache | bool = False,
+    memory_limit_mb: float | None = None,
+    context: ExportContext | None = None,
+    layout: LayoutProfile | None = None,
+):
+    """
+    Export PDF v rozvržení `layout` (pdf.layout; None = DEFAULT_LAYOUT z configu):
+      - Titulní strana: jen spodní linka je viditelná (horní je bílá), nadpis je centrovaný
+        mezi linkami; jemný posun přes cover_title_offset_mm.
+      - Stránky komponent: segments_per_page „dlaždic“ na výšku, edge-to-edge, cover ořez
+        (bez deformace). Segmenty .pdf/.svg se vkládají vektorově jako form XObject (pdf.vector).
+      - Poslední strana: screenshot ceníku s horním odsazením price_top_offset_cm a pevnou
+        šířkou price_image_width_cm (výška se dopočítá). Vysoký screenshot se při
+        price_split_tall rozřeže v prázdných řádcích na pásy, každý na vlastní stránku.
+    Obrázky se kódují podle `encoding`; výchozí LOSSLESS je vkládá v plném rozlišení
+    bezeztrátově a škálují se až při vykreslení do PDF.
+    Příprava obrázků běží paralelně ve `workers` procesech (None = EXPORT_WORKERS / počet CPU).
+
+    streaming=True: stránky se zapisují do out_path (cesta nebo libovolný binární stream,
+    i nepřevíjitelný) průběžně, jedna po druhé – paměť nezávisí na počtu stránek.
+
+    cache=True: stránky se berou z / ukládají do PageCache.default() a dokument
+    se skládá z fragmentů – znovu se renderují jen změněné stránky. Lze předat vlastní
+    PageCache; False (výchozí) = bez cache. Zapíná ji jen volající, který o ni stojí
+    (GUI export, cli.py --cache) – jinak se do ~/.cache nic nezapisuje.
+
+    linearize=True: výsledek se ještě přepíše jako linearizované PDF s objektovými streamy
+    (viz pdf.linearize) – titulní strana se v prohlížeči ukáže dřív, než se stáhne zbytek.
+
+    Výstup je deterministický (invariant reportlab, /ID z obsahu, bez časových razítek).
+    export_cache=True: hotové PDF se uloží do ExportCache.default() pod hashem
+    celé nabídky a stejný export příště jen zkopíruje. False (výchozí) = bez cache.
+
+    memory_limit_mb (výchozí LOW_MEMORY_MAX_MB): úsporný režim – průběžný zápis, počet
+    procesů přípravy podle stropu a čekající streamy odložené na disk (pdf.low_memory).
+
+    context: hotový ExportContext (pdf.context) místo workers/cache/export_cache/memory_limit_mb –
+    každý export má vlastní, takže export_pdf lze volat souběžně z víc vláken (i s různými
+    layouty; zadaný `layout` má přednost před layoutem kontextu).
+    """
+    if context is None:
+        ctx = ExportContext.create(workers, cache, export_cache, memory_limit_mb, layout)
+    else:
+        ctx = context.with_layout(layout) if layout is not None else context
+    layout = ctx.layout
+    if ctx.memory is not None:
+        streaming = True
+    if ctx.export_cache is not None:
+        key = export_key(order_paths, price_image_path, title_text, info_lines_text,
+                         _cover_date_text(date_style, use_today), encoding, linearize,
+                         fragments=bool(streaming or ctx.cache is not None or linearize), layout=layout)
+        if ctx.export_cache.copy_to(key, out_path):
+            return
+        with ctx.export_cache.recording(key, out_path) as out:
+            export_pdf(out, order_paths, margin_cm, gap_cm, title_text, info_lines_text, date_style,
+                       use_today, price_image_path, encoding=encoding, streaming=streaming,
+                       linearize=linearize, context=ctx.without_export_cache())
+        return
+
+    if linearize:
+        require_linearize()
+        # nejdřív běžný (průběžný) export do dočasného souboru, pak přepis
+        fd, tmp = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        try:
+            export_pdf(tmp, order_paths, margin_cm, gap_cm, title_text, info_lines_text, date_style,
+                       use_today, price_image_path, encoding=encoding, streaming=True,
+                       context=ctx.without_export_cache())
+            linearize_pdf(tmp, out_path)
+        finally:
+            os.unlink(tmp)
+        return
+
+    if streaming or ctx.cache is not None:
+        args = (title_text, info_lines_text, date_style, use_today, order_paths, price_image_path,
+                encoding, ctx.workers, ctx.cache)
+        spill = (ctx.memory.spill_directory() if ctx.memory is not None and ctx.workers > 1
+                 else contextlib.nullcontext())
+        with spill as spill_dir:
+            if hasattr(out_path, "write"):
+                _stream_pdf(out_path, *args, spill_dir, layout, ctx.font_name)
+            else:
+                with open(out_path, "wb") as fh:
+                    _stream_pdf(fh, *args, spill_dir, layout, ctx.font_name)
+        return
+
+    # ceník jde do poolu první – bývá největší, ať se nečeká na konci
+    jobs = [(prepare_price_image, (price_image_path, encoding, layout, ctx.cache))]
+    jobs += [(prepare_segment_tile, (path, encoding, layout)) for path in order_paths]
+    prepared = iter_prepared(jobs, ctx.workers)
+    price = next(prepared)
+    render_pdf(out_path, title_text, info_lines_text, date_style, use_today, prepared, price, layout,
+               ctx.font_name)
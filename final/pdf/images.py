@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+Příprava obrázků pro PDF:
+  - klasifikace obrázku (fotka vs. „plochý“ screenshot z Excelu),
+  - volba kódování (JPEG / bezeztrátový PNG-Flate / paleta / podvzorkování),
+  - hotový obrazový stream (PreparedImage), který canvas jen vloží – bez dalšího
+    překódování a bez ASCII85 nafukování, které reportlab dělá ve výchozím stavu.
+"""
+import hashlib
+import io
+import os
+import struct
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+from PIL import Image
+from reportlab.pdfbase import pdfdoc
+from reportlab.pdfbase.pdfdoc import PDFArray, PDFDictionary, PDFName, PDFStream
+
+# „Plochý“ obrázek: na zmenšenině má málo barev a FLAT_TOP_COLORS nejčastějších pokryje
+# téměř celou plochu (segmenty mají bílé pozadí, proto samotné pokrytí nestačí)
+FLAT_PROBE_WIDTH = 400
+FLAT_MAX_COLORS = 512
+FLAT_TOP_COLORS = 32
+FLAT_COVERAGE = 0.95
+# Plochý obrázek (text ceníku) nikdy nepodvzorkujeme pod tuto hranici – jinak je nečitelný
+FLAT_MIN_DPI = 200.0
+
+KIND_PHOTO = "photo"
+KIND_FLAT = "flat"
+
+# Má výřez souboru skutečnou průhlednost? (cesta, mtime, velikost, box ořezu) -> bool;
+# zjišťuje se jednou, pamatuje se posledních ALPHA_MEMORY_ITEMS výsledků
+ALPHA_MEMORY_ITEMS = 1024
+_alpha_cache: "OrderedDict[tuple, bool]" = OrderedDict()
+_alpha_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ImageEncoding:
+    """
+    Nastavení kódování obrázků při exportu.
+      - photo_quality: JPEG kvalita pro fotky; None = bezeztrátově (PNG/Flate)
+      - flat_colors:   počet barev palety pro ploché obrázky; None = plné RGB
+      - max_dpi:       strop rozlišení vzhledem k velikosti na stránce; None = originál
+    Výchozí hodnoty odpovídají původnímu chování (plné rozlišení, bezeztrátově).
+    """
+    photo_quality: int | None = None
+    flat_colors: int | None = None
+    max_dpi: float | None = None
+
+    def describe(self) -> str:
+        parts = [
+            f"fotky JPEG q={self.photo_quality}" if self.photo_quality else "fotky bezeztrátově",
+            f"ceník paleta {self.flat_colors} barev" if self.flat_colors else "ceník bezeztrátově RGB",
+            f"max. {self.max_dpi:.0f} dpi" if self.max_dpi else "plné rozlišení",
+        ]
+        return ", ".join(parts)
+
+
+LOSSLESS = ImageEncoding()
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    """
+    Hotový obrazový stream pro PDF (Image XObject). Vzniká mimo canvas
+    a canvas ho jen zaregistruje a vykreslí (draw_prepared_image).
+    """
+    width: int
+    height: int
+    color_space: str            # DeviceRGB | DeviceGray | Indexed
+    bits: int                   # BitsPerComponent
+    filter: str                 # DCTDecode | FlateDecode
+    data: bytes
+    palette: bytes | None = None          # RGB trojice pro Indexed
+    predictor_colors: int = 0             # >0 => PNG prediktory (/Predictor 15)
+    kind: str = KIND_PHOTO
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data)
+
+    @property
+    def digest(self) -> str:
+        return hashlib.md5(self.data).hexdigest()
+
+
+def classify_image(im: Image.Image) -> str:
+    """
+    Rozliší fotku od plochého screenshotu: na zmenšenině (NEAREST, aby se barvy
+    nemíchaly) spočítá počet barev a kolik pixelů pokryje FLAT_TOP_COLORS nejčastějších.
+    """
+    probe = im.convert("RGB") if im.mode != "RGB" else im
+    if probe.width > FLAT_PROBE_WIDTH:
+        h = max(1, round(probe.height * FLAT_PROBE_WIDTH / probe.width))
+        probe = probe.resize((FLAT_PROBE_WIDTH, h), Image.NEAREST)
+    total = probe.width * probe.height
+    colors = probe.getcolors(maxcolors=FLAT_MAX_COLORS)
+    if colors is None:
+        return KIND_PHOTO
+    counts = sorted((n for n, _ in colors), reverse=True)
+    covered = sum(counts[:FLAT_TOP_COLORS])
+    return KIND_FLAT if covered >= FLAT_COVERAGE * total else KIND_PHOTO
+
+
+def _downsample(im: Image.Image, box_w_pt: float, box_h_pt: float, dpi: float | None) -> Image.Image:
+    """Zmenší obrázek tak, aby na ploše box_w_pt × box_h_pt neměl víc než dpi."""
+    if not dpi:
+        return im
+    max_w = max(1, round(box_w_pt / 72.0 * dpi))
+    max_h = max(1, round(box_h_pt / 72.0 * dpi))
+    if im.width <= max_w and im.height <= max_h:
+        return im
+    scale = min(max_w / im.width, max_h / im.height)
+    size = (max(1, round(im.width * scale)), max(1, round(im.height * scale)))
+    if im.mode == "P":
+        im = im.convert("RGB")   # paletu by PIL zmenšil jen NEAREST
+    return im.resize(size, Image.LANCZOS)
+
+
+def fit_to_dpi(im: Image.Image, box_w_pt: float, box_h_pt: float,
+               max_dpi: float | None, kind: str) -> Image.Image:
+    """Podvzorkování podle druhu obrázku – plochý nikdy pod FLAT_MIN_DPI."""
+    if kind == KIND_FLAT and max_dpi:
+        max_dpi = max(max_dpi, FLAT_MIN_DPI)
+    return _downsample(im, box_w_pt, box_h_pt, max_dpi)
+
+
+def _to_palette(im: Image.Image, colors: int) -> Image.Image:
+    """
+    Převede na paletu. Má-li obrázek ≤ colors barev (typicky screenshot z Excelu),
+    je převod bezeztrátový; jinak jde o kvantizaci.
+    """
+    # median cut zachová barvy přesně, pokud se do palety vejdou
+    return im.quantize(colors=colors, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+
+
+def _png_stream(im: Image.Image, kind: str) -> PreparedImage:
+    """
+    Zakóduje obrázek jako PNG a převezme jeho IDAT data přímo do PDF
+    (Flate + PNG prediktory), včetně palety a snížené bitové hloubky.
+    """
+    buf = io.BytesIO()
+    im.save(buf, "PNG", compress_level=6)
+    data = buf.getvalue()
+    pos = 8
+    idat, palette = [], None
+    width = height = bits = color_type = 0
+    while pos < len(data):
+        length, ctype = struct.unpack(">I4s", data[pos:pos + 8])
+        chunk = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if ctype == b"IHDR":
+            width, height, bits, color_type = struct.unpack(">IIBB", chunk[:10])
+        elif ctype == b"PLTE":
+            palette = chunk
+        elif ctype == b"IDAT":
+            idat.append(chunk)
+        elif ctype == b"IEND":
+            break
+    color_space, colors = {0: ("DeviceGray", 1), 2: ("DeviceRGB", 3), 3: ("Indexed", 1)}[color_type]
+    return PreparedImage(
+        width=width, height=height, color_space=color_space, bits=bits,
+        filter="FlateDecode", data=b"".join(idat),
+        palette=palette if color_type == 3 else None,
+        predictor_colors=colors, kind=kind,
+    )
+
+
+def _jpeg_stream(im: Image.Image, quality: int, kind: str) -> PreparedImage:
+    buf = io.BytesIO()
+    im.save(buf, "JPEG", quality=quality, optimize=True)
+    return PreparedImage(
+        width=im.width, height=im.height,
+        color_space="DeviceGray" if im.mode == "L" else "DeviceRGB", bits=8,
+        filter="DCTDecode", data=buf.getvalue(), kind=kind,
+    )
+
+
+def encode_jpeg(im: Image.Image, quality: int, optimize: bool = True) -> PreparedImage:
+    """JPEG stream tak, jak obrázek je – bez klasifikace a škálování (náhledy, koncepty)."""
+    if im.mode not in ("RGB", "L"):
+        im = im.convert("RGB")
+    buf = io.BytesIO()
+    im.save(buf, "JPEG", quality=quality, optimize=optimize)
+    return PreparedImage(
+        width=im.width, height=im.height,
+        color_space="DeviceGray" if im.mode == "L" else "DeviceRGB", bits=8,
+        filter="DCTDecode", data=buf.getvalue(), kind=KIND_PHOTO,
+    )
+
+
+def _has_real_alpha(im: Image.Image) -> bool:
+    """Alfa kanál, který někde není plně krycí (RGBA segmenty z exportu bývají celé 255)."""
+    if im.mode in ("RGBA", "LA"):
+        return im.getchannel("A").getextrema()[0] < 255
+    if im.mode in ("PA", "RGBa", "La") or (im.mode == "P" and "transparency" in im.info):
+        return im.convert("RGBA").getchannel("A").getextrema()[0] < 255
+    return False
+
+
+def has_real_alpha(path: str, im: Image.Image, box: tuple | None = None) -> bool:
+    """
+    _has_real_alpha s cache podle identity souboru a boxu ořezu, ze kterého je `im`
+    (None = celý obrázek) – jiný výřez téhož souboru se zjišťuje zvlášť.
+    """
+    try:
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size, box)
+    except OSError:
+        return _has_real_alpha(im)
+    with _alpha_lock:
+        hit = _alpha_cache.get(key)
+        if hit is not None:
+            _alpha_cache.move_to_end(key)
+            return hit
+    value = _has_real_alpha(im)
+    with _alpha_lock:
+        _alpha_cache[key] = value
+        while len(_alpha_cache) > ALPHA_MEMORY_ITEMS:
+            _alpha_cache.popitem(last=False)
+    return value
+
+
+def open_rgb(path: str, crop: Callable[[int, int], tuple] | None = None) -> Image.Image:
+    """
+    Otevře obrázek jako RGB s co nejmenší pamětí: box ořezu crop(w, h) se spočítá
+    z hlavičky, ořízne se původní (RGBA) obrázek a převádí se už jen výřez – žádná
+    plná RGB kopie. Skutečná průhlednost se slije na bílou (stránka je bílá), takže
+    v PDF není potřeba maska; plně krycí alfa se jen zahodí.
+    """
+    im = Image.open(path)
+    box = None
+    if crop is not None:
+        box = tuple(crop(im.width, im.height))
+        if box != (0, 0, im.width, im.height):
+            im = im.crop(box)
+        else:
+            box = None
+    if im.mode == "RGB":
+        im.load()   # načte a zavře soubor; žádná další kopie
+        return im
+    if im.mode == "L":
+        return im.convert("RGB")
+    if not has_real_alpha(path, im, box):
+        return im.convert("RGB")
+    rgba = im.convert("RGBA")
+    out = Image.new("RGB", rgba.size, "white")
+    out.paste(rgba, mask=rgba.getchannel("A"))
+    return out
+
+
+def encode_image(im: Image.Image, box_w_pt: float, box_h_pt: float,
+                 encoding: ImageEncoding = LOSSLESS, kind: str | None = None) -> PreparedImage:
+    """
+    Zakóduje (už oříznutý) obrázek pro box box_w_pt × box_h_pt na stránce.
+    kind=None => klasifikace proběhne tady.
+    """
+    if im.mode not in ("RGB", "L", "P"):
+        im = im.convert("RGB")
+    if kind is None:
+        kind = classify_image(im)
+
+    im = fit_to_dpi(im, box_w_pt, box_h_pt, encoding.max_dpi, kind)
+    if kind == KIND_FLAT:
+        # bezeztrátová paleta z načtení ceníku (pdf.price_ingest) se nechá, pokud stačí
+        exact = im.mode == "P" and len(im.getpalette()) // 3 <= (encoding.flat_colors or 256)
+        if encoding.flat_colors and not exact:
+            im = _to_palette(im, encoding.flat_colors)
+        return _png_stream(im, kind)
+    if encoding.photo_quality:
+        return _jpeg_stream(im.convert("RGB") if im.mode == "P" else im, encoding.photo_quality, kind)
+    return _png_stream(im, kind)
+
+
+class _PreparedXObject(pdfdoc.PDFObject):
+    """Image XObject nad hotovým streamem – filtry jsou už aplikované."""
+
+    def __init__(self, img: PreparedImage):
+        self.img = img
+
+    def format(self, document):
+        img = self.img
+        S = PDFStream(content=img.data)
+        d = S.dictionary
+        d["Type"] = PDFName("XObject")
+        d["Subtype"] = PDFName("Image")
+        d["Width"] = img.width
+        d["Height"] = img.height
+        d["BitsPerComponent"] = img.bits
+        if img.palette:
+            d["ColorSpace"] = PDFArray([
+                PDFName("Indexed"), PDFName("DeviceRGB"),
+                len(img.palette) // 3 - 1, b"<" + img.palette.hex().encode("ascii") + b">",
+            ])
+        else:
+            d["ColorSpace"] = PDFName(img.color_space)
+        d["Filter"] = PDFArray([PDFName(img.filter)])
+        if img.predictor_colors:
+            # Filter je pole => DecodeParms musí být také pole (jinak ho čtečky ignorují)
+            d["DecodeParms"] = PDFArray([PDFDictionary({
+                "Predictor": 15, "Colors": img.predictor_colors,
+                "BitsPerComponent": img.bits, "Columns": img.width,
+            })])
+        return S.format(document)
+
+
+def draw_prepared_image(c, img: PreparedImage, x: float, y: float, width: float, height: float):
+    """
+    Obdoba canvas.drawImage pro PreparedImage: stejné obrázky se v dokumentu
+    uloží jen jednou (jméno = hash dat).
+    """
+    c._currentPageHasImages = 1
+    name = "PI" + img.digest
+    reg_name = c._doc.getXObjectName(name)
+    if reg_name not in c._doc.idToObject:
+        xobj = _PreparedXObject(img)
+        xobj.name = name
+        c._doc.Reference(xobj, reg_name)
+        c._doc.addForm(name, xobj)
+    c.saveState()
+    c.translate(x, y)
+    c.scale(width, height)
+    c._code.append("/%s Do" % reg_name)
+    c.restoreState()
+    c._formsinuse.append(name)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Layout dokumentu jako neměnný objekt místo globálních konstant configu.
+
+LayoutProfile se předává explicitně do náhledu i exportu (parametr `layout`), je
+hashovatelný a je součástí klíčů cache – dvě nabídky s různým layoutem tak mohou
+běžet souběžně v jedné dávce (i ve stejných procesech poolu) a layout jde změnit
+bez restartu. Výchozí hodnoty polí jsou konstanty z configu (DEFAULT_LAYOUT).
+
+Profil ze souboru (TOML/JSON), uvedená pole přepíší výchozí:
+    name = "široké dlaždice"
+    segments_per_page = 3
+    component_margin_mm = [6, 10, 6, 10]   # jedno číslo, nebo [vlevo, nahoře, vpravo, dole]
+    price_image_width_cm = 15.0
+    cover_title_color_hex = "#1F4E5A"
+Stránka zůstává A4 (A4_W_PT × A4_H_PT).
+"""
+import json
+from dataclasses import dataclass, field, fields, replace
+from pathlib import Path
+
+from config import (
+    SEGMENTS_PER_PAGE_FIXED, COMPONENT_MARGIN_MM, PRICE_TOP_OFFSET_CM, PRICE_IMAGE_WIDTH_CM,
+    PRICE_SPLIT_TALL, COVER_TITLE_OFFSET_MM, COVER_TITLE_COLOR_HEX, COVER_TOP_LINE_COLOR_HEX,
+    COVER_BOTTOM_LINE_COLOR_HEX, COVER_LINE_THICKNESS_PT, COVER_SIDE_MARGIN_CM,
+    COVER_BAND_TOP_CM, COVER_BAND_BOTTOM_CM, COVER_TITLE_SIZE_PT,
+    COVER_INFO_BLOCK_LEFT_CM, COVER_INFO_BLOCK_BOTTOM_CM, COVER_INFO_SIZE_PT,
+)
+
+LAYOUT_SUFFIXES = (".toml", ".json")
+
+
+def _margin(value) -> float | tuple:
+    """Okraj dlaždic: číslo, nebo 4 čísla (vlevo, nahoře, vpravo, dole) jako tuple – kvůli hash."""
+    if isinstance(value, (list, tuple)):
+        if len(value) != 4:
+            raise ValueError("component_margin_mm musí být číslo nebo 4 čísla")
+        return tuple(float(v) for v in value)
+    return float(value)
+
+
+@dataclass(frozen=True)
+class LayoutProfile:
+    segments_per_page: int = SEGMENTS_PER_PAGE_FIXED
+    component_margin_mm: float | tuple = _margin(COMPONENT_MARGIN_MM)
+    price_top_offset_cm: float = PRICE_TOP_OFFSET_CM
+    price_image_width_cm: float = PRICE_IMAGE_WIDTH_CM
+    price_split_tall: bool = PRICE_SPLIT_TALL
+    cover_title_offset_mm: float = COVER_TITLE_OFFSET_MM
+    cover_title_color_hex: str = COVER_TITLE_COLOR_HEX
+    cover_top_line_color_hex: str = COVER_TOP_LINE_COLOR_HEX
+    cover_bottom_line_color_hex: str = COVER_BOTTOM_LINE_COLOR_HEX
+    cover_line_thickness_pt: float = COVER_LINE_THICKNESS_PT
+    cover_side_margin_cm: float = COVER_SIDE_MARGIN_CM
+    cover_band_top_cm: float = COVER_BAND_TOP_CM
+    cover_band_bottom_cm: float = COVER_BAND_BOTTOM_CM
+    cover_title_size_pt: float = COVER_TITLE_SIZE_PT
+    cover_info_block_left_cm: float = COVER_INFO_BLOCK_LEFT_CM
+    cover_info_block_bottom_cm: float = COVER_INFO_BLOCK_BOTTOM_CM
+    cover_info_size_pt: float = COVER_INFO_SIZE_PT
+    # jméno jen pro lidi – do porovnání, hashe ani klíčů cache (repr) nevstupuje
+    name: str = field(default="výchozí", compare=False, repr=False)
+
+    def __post_init__(self):
+        if self.segments_per_page < 1:
+            raise ValueError("segments_per_page musí být aspoň 1")
+        if self.price_image_width_cm <= 0:
+            raise ValueError("price_image_width_cm musí být kladné")
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if f.name.endswith("_hex") and not (len(value) == 7 and value[0] == "#"):
+                raise ValueError(f"{f.name}: očekávám barvu #RRGGBB, ne {value!r}")
+
+    @classmethod
+    def from_dict(cls, data: dict, base: "LayoutProfile | None" = None, name: str | None = None) -> "LayoutProfile":
+        """Profil z dict (klíče = názvy polí); chybějící pole z `base` (výchozí DEFAULT_LAYOUT)."""
+        known = {f.name: f for f in fields(cls)}
+        unknown = sorted(set(data) - set(known))
+        if unknown:
+            raise ValueError(f"Neznámá pole layoutu: {', '.join(unknown)}")
+        values = {}
+        for key, value in data.items():
+            if key == "component_margin_mm":
+                value = _margin(value)
+            elif key == "name" or key.endswith("_hex"):
+                value = str(value)
+            elif key == "price_split_tall":
+                if not isinstance(value, bool):
+                    raise ValueError(f"{key}: očekávám true/false")
+            elif key == "segments_per_page":
+                if isinstance(value, bool) or not isinstance(value, int):
+                    raise ValueError(f"{key}: očekávám celé číslo")
+            elif isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{key}: očekávám číslo")
+            values[key] = value
+        if name is not None and "name" not in values:
+            values["name"] = name
+        return replace(base or DEFAULT_LAYOUT, **values)
+
+
+def load_toml(path: str | Path) -> dict:
+    """TOML ze souboru – tomllib (Python 3.11+), na 3.10 (PyInstaller bundle) balíček tomli."""
+    try:
+        import tomllib
+    except ModuleNotFoundError:
+        import tomli as tomllib
+    with open(path, "rb") as fh:
+        return tomllib.load(fh)
+
+
+def load_layout(path: str | Path) -> LayoutProfile:
+    """Profil ze souboru .toml/.json (jméno = „name“, jinak jméno souboru)."""
+    path = Path(path)
+    if path.suffix.lower() == ".toml":
+        data = load_toml(path)
+    elif path.suffix.lower() == ".json":
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    else:
+        raise ValueError(f"Neznámý formát layoutu: {path.name} (očekávám .toml/.json)")
+    if not isinstance(data, dict):
+        raise ValueError(f"{path.name}: layout musí být tabulka/objekt")
+    return LayoutProfile.from_dict(data, name=path.stem)
+
+
+DEFAULT_LAYOUT = LayoutProfile()
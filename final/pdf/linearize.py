@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Linearizované PDF („fast web view“): objekty první stránky + hint tabulky na začátku
+souboru, takže prohlížeč v prohlížeči / mobilní pošta ukáže titulní stranu dřív,
+než se stáhne zbytek s velkými obrázky. Zároveň se struktura zabalí do objektových
+streamů a komprimované xref tabulky.
+
+Linearizaci dělá qpdf – přes pikepdf (pip install pikepdf), nebo přes program
+`qpdf`, když je v PATH. Bez nich linearize_pdf vyhodí LinearizeUnavailable.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import BinaryIO
+
+
+class LinearizeUnavailable(RuntimeError):
+    pass
+
+
+# Stejné nastavení jako u pikepdf: streamy beze změny, deterministické /ID
+_QPDF_ARGS = ("--linearize", "--object-streams=generate", "--decode-level=none",
+              "--compress-streams=n", "--deterministic-id", "--warning-exit-0")
+
+_MISSING_MSG = "Linearizace PDF vyžaduje pikepdf (pip install pikepdf) nebo program qpdf."
+
+
+def linearize_available() -> bool:
+    try:
+        import pikepdf  # noqa: F401
+        return True
+    except ImportError:
+        return shutil.which("qpdf") is not None
+
+
+def require_linearize():
+    """Vyhodí LinearizeUnavailable dřív, než se začne renderovat."""
+    if not linearize_available():
+        raise LinearizeUnavailable(_MISSING_MSG)
+
+
+def _linearize_file(src_path: str, dst_path: str):
+    try:
+        import pikepdf
+    except ImportError:
+        pikepdf = None
+
+    if pikepdf is not None:
+        with pikepdf.open(src_path) as pdf:
+            pdf.save(
+                dst_path,
+                linearize=True,
+                object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                # streamy nechat, jak jsou – jinak qpdf přebalí PNG data bez prediktoru (větší)
+                compress_streams=False,
+                stream_decode_level=pikepdf.StreamDecodeLevel.none,
+                deterministic_id=True,
+            )
+        return
+
+    qpdf = shutil.which("qpdf")
+    if qpdf is None:
+        raise LinearizeUnavailable(_MISSING_MSG)
+    subprocess.run([qpdf, *_QPDF_ARGS, src_path, dst_path], check=True, capture_output=True)
+
+
+def linearize_pdf(src_path: str, out: str | BinaryIO):
+    """Přepíše hotové PDF ze src_path do `out` (cesta nebo binární stream) linearizované."""
+    if not hasattr(out, "write"):
+        _linearize_file(src_path, out)
+        return
+    # qpdf potřebuje převíjitelný výstup – přes dočasný soubor
+    fd, tmp = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    try:
+        _linearize_file(src_path, tmp)
+        with open(tmp, "rb") as fh:
+            shutil.copyfileobj(fh, out)
+    finally:
+        os.unlink(tmp)
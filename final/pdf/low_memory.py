@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Úsporný režim paměti pro velké nabídky a dávky na malém stroji.
+
+Strop (LOW_MEMORY_MAX_MB nebo export_pdf(memory_limit_mb=…)) se rozpočítá na procesy:
+  - počet procesů přípravy = kolik dekódovaných segmentů smí být v paměti najednou
+    (pod 2 procesy se připravuje v hlavním procesu bez poolu),
+  - export jde vždy průběžně (stránka po stránce), dlaždice se pouští hned po vykreslení,
+  - hotové obrazové streamy, které čekají ve frontě na vykreslení, zapíše už proces
+    přípravy do dočasné složky a hlavní proces si je načte až pro svou stránku,
+  - dávka (cli.py --max-memory) pustí jen tolik souběžných exportů, kolik se vejde,
+    a každému dá svůj díl stropu.
+Odhady paměti procesů jsou v configu (LOW_MEMORY_MAIN_MB, LOW_MEMORY_WORKER_MB).
+"""
+import os
+import tempfile
+from dataclasses import dataclass, replace
+from typing import Tuple
+
+from config import (
+    EXPORT_WORKERS, LOW_MEMORY_MAX_MB, LOW_MEMORY_MAIN_MB, LOW_MEMORY_WORKER_MB, LOW_MEMORY_SPILL_DIR,
+)
+from pdf.images import PreparedImage
+
+
+@dataclass(frozen=True)
+class MemoryBudget:
+    max_mb: float
+    spill_dir: str | None = None
+
+    @classmethod
+    def from_config(cls, max_mb: float | None = None) -> "MemoryBudget | None":
+        """Rozpočet ze zadaného stropu, jinak z LOW_MEMORY_MAX_MB; None = režim vypnutý."""
+        max_mb = LOW_MEMORY_MAX_MB if max_mb is None else max_mb
+        if not max_mb:
+            return None
+        return cls(float(max_mb), str(LOW_MEMORY_SPILL_DIR) if LOW_MEMORY_SPILL_DIR else None)
+
+    def workers(self, requested: int | None = None) -> int:
+        """Kolik procesů přípravy se vejde pod strop (1 = bez poolu, v hlavním procesu)."""
+        requested = requested or EXPORT_WORKERS or os.cpu_count() or 1
+        fit = int((self.max_mb - LOW_MEMORY_MAIN_MB) // LOW_MEMORY_WORKER_MB)
+        return max(1, min(requested, fit if fit >= 2 else 1))
+
+    def split(self, jobs: int | None = None) -> Tuple[int, "MemoryBudget"]:
+        """Dávka: kolik exportů (každý s workers=1) poběží souběžně a jaký strop dostane každý."""
+        jobs = jobs or os.cpu_count() or 1
+        n = max(1, min(jobs, int(self.max_mb // LOW_MEMORY_MAIN_MB)))
+        return n, replace(self, max_mb=self.max_mb / n)
+
+    def spill_directory(self) -> tempfile.TemporaryDirectory:
+        """Dočasná složka jednoho exportu – po skončení (i po chybě) se smaže celá."""
+        return tempfile.TemporaryDirectory(prefix="nabidka-", dir=self.spill_dir)
+
+
+@dataclass(frozen=True)
+class SpilledImage:
+    """PreparedImage, jehož data čekají v souboru (image má data=b"")."""
+    path: str
+    image: PreparedImage
+
+
+def spill(result, spill_dir: str):
+    """Obrazové streamy výsledku přípravy zapíše do spill_dir; ostatní (tabulka, vektor) nechá."""
+    if isinstance(result, list):
+        return [spill(r, spill_dir) for r in result]
+    if not isinstance(result, PreparedImage):
+        return result
+    fd, path = tempfile.mkstemp(suffix=".bin", dir=spill_dir)
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(result.data)
+    return SpilledImage(path, replace(result, data=b""))
+
+
+def restore(result):
+    """Opak spill: načte data zpět a soubor smaže."""
+    if isinstance(result, list):
+        return [restore(r) for r in result]
+    if not isinstance(result, SpilledImage):
+        return result
+    with open(result.path, "rb") as fh:
+        data = fh.read()
+    os.unlink(result.path)
+    return replace(result.image, data=data)
+
+
+def spilled_call(fn, args: tuple, spill_dir: str):
+    """Úloha pro proces přípravy: spustí fn a výsledek rovnou odloží na disk."""
+    return spill(fn(*args), spill_dir)
+
+
+def peak_rss_mb() -> float | None:
+    """Špička RSS tohoto procesu v MB (jen Unix; jinde None)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if os.uname().sysname == "Darwin" else rss / 1024
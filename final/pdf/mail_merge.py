@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Hromadná korespondence: jeden výběr segmentů, N příjemců (CSV), jedno PDF na řádek.
+
+Stránky komponent a ceník se připraví, zakódují a rozparsují jen jednou (s cache=True i z PageCache);
+pro každého příjemce se nově vykreslí jen titulní strana – paralelně v procesním poolu
+(iter_prepared) – a společné fragmenty se k ní jen přečíslují a zapíšou.
+
+CSV (oddělovač ; , nebo tab, UTF-8 nebo cp1250), první řádek = hlavička:
+    title;info;date_style;output
+    Cenová nabídka;Jiří Doležal|Nad Hrádkem 284|25226 Kosoř;CZ;dolezal.pdf
+  - info: řádky adresy; v buňce na víc řádků, nebo oddělené „|“,
+  - title, date_style (EN/CZ), use_today (1/0), output jsou volitelné – chybějící
+    se berou z parametrů (typicky z GUI), output jinak „001-jmeno.pdf“.
+Česká hlavička funguje také: nadpis, adresa, datum, soubor, dnesni_datum.
+"""
+import csv
+import io
+import re
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+from pdf.export import (
+    draw_body_page, draw_cover_page, iter_page_fragments, iter_prepared, page_fragment, page_plan,
+)
+from pdf.images import ImageEncoding, LOSSLESS
+from pdf.layout import DEFAULT_LAYOUT, LayoutProfile
+from pdf.page_cache import PageCache
+from pdf.stream_writer import PdfFragment, StreamingPdfWriter
+
+_COLUMNS = {
+    "title": "title", "nadpis": "title",
+    "info": "info", "adresa": "info",
+    "date_style": "date_style", "datum": "date_style",
+    "use_today": "use_today", "dnesni_datum": "use_today",
+    "output": "output", "soubor": "output",
+}
+_FALSE = {"0", "false", "ne", "no", ""}
+
+
+@dataclass(frozen=True)
+class Recipient:
+    title_text: str
+    info_lines_text: str
+    date_style: str
+    use_today: bool
+    output: str
+
+
+class _SemicolonDialect(csv.excel):
+    delimiter = ";"   # výchozí oddělovač českého Excelu
+
+
+def _slug(text: str) -> str:
+    ascii_text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^A-Za-z0-9]+", "-", ascii_text).strip("-").lower()[:40]
+
+
+def read_recipients(csv_path: str, title_text: str = "", date_style: str = "EN",
+                    use_today: bool = True) -> List[Recipient]:
+    """Příjemci z CSV; chybějící sloupce/buňky doplní z parametrů. Názvy souborů jsou jedinečné."""
+    raw = Path(csv_path).read_bytes()
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = raw.decode("cp1250", errors="replace")
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=";,\t")
+    except csv.Error:
+        dialect = _SemicolonDialect
+    rows = list(csv.reader(io.StringIO(text), dialect))
+    if not rows:
+        return []
+    header = [_COLUMNS.get(h.strip().lower()) for h in rows[0]]
+    if "info" not in header and "title" not in header:
+        raise ValueError(f"{Path(csv_path).name}: hlavička musí obsahovat sloupec info/adresa nebo title/nadpis")
+
+    recipients, used = [], set()
+    for n, row in enumerate(rows[1:], start=1):
+        data = {k: v.strip() for k, v in zip(header, row) if k}
+        if not any(data.values()):
+            continue
+        info = "\n".join(line.strip() for line in re.split(r"\r?\n|\|", data.get("info", "")) if line.strip())
+        ds = (data.get("date_style") or date_style).upper()
+        if ds not in ("EN", "CZ"):
+            raise ValueError(f"{Path(csv_path).name}, řádek {n + 1}: datum musí být EN nebo CZ, ne {ds!r}")
+        today = use_today if not data.get("use_today") else data["use_today"].lower() not in _FALSE
+        output = data.get("output") or f"{n:03d}-{_slug(info.split(chr(10))[0] if info else data.get('title', '')) or 'nabidka'}"
+        if not output.lower().endswith(".pdf"):
+            output += ".pdf"
+        base, i = output, 2
+        while output.lower() in used:
+            output = f"{base[:-4]}-{i}.pdf"
+            i += 1
+        used.add(output.lower())
+        recipients.append(Recipient(data.get("title") or title_text, info, ds, today, output))
+    return recipients
+
+
+def cover_fragment(title_text: str, info_lines_text: str, date_style: str, use_today: bool,
+                   layout: LayoutProfile = DEFAULT_LAYOUT) -> bytes:
+    """Titulní strana jako samostatný fragment (úloha pro procesní pool)."""
+    return page_fragment(lambda c: draw_cover_page(c, title_text, info_lines_text, date_style, use_today, layout))
+
+
+def export_mail_merge(
+    recipients: List[Recipient],
+    out_dir: str | Path,
+    order_paths: List[str],
+    price_image_path: str | None,
+    encoding: ImageEncoding = LOSSLESS,
+    workers: int | None = None,
+    cache: PageCache | bool = False,
+    layout: LayoutProfile = DEFAULT_LAYOUT,
+) -> List[str]:
+    """
+    Zapíše PDF pro každého příjemce do out_dir; vrací cesty v pořadí příjemců.
+    V paměti jsou rozparsované společné stránky (jednou) a rozpracované titulní strany.
+    """
+    if cache is True:
+        cache = PageCache.default()
+    cache = cache or None
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    body_plan = page_plan("", "", "EN", False, order_paths, price_image_path, encoding, layout, cache)[1:]
+
+    def draw(c, kind, images):
+        draw_body_page(c, kind, images, layout)
+
+    body = [PdfFragment.parse(data) for data in iter_page_fragments(body_plan, draw, workers, cache)]
+    covers = iter_prepared(
+        [(cover_fragment, (r.title_text, r.info_lines_text, r.date_style, r.use_today, layout)) for r in recipients],
+        workers,
+    )
+    written = []
+    for r, cover in zip(recipients, covers):
+        path = out_dir / r.output
+        with open(path, "wb") as fh:
+            writer = StreamingPdfWriter(fh)
+            writer.add_fragment(cover)
+            for frag in body:
+                writer.add_fragment(frag)
+            writer.close()
+        written.append(str(path))
+    if cache is not None:
+        cache.prune()
+    return written
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Export PDF + obrázků stránek (PNG/JPEG/WebP v několika šířkách) v jednom běhu –
+pro WhatsApp, e-shop apod.
+
+Každý segment se dekóduje a ořízne jen jednou: z dlaždice se zakóduje stream pro PDF
+a zároveň zmenšeniny pro všechny šířky obrázků. Stránky kreslí pdf.page_raster
+(stejné rozvržení jako náhled) a kódují se ve vláknech, zatímco se skládá PDF.
+Ceník se bere z pdf.price_ingest (zpracovaný jednou, vysoký po pásech).
+"""
+import math
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, List, Sequence, Tuple
+
+from PIL import Image
+
+from config import (
+    RASTER_WIDTHS_PX, RASTER_FORMATS, RASTER_JPEG_QUALITY, RASTER_WEBP_QUALITY, RASTER_ENCODE_THREADS,
+)
+from pdf.export import (
+    component_cell_pt, is_tall_price, iter_prepared, iter_price_band_images, load_segment_tile,
+    prepare_price_image, price_box_pt, render_pdf,
+)
+from pdf.images import ImageEncoding, LOSSLESS, PreparedImage, encode_image
+from pdf.layout import DEFAULT_LAYOUT, LayoutProfile
+from pdf.page_raster import PageRasterizer
+from pdf.vector import VectorTile, is_vector_segment, prepare_vector_tile, vector_tile_image
+
+RASTER_EXTENSIONS = {"png": "png", "jpeg": "jpg", "webp": "webp"}
+
+
+def page_images_dir(pdf_path: str | Path) -> Path:
+    """Výchozí složka obrázků stránek: vedle PDF, „<jméno>-stranky“."""
+    pdf_path = Path(pdf_path)
+    return pdf_path.with_name(pdf_path.stem + "-stranky")
+
+
+def prepare_segment_multi(path: str, encoding: ImageEncoding, tile_sizes: Sequence[Tuple[int, int]],
+                          layout: LayoutProfile = DEFAULT_LAYOUT) -> Tuple[PreparedImage | VectorTile, List[Image.Image]]:
+    """
+    Jedno dekódování segmentu => stream pro PDF + dlaždice v přesné velikosti boxu
+    pro každou šířku obrázků (menší se zmenšují z větší, ne znovu z plného rozlišení).
+    Vektorový segment jde do PDF jako vektor a dlaždice se rastrují přímo v cílové velikosti.
+    """
+    if is_vector_segment(path):
+        return prepare_vector_tile(path), [vector_tile_image(path, *size) for size in tile_sizes]
+    _, _, inner_w, cell_h_pt = component_cell_pt(layout)
+    tile = load_segment_tile(path, layout)
+    scaled = {}
+    src = tile
+    for size in sorted(set(tile_sizes), reverse=True):
+        src = scaled[size] = src.resize(size, Image.LANCZOS, reducing_gap=3.0)
+    return encode_image(tile, inner_w, cell_h_pt, encoding), [scaled[size] for size in tile_sizes]
+
+
+def _save_page(im: Image.Image, path: Path, fmt: str):
+    if fmt == "jpeg":
+        im.save(path, "JPEG", quality=RASTER_JPEG_QUALITY, optimize=True, progressive=True)
+    elif fmt == "webp":
+        im.save(path, "WEBP", quality=RASTER_WEBP_QUALITY, method=2)   # method 4+ = 2× pomalejší, o ~3 % menší
+    else:
+        im.save(path, "PNG", compress_level=3)
+
+
+def export_pdf_with_images(
+    out_path: str | BinaryIO,
+    image_dir: str | Path,
+    order_paths: List[str],
+    margin_cm: float,      # ignorováno
+    gap_cm: float,         # ignorováno
+    title_text: str,
+    info_lines_text: str,
+    date_style: str,
+    use_today: bool,
+    price_image_path: str | None,
+    widths: Sequence[int] | None = None,
+    formats: Sequence[str] | None = None,
+    encoding: ImageEncoding = LOSSLESS,
+    workers: int | None = None,
+    layout: LayoutProfile = DEFAULT_LAYOUT,
+) -> List[str]:
+    """
+    Stejné parametry jako export_pdf + složka a varianty obrázků stránek
+    (výchozí RASTER_WIDTHS_PX × RASTER_FORMATS). Obrázky se jmenují
+    „<jméno>-<stránka>-<šířka>px.<přípona>“. Vrací seznam zapsaných obrázků.
+    PDF se skládá na jednom plátně (bez cache stránek).
+    """
+    widths = tuple(widths or RASTER_WIDTHS_PX)
+    formats = tuple(f.lower() for f in (formats or RASTER_FORMATS))
+    unknown = [f for f in formats if f not in RASTER_EXTENSIONS]
+    if unknown:
+        raise ValueError(f"Neznámý formát obrázků stránek: {', '.join(unknown)} (png | jpeg | webp)")
+    image_dir = Path(image_dir)
+    image_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(out_path).stem if isinstance(out_path, (str, Path)) else "nabidka"
+
+    rasters = [PageRasterizer(w, title_text, info_lines_text, date_style, use_today, price_image_path, layout)
+               for w in widths]
+    spp = layout.segments_per_page
+    # velikost dlaždice podle pozice na stránce (hrany pásů se zaokrouhlují) a šířky
+    slot_sizes = [[box[2:] for box in r.component_boxes()] for r in rasters]
+    threads = RASTER_ENCODE_THREADS or os.cpu_count() or 1
+    written: List[str] = []
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = deque()
+
+        def emit(n: int, pages: List[Image.Image]):
+            """Stránka n ve všech šířkách => kódování do všech formátů na pozadí."""
+            for w, page in zip(widths, pages):
+                for fmt in formats:
+                    path = image_dir / f"{stem}-{n:02d}-{w}px.{RASTER_EXTENSIONS[fmt]}"
+                    pending.append(pool.submit(_save_page, page, path, fmt))
+                    written.append(str(path))
+            # rozpracované stránky drží paměť – nenechat frontu růst
+            while len(pending) > 2 * threads:
+                pending.popleft().result()
+
+        def pdf_tiles():
+            page, n = [], 2
+            for prepared, scaled in iter_prepared(jobs, workers):
+                page.append(scaled)
+                yield prepared
+                if len(page) == spp:
+                    emit(n, [r.component_page([s[i] for s in page]) for i, r in enumerate(rasters)])
+                    page, n = [], n + 1
+            if page:
+                emit(n, [r.component_page([s[i] for s in page]) for i, r in enumerate(rasters)])
+
+        emit(1, [r.cover_page() for r in rasters])
+
+        # ceník předem (v PDF je poslední); pás vysokého ceníku se načte jednou pro PDF i obrázky
+        first_price_page = 2 + math.ceil(len(order_paths) / spp)
+        if is_tall_price(price_image_path, layout):
+            price = []
+            for i, band in enumerate(iter_price_band_images(price_image_path, layout)):
+                _, _, width_pt, height_pt = price_box_pt(*band.size, layout)
+                price.append(encode_image(band, width_pt, height_pt, encoding))
+                emit(first_price_page + i, [r.price_band_page(band) for r in rasters])
+        else:
+            price = prepare_price_image(price_image_path, encoding, layout)
+            for i, pages in enumerate(zip(*(r.price_pages() for r in rasters))):
+                emit(first_price_page + i, list(pages))
+
+        jobs = [(prepare_segment_multi, (p, encoding, [sizes[i % spp] for sizes in slot_sizes], layout))
+                for i, p in enumerate(order_paths)]
+        render_pdf(out_path, title_text, info_lines_text, date_style, use_today, pdf_tiles(), price, layout)
+        while pending:
+            pending.popleft().result()
+
+    return sorted(written)
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Cache vyrenderovaných stránek: každá stránka nabídky je samostatný PDF fragment
+uložený pod hashem svých vstupů (obsah stránky, identita zdrojových souborů,
+layout – pdf.layout.LayoutProfile, kódování obrázků). Varianta dřívější nabídky tak renderuje jen
+stránky, které se změnily – zbytek se jen zkopíruje (viz StreamingPdfWriter).
+
+ExportCache drží celé hotové PDF podle hashu celé nabídky – export je deterministický,
+takže opakovaný stejný export je jen kopie souboru.
+
+Zápis je atomický (tmp + os.replace), takže cache může sdílet víc procesů
+(dávkové CLI, HTTP služba).
+"""
+import contextlib
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+from typing import BinaryIO
+
+import config
+from fonts import ensure_fonts
+from pdf.layout import DEFAULT_LAYOUT
+
+# Zvýšit při změně kreslicího kódu stránek – zneplatní celou cache
+PAGE_CACHE_VERSION = 4   # 4: hotová PDF v ExportCache s opraveným /Parent stránek
+
+# Hodnoty configu, které ovlivňují vzhled stránek (rozvržení stránek je v LayoutProfile,
+# ten předává volající jako součást `parts`)
+_LAYOUT_KEYS = ("A4_W_PT", "A4_H_PT")
+
+def file_identity(path: str | None):
+    """(absolutní cesta, mtime, velikost) – změna souboru = jiný klíč. None/chybějící => None."""
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+def page_key(kind: str, *parts) -> str:
+    """Hash vstupů jedné stránky (+ stránka z configu, vybraný font a verze cache)."""
+    layout = tuple(getattr(config, k, None) for k in _LAYOUT_KEYS) + (ensure_fonts(),)
+    raw = repr((PAGE_CACHE_VERSION, kind, layout, parts)).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+class PageCache:
+    """Adresář PDF fragmentů podle klíče; při překročení max_bytes maže nejdéle nepoužité."""
+
+    SUFFIX = ".pdfpage"
+    DIR_SETTING = "PAGE_CACHE_DIR"
+    MAX_MB_SETTING = "PAGE_CACHE_MAX_MB"
+
+    def __init__(self, directory: str | Path, max_bytes: int | None = None):
+        self.dir = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0       # stránky převzaté z cache
+        self.misses = 0     # stránky vyrenderované znovu (a uložené)
+
+    @classmethod
+    def default(cls):
+        """Cache podle configu (DIR_SETTING); None, když je vypnutá nebo nejde vytvořit."""
+        directory = getattr(config, cls.DIR_SETTING, None)
+        if not directory:
+            return None
+        try:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+        except OSError:
+            return None
+        return cls(directory, int(getattr(config, cls.MAX_MB_SETTING) * 1024 * 1024))
+
+    def _path(self, key: str) -> Path:
+        return self.dir / key[:2] / (key + self.SUFFIX)
+
+    def get(self, key: str) -> bytes | None:
+        p = self._path(key)
+        try:
+            data = p.read_bytes()
+        except OSError:
+            return None
+        try:
+            os.utime(p)   # „naposledy použito“ pro prune()
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def put(self, key: str, data: bytes):
+        self.misses += 1
+        p = self._path(key)
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=p.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, p)
+        except OSError:
+            pass   # cache je jen zrychlení – chyba zápisu nesmí shodit export
+
+    def prune(self):
+        """Smaže nejdéle nepoužité fragmenty nad max_bytes."""
+        if not self.max_bytes:
+            return
+        entries = []
+        for p in self.dir.glob("*/*" + self.SUFFIX):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+                total -= size
+            except OSError:
+                pass
+
+
+def export_key(order_paths, price_image_path, title_text, info_lines_text, date_text,
+               encoding, linearize: bool, fragments: bool, layout=DEFAULT_LAYOUT) -> str:
+    """
+    Kanonický hash celé nabídky: texty, tištěné datum, identity všech zdrojových souborů
+    (pořadí segmentů je součástí), kódování, layout a způsob sestavení PDF.
+    """
+    return page_key(
+        "export",
+        title_text, info_lines_text, date_text,
+        tuple(file_identity(p) or p for p in order_paths),
+        file_identity(price_image_path),
+        encoding, bool(linearize), bool(fragments), layout,
+    )
+
+
+@contextlib.contextmanager
+def _replace_on_success(path: str | Path):
+    """
+    Soubor pro zápis do `path` – celý, nebo vůbec: píše se do dočasného souboru vedle
+    a os.replace až po úspěchu, při chybě se dočasný smaže (rozepsané PDF nezůstane).
+    Dočasný soubor vzniká přes open(…, "xb"), takže výsledek má práva podle umask.
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp, "xb") as fh:
+            yield fh
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+class _Tee:
+    """Zápis do dvou streamů zároveň (výstup exportu + soubor pro cache)."""
+
+    def __init__(self, a: BinaryIO, b: BinaryIO):
+        self.a, self.b = a, b
+
+    def write(self, data):
+        self.a.write(data)
+        self.b.write(data)
+        return len(data)
+
+    def flush(self):
+        self.a.flush()
+        self.b.flush()
+
+
+class ExportCache(PageCache):
+    """Hotová PDF podle export_key – stejný požadavek = kopie souboru."""
+
+    SUFFIX = ".pdf"
+    DIR_SETTING = "EXPORT_CACHE_DIR"
+    MAX_MB_SETTING = "EXPORT_CACHE_MAX_MB"
+
+    def copy_to(self, key: str, out: str | BinaryIO) -> bool:
+        """
+        Zkopíruje uložené PDF do out (cesta nebo stream); False jen tehdy, když v cache není.
+        Chyba zápisu do out se propaguje – volající pak nesmí do téhož streamu psát znovu.
+        """
+        p = self._path(key)
+        try:
+            src = open(p, "rb")
+        except FileNotFoundError:
+            return False
+        with src:
+            if hasattr(out, "write"):
+                shutil.copyfileobj(src, out)
+            else:
+                with _replace_on_success(out) as out_fh:
+                    shutil.copyfileobj(src, out_fh)
+        with contextlib.suppress(OSError):
+            os.utime(p)   # „naposledy použito“ pro prune() – i v cache jen pro čtení
+        self.hits += 1
+        return True
+
+    @contextlib.contextmanager
+    def recording(self, key: str, out: str | BinaryIO):
+        """
+        Vrátí stream, který zapisuje do out a zároveň do dočasného souboru v cache;
+        po úspěšném dokončení se soubor atomicky uloží pod key, při chybě zahodí.
+        Je-li out cesta, vznikne také až po úspěchu (při chybě nezůstane rozepsaný).
+        """
+        p = self._path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=p.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_fh:
+                if hasattr(out, "write"):
+                    yield _Tee(out, tmp_fh)
+                else:
+                    with _replace_on_success(out) as out_fh:
+                        yield _Tee(out_fh, tmp_fh)
+            os.replace(tmp, p)
+            self.misses += 1
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+        self.prune()
@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+"""
+Stránky nabídky jako PIL obrázky – bez Qt. Stejné rozvržení jako PDF (pdf.export),
+přepočtené z bodů na pixely pro zadanou šířku stránky. Používá je náhled v GUI
+(workers.preview_worker) i export obrázků stránek (pdf.multi_export).
+"""
+import math
+import os
+from typing import Iterator, List
+
+from PIL import Image, ImageDraw
+from reportlab.lib.units import cm
+
+from config import A4_W_PT, A4_H_PT, czech_date, english_date_upper
+from fonts import ensure_fonts, face_metrics, pil_font
+from pdf.export import cover_crop_box, cover_title_block, is_tall_price, iter_price_band_images, price_table_layout
+from pdf.images import open_rgb
+from pdf.layout import DEFAULT_LAYOUT, LayoutProfile
+from pdf.vector import is_vector_segment, vector_tile_image
+from pdf.price_ingest import ingest_price_image, price_preview_variant
+from price_table import (
+    TABLE_BOLD_FILL_HEX, TABLE_GRID_COLOR_HEX, TABLE_GRID_WIDTH_PT,
+    fit_cell_text, is_price_table, load_price_table,
+)
+
+
+class PageRasterizer:
+    """
+    Kreslí stránky nabídky do PIL obrázků širokých width_px (výška podle A4) v rozvržení
+    `layout` (pdf.layout). Komponentové stránky: dlaždice na výšku, edge-to-edge, cover.
+    """
+    def __init__(self, width_px: int, title: str, info_text: str, date_style: str,
+                 use_today: bool, price_path: str | None, layout: LayoutProfile = DEFAULT_LAYOUT):
+        self.width_px = width_px
+        self.layout = layout
+        self.title = title
+        self.info_text = info_text
+        self.date_style = date_style
+        self.use_today = use_today
+        self.price_path = price_path
+
+    def pages(self, order_paths: List[str]) -> Iterator[Image.Image]:
+        """Všechny stránky po jedné: titulní, komponentové, ceník."""
+        yield self.cover_page()
+        spp = self.layout.segments_per_page
+        for p in range(math.ceil(len(order_paths) / spp)):
+            yield self.component_page(order_paths[p*spp:(p+1)*spp])
+        yield from self.price_pages()
+
+    def price_pages(self) -> List[Image.Image]:
+        """Ceník: tabulka (víc stránek), vysoký screenshot po pásech, nebo jedna stránka."""
+        if is_price_table(self.price_path):
+            return self._price_table_pages()
+        if is_tall_price(self.price_path, self.layout):
+            return self._price_band_pages()
+        return [self._price_image_page()]
+
+    def blank_a4(self):
+        ratio = A4_H_PT / A4_W_PT
+        w = self.width_px
+        h = int(w * ratio)
+        return Image.new("RGB", (w, h), "white")
+
+    def cover_page(self):
+        """
+        Titulní strana – náhled v PIL sjednocený s PDF:
+        - linky pásu (horní/dolní) v barvách z layoutu
+        - nadpis z cover_title_block (velikost, řádky i pozice jako v PDF), převedený na px
+        - infoblok u spodního okraje, také po baseline
+        - datum volitelně nad infoblokem
+        """
+        layout = self.layout
+        img = self.blank_a4()
+        draw = ImageDraw.Draw(img)
+        W, H = img.size
+
+        # --- barvy a převody jednotek ---
+        def hex_to_rgb(h): return tuple(int(h[i:i+2], 16) for i in (1, 3, 5))
+        col_title   = hex_to_rgb(layout.cover_title_color_hex)
+        col_line_top = hex_to_rgb(layout.cover_top_line_color_hex)
+        col_line_bot = hex_to_rgb(layout.cover_bottom_line_color_hex)
+
+        px_per_pt_x = W / A4_W_PT
+        px_per_pt_y = H / A4_H_PT
+        pt_per_cm   = 72.0 / 2.54
+        px_per_cm_x = px_per_pt_x * pt_per_cm
+        px_per_cm_y = px_per_pt_y * pt_per_cm
+
+        # --- pás a linky ---
+        left  = int(round(layout.cover_side_margin_cm * px_per_cm_x))
+        right = W - left
+        y_top = int(round(layout.cover_band_top_cm * px_per_cm_y))   # vzdálenost od horního okraje
+        y_bot = int(round(layout.cover_band_bottom_cm * px_per_cm_y))
+        if y_bot < y_top:
+            y_top, y_bot = y_bot, y_top
+
+        line_px = max(1, int(round(layout.cover_line_thickness_pt * px_per_pt_y)))
+        draw.line([(left, y_top), (right, y_top)], fill=col_line_top, width=line_px)
+        draw.line([(left, y_bot), (right, y_bot)], fill=col_line_bot, width=line_px)
+
+        # --- NADPIS: stejné rozvržení jako PDF (pdf.text_fit), jen body -> px ---
+        fit, positions = cover_title_block(self.title, layout)
+        f = pil_font(fit.size * px_per_pt_y)
+        for L, (x_pt, baseline_pt) in zip(fit.lines, positions):
+            # PDF má Y odspodu; kreslíme od baseline (anchor "ls" = left-baseline)
+            draw.text((x_pt * px_per_pt_x, (A4_H_PT - baseline_pt) * px_per_pt_y), L,
+                      fill=col_title, font=f, anchor="ls")
+
+        # --- INFO BLOK (u spodního okraje, po baseline), datum nad ním ---
+        # velikost pt -> px a ascent/descent z reportlabu (fonts.face_metrics) – stejná čísla jako PDF
+        info_px = layout.cover_info_size_pt * px_per_pt_y
+        f_info = pil_font(info_px)
+        asc_units, desc_units = face_metrics()
+        asc_i = math.ceil(asc_units * info_px / 1000.0)
+        desc_i = math.ceil(desc_units * info_px / 1000.0)
+        line_h_info = math.ceil((asc_i + desc_i) * 1.15)
+
+        info_left   = int(round(layout.cover_info_block_left_cm * px_per_cm_x))
+        info_bottom = int(round(layout.cover_info_block_bottom_cm * px_per_cm_y))
+
+        info_lines = [ln for ln in (self.info_text or "").splitlines() if ln.strip()]
+        total_info_h = len(info_lines) * line_h_info
+        # umístit tak, aby spodní hrana bloku byla ve vzdálenosti info_bottom od spodku stránky
+        y_start = H - info_bottom - total_info_h
+        baseline = y_start + asc_i
+
+        for ln in info_lines:
+            draw.text((info_left, baseline - asc_i), ln, fill=col_title, font=f_info)
+            baseline += line_h_info
+
+        if self.use_today:
+            date_str = english_date_upper() if self.date_style == "EN" else czech_date()
+            gap_date = max(4, line_h_info // 3)
+            date_baseline = y_start - gap_date
+            if date_baseline > 0:
+                draw.text((info_left, date_baseline - asc_i), date_str, fill=col_title, font=f_info)
+
+        return img
+
+    def component_boxes(self) -> List[tuple]:
+        """
+        (x, y, w, h) v px pro dlaždice komponentové stránky: pásy uvnitř marginů v mm,
+        přesný fill bez mezer.
+        """
+        W = self.width_px
+        H = int(W * A4_H_PT / A4_W_PT)
+
+        # převody
+        px_per_pt_x = W / A4_W_PT
+        px_per_pt_y = H / A4_H_PT
+        pt_per_mm   = 72.0 / 25.4
+        px_per_mm_x = px_per_pt_x * pt_per_mm
+        px_per_mm_y = px_per_pt_y * pt_per_mm
+
+        # rozbal margin v pixelech
+        def unpack_margin_mm_px(m):
+            if isinstance(m, (list, tuple)) and len(m) == 4:
+                ml, mt, mr, mb = m
+            else:
+                ml = mt = mr = mb = float(m)
+            return (
+                int(round(ml * px_per_mm_x)),
+                int(round(mt * px_per_mm_y)),
+                int(round(mr * px_per_mm_x)),
+                int(round(mb * px_per_mm_y)),
+            )
+
+        ml_px, mt_px, mr_px, mb_px = unpack_margin_mm_px(self.layout.component_margin_mm)
+
+        inner_w = max(1, W - ml_px - mr_px)
+        inner_h = max(1, H - mt_px - mb_px)
+
+        # hrany pásů přesně přes vnitřní výšku (rounded), aby nevznikla mezera
+        spp = self.layout.segments_per_page
+        edges = [mt_px + round(i * inner_h / spp) for i in range(spp + 1)]
+        return [(ml_px, edges[i], inner_w, max(1, edges[i+1] - edges[i])) for i in range(spp)]
+
+    def component_page(self, tiles: List["str | Image.Image"]):
+        """
+        Komponentová stránka, cover (ořez) na poměr boxu dlaždice. Dlaždice = cesta
+        (dekóduje se s ořezem před převodem do RGB), nebo už načtený obrázek.
+        """
+        img = self.blank_a4()
+
+        for (x, y0, inner_w, tile_h), src in zip(self.component_boxes(), tiles):
+            target_ratio = inner_w / tile_h
+            if isinstance(src, Image.Image):
+                tile = src
+                box = cover_crop_box(tile.width, tile.height, target_ratio)
+                if box != (0, 0, tile.width, tile.height):
+                    tile = tile.crop(box)
+            else:
+                try:
+                    if is_vector_segment(src):
+                        # vektor se rastruje rovnou v rozlišení boxu (a drží v cache)
+                        tile = vector_tile_image(src, inner_w, tile_h)
+                    else:
+                        # cover crop na poměr inner_w : tile_h – ořez před převodem do RGB
+                        tile = open_rgb(src, lambda iw, ih: cover_crop_box(iw, ih, target_ratio))
+                except Exception:
+                    tile = Image.new("RGB", (2839, 1004), "lightgray")
+
+            # resize přesně do vnitřního boxu
+            if tile.size != (inner_w, tile_h):
+                tile = tile.resize((inner_w, tile_h), Image.LANCZOS, reducing_gap=3.0)
+            img.paste(tile, (x, y0))
+
+        return img
+
+    def _price_table_pages(self):
+        """
+        Ceník z .xlsx/.csv – stejné rozvržení jako v PDF (price_table_layout),
+        jen přepočtené z bodů na pixely náhledu. Může mít víc stránek.
+        """
+        try:
+            table = load_price_table(self.price_path)
+        except Exception:
+            return [self._price_image_page()]
+        lay = price_table_layout(table, self.layout)
+        font_name = ensure_fonts()
+
+        def hex_to_rgb(h): return tuple(int(h[i:i+2], 16) for i in (1, 3, 5))
+        col_grid = hex_to_rgb(TABLE_GRID_COLOR_HEX)
+        col_fill = hex_to_rgb(TABLE_BOLD_FILL_HEX)
+
+        pages = []
+        for r0, r1 in lay.pages:
+            img = self.blank_a4()
+            draw = ImageDraw.Draw(img)
+            W, H = img.size
+            px_per_pt = W / A4_W_PT
+            font = pil_font(max(1, round(lay.font_size * px_per_pt)))
+
+            x0 = (A4_W_PT - lay.width) / 2 * px_per_pt
+            y0 = self.layout.price_top_offset_cm * cm * px_per_pt
+            row_h = lay.row_height * px_per_pt
+            pad = lay.padding * px_per_pt
+            xs = [x0]
+            for w in lay.col_widths:
+                xs.append(xs[-1] + w * px_per_pt)
+            grid_px = max(1, round(TABLE_GRID_WIDTH_PT * px_per_pt))
+
+            for i, r in enumerate(range(r0, r1)):
+                top = y0 + i * row_h
+                if table.row_is_bold(r):
+                    draw.rectangle([xs[0], top, xs[-1], top + row_h], fill=col_fill)
+                for col, text in enumerate(table.rows[r]):
+                    text = fit_cell_text(text, font_name, lay.font_size, lay.col_widths[col] - 2 * lay.padding)
+                    if not text:
+                        continue
+                    mid = top + row_h / 2
+                    if table.numeric[r][col]:
+                        draw.text((xs[col + 1] - pad, mid), text, fill="black", font=font, anchor="rm")
+                    else:
+                        draw.text((xs[col] + pad, mid), text, fill="black", font=font, anchor="lm")
+
+            bottom = y0 + (r1 - r0) * row_h
+            for i in range(r1 - r0 + 1):
+                y = y0 + i * row_h
+                draw.line([(xs[0], y), (xs[-1], y)], fill=col_grid, width=grid_px)
+            for x in xs:
+                draw.line([(x, y0), (x, bottom)], fill=col_grid, width=grid_px)
+            pages.append(img)
+        return pages
+
+    def _price_band_pages(self):
+        """Vysoký screenshot ceníku po pásech (stejné řezy jako v PDF); pásy se čtou z cache po jednom."""
+        try:
+            return [self.price_band_page(band) for band in iter_price_band_images(self.price_path, self.layout)]
+        except Exception:
+            return [self._price_image_page()]
+
+    def price_band_page(self, band: Image.Image):
+        """Stránka s jedním pásem vysokého ceníku – pevná šířka layout.price_image_width_cm."""
+        img = self.blank_a4()
+        W, H = img.size
+        px_per_cm_x = W / A4_W_PT * 72.0 / 2.54
+        px_per_cm_y = H / A4_H_PT * 72.0 / 2.54
+        target_w_px = int(self.layout.price_image_width_cm * px_per_cm_x)
+        nh = max(1, int(band.height * target_w_px / band.width))
+        if band.mode != "RGB":
+            band = band.convert("RGB")   # paleta by se zmenšovala jen NEAREST
+        img.paste(band.resize((target_w_px, nh), Image.BILINEAR),
+                  ((W - target_w_px) // 2, int(self.layout.price_top_offset_cm * px_per_cm_y)))
+        return img
+
+    def _price_image_page(self):
+        """
+        Poslední stránka: horní odsazení v cm; šířka screenshotu pevně layout.price_image_width_cm,
+        výška se dopočítá. Pokud by výška přesáhla dostupný prostor, zmenší se (šířka < 15 cm).
+        """
+        img = self.blank_a4()
+        W, H = img.size
+
+        # převod cm->px: vycházej z rozměru náhledu (W,H) vs. A4 v bodech
+        px_per_pt_x = W / A4_W_PT
+        px_per_pt_y = H / A4_H_PT
+        pt_per_cm = 72.0 / 2.54
+        px_per_cm_x = px_per_pt_x * pt_per_cm
+        px_per_cm_y = px_per_pt_y * pt_per_cm
+
+        top_offset_px = int(self.layout.price_top_offset_cm * px_per_cm_y)
+        target_w_px  = int(self.layout.price_image_width_cm * px_per_cm_x)
+        max_h_px     = H - top_offset_px
+
+        # načti/placeholder
+        from PIL import Image, ImageDraw
+        import os
+        ingested = False
+        if self.price_path and os.path.exists(self.price_path):
+            try:
+                # ořezaný ceník z cache (zpracuje se jen jednou po načtení)
+                im = ingest_price_image(self.price_path)
+                ingested = True
+            except Exception:
+                im = Image.new("RGB", (1200,800), "lightgray")
+        else:
+            im = Image.new("RGB", (1200,800), "white")
+            pd = ImageDraw.Draw(im)
+            font = pil_font(36)
+            text = "Cenová tabulka (obrázek nenahrán)"
+            tw, th = pd.textbbox((0,0), text, font=font)[2:4]
+            pd.text(((1200-tw)//2, (800-th)//2), text, fill="black", font=font)
+
+        w0, h0 = im.size
+
+        # fit-to-width (15 cm), případně cap na výšku
+        scale_w = target_w_px / w0
+        target_h_px = int(h0 * scale_w)
+        if target_h_px > max_h_px:
+            scale = max_h_px / h0
+        else:
+            scale = scale_w
+
+        nw, nh = max(1, int(w0*scale)), max(1, int(h0*scale))
+        if ingested:
+            im2 = price_preview_variant(self.price_path, (nw, nh))
+        else:
+            im2 = im.resize((nw, nh), Image.BILINEAR)
+        x = (W - nw)//2
+        y = top_offset_px
+        img.paste(im2, (x, y))
+        return img
\ No newline at end of file
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Příprava screenshotu ceníku – jednou po načtení, ne při každém náhledu a exportu:
+  1. ořez jednobarevných okrajů (bbox rozdílu proti barvě rohu – v C přes ImageChops),
+  2. má-li obrázek ≤ 256 barev (čistý screenshot z Excelu), bezeztrátová paleta,
+  3. výsledek se drží v paměti; s cache stránek exportu (parametr `cache`, PageCache)
+     se uloží i na disk, takže ho použijí i procesy exportu a další exporty. Bez cache
+     (None, výchozí) se na disk nic nezapisuje. Zmenšené varianty pro náhled a rozměry
+     zpracovaných ceníků se drží v paměti.
+  4. vysoký ceník (dlouhý export z Excelu) se rozřeže na pásy po výšce stránky –
+     řezy jsou v řádcích bez textu (projekce řádků); s cache se pásy uloží jako samostatné
+     soubory, takže export i náhled pak drží v paměti vždy jen jeden pás.
+Klíčem je identita souboru (cesta, mtime, velikost) – změna souboru = nové zpracování.
+"""
+import io
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Tuple
+
+from PIL import Image, ImageChops
+
+from pdf.images import open_rgb
+from pdf.page_cache import PageCache, file_identity, page_key
+
+# Rozdíl kanálu od barvy pozadí, který se ještě počítá jako pozadí (šum JPEGu)
+TRIM_TOLERANCE = 16
+# Kolik px pozadí nechat kolem obsahu po ořezu
+TRIM_MARGIN_PX = 2
+# Kolik zpracovaných ceníků / variant náhledu / rozměrů ceníků držet v paměti
+INGEST_MEMORY_ITEMS = 2
+PREVIEW_VARIANTS = 8
+SIZE_MEMORY_ITEMS = 64
+# Řádek s nejvýš tímto podílem „inkoustu“ je místo pro řez (svislé mřížky tabulky ano, text ne)
+BAND_MAX_INK = 0.02
+# Pás je aspoň takový díl výšky stránky – jinak se řeže natvrdo na maximu
+BAND_MIN_FILL = 0.6
+
+_lock = threading.Lock()
+_ingested: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+_variants: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+_sizes: "OrderedDict[tuple, Tuple[int, int]]" = OrderedDict()
+
+
+def _lru_put(store: OrderedDict, key, value, limit: int):
+    store[key] = value
+    store.move_to_end(key)
+    while len(store) > limit:
+        store.popitem(last=False)
+
+
+def _ink_mask(im: Image.Image, tolerance: int = TRIM_TOLERANCE) -> Image.Image:
+    """Maska L: 255 tam, kde se pixel liší od barvy levého horního rohu (pozadí)."""
+    rgb = im.convert("RGB") if im.mode != "RGB" else im
+    diff = ImageChops.difference(rgb, Image.new("RGB", rgb.size, rgb.getpixel((0, 0))))
+    r, g, b = diff.split()
+    return ImageChops.lighter(ImageChops.lighter(r, g), b).point(lambda v: 255 if v > tolerance else 0)
+
+
+def trim_uniform_border(im: Image.Image, tolerance: int = TRIM_TOLERANCE,
+                        margin: int = TRIM_MARGIN_PX) -> Image.Image:
+    """Ořízne okraje v barvě levého horního rohu; obsah + margin px zůstane."""
+    bbox = _ink_mask(im, tolerance).getbbox()
+    if bbox is None:
+        return im
+    x0, y0, x1, y1 = bbox
+    box = (max(0, x0 - margin), max(0, y0 - margin), min(im.width, x1 + margin), min(im.height, y1 + margin))
+    return im if box == (0, 0, im.width, im.height) else im.crop(box)
+
+
+def to_exact_palette(im: Image.Image) -> Image.Image:
+    """Má-li obrázek ≤ 256 barev, vrátí ho v režimu P beze ztráty; jinak beze změny."""
+    colors = im.getcolors(maxcolors=256)
+    if colors is None:
+        return im
+    pal = im.quantize(colors=len(colors), method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    # pojistka: paleta musí vrátit přesně původní pixely
+    if ImageChops.difference(pal.convert("RGB"), im.convert("RGB")).getbbox() is not None:
+        return im
+    return pal
+
+
+def ingest_price_image(path: str, remember: bool = True, cache: PageCache | None = None) -> Image.Image:
+    """
+    Ořezaný (a případně paletový) ceník; z paměti, z cache na disku (jen s `cache`),
+    nebo zpracuje teď. remember=False => nedrží se v paměti (vysoké ceníky se pak čtou po pásech).
+    """
+    ident = file_identity(path)
+    with _lock:
+        if ident in _ingested:
+            _ingested.move_to_end(ident)
+            return _ingested[ident]
+
+    key = page_key("price-ingest", ident)
+    data = cache.get(key) if cache is not None else None
+    if data is not None:
+        im = Image.open(io.BytesIO(data))
+        im.load()
+    else:
+        im = to_exact_palette(trim_uniform_border(open_rgb(path)))
+        if cache is not None:
+            buf = io.BytesIO()
+            im.save(buf, "PNG", compress_level=1)   # jen mezivýsledek – rychlost před velikostí
+            cache.put(key, buf.getvalue())
+
+    with _lock:
+        _lru_put(_sizes, ident, im.size, SIZE_MEMORY_ITEMS)
+        if remember:
+            _lru_put(_ingested, ident, im, INGEST_MEMORY_ITEMS)
+    return im
+
+
+def price_image_size(path: str, cache: PageCache | None = None) -> Tuple[int, int]:
+    """Rozměr zpracovaného ceníku – z paměti nebo jen z hlavičky PNG v cache (bez dekódování)."""
+    ident = file_identity(path)
+    with _lock:
+        if ident in _ingested:
+            return _ingested[ident].size
+        if ident in _sizes:
+            _sizes.move_to_end(ident)
+            return _sizes[ident]
+    data = cache.get(page_key("price-ingest", ident)) if cache is not None else None
+    if data is not None:
+        return Image.open(io.BytesIO(data)).size
+    return ingest_price_image(path, remember=False, cache=cache).size
+
+
+def find_band_cuts(im: Image.Image, max_band_px: int) -> List[Tuple[int, int]]:
+    """
+    Rozdělí výšku obrázku na pásy ≤ max_band_px. Řez padne doprostřed posledního úseku
+    „prázdných“ řádků (inkoust ≤ BAND_MAX_INK) v dolní části pásu, bez prázdného úseku
+    natvrdo na maximu. Projekce řádků = zmenšení masky na šířku 1 (BOX), tedy v C.
+    """
+    max_band_px = max(1, max_band_px)
+    if im.height <= max_band_px:
+        return [(0, im.height)]
+    rows = _ink_mask(im).resize((1, im.height), Image.BOX).tobytes()   # průměr inkoustu na řádek
+    limit = int(255 * BAND_MAX_INK)
+    min_band_px = max(1, int(max_band_px * BAND_MIN_FILL))
+    bands, y = [], 0
+    while im.height - y > max_band_px:
+        hi, lo = y + max_band_px, y + min_band_px
+        end = next((r for r in range(hi, lo - 1, -1) if rows[r] <= limit), None)
+        if end is None:
+            cut = hi
+        else:
+            start = end
+            while start > lo and rows[start - 1] <= limit:
+                start -= 1
+            cut = (start + end + 1) // 2
+        bands.append((y, cut))
+        y = cut
+    bands.append((y, im.height))
+    return bands
+
+
+def _load_png(data: bytes) -> Image.Image:
+    im = Image.open(io.BytesIO(data))
+    im.load()
+    return im
+
+
+def iter_price_bands(path: str, max_band_px: int, cache: PageCache | None = None) -> Iterator[Image.Image]:
+    """
+    Pásy vysokého ceníku shora dolů. S `cache` se poprvé ceník rozřeže a pásy uloží
+    (index až nakonec); pak se čtou ze souborů po jednom – v paměti je vždy jen jeden pás.
+    Bez cache se pásy vyřežou ze zpracovaného ceníku pokaždé.
+    """
+    ident = file_identity(path)
+    index_key = page_key("price-bands", ident, max_band_px)
+    index = cache.get(index_key) if cache is not None else None
+    if index is not None:
+        for i in range(int(index)):
+            data = cache.get(page_key("price-band", ident, max_band_px, i))
+            if data is None:
+                break   # pás mezitím smazán (prune) – rozřezat znovu od tohoto pásu
+            yield _load_png(data)
+        else:
+            return
+        start = i
+    else:
+        start = 0
+
+    im = ingest_price_image(path, remember=False, cache=cache)
+    bands = find_band_cuts(im, max_band_px)
+    for i, (y0, y1) in enumerate(bands):
+        band = im.crop((0, y0, im.width, y1))
+        if cache is not None:
+            buf = io.BytesIO()
+            band.save(buf, "PNG", compress_level=1)
+            cache.put(page_key("price-band", ident, max_band_px, i), buf.getvalue())
+        if i >= start:
+            yield band
+    if cache is not None:
+        cache.put(index_key, str(len(bands)).encode("ascii"))
+
+
+def price_preview_variant(path: str, size: tuple) -> Image.Image:
+    """Zpracovaný ceník zmenšený na size (px) pro náhled – zmenšuje se jen jednou."""
+    key = (file_identity(path), tuple(size))
+    with _lock:
+        if key in _variants:
+            _variants.move_to_end(key)
+            return _variants[key]
+    im = ingest_price_image(path)
+    if im.mode != "RGB":
+        im = im.convert("RGB")   # paleta by se zmenšovala jen NEAREST
+    im = im.resize(size, Image.BILINEAR)
+    with _lock:
+        _lru_put(_variants, key, im, PREVIEW_VARIANTS)
+    return im
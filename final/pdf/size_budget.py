@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Export „max. velikost“: najde nejlepší kódování obrázků, se kterým se PDF vejde
+do limitu (typicky kvůli e-mailu).
+
+Postup:
+  1. každý zdroj se dekóduje a ořízne jen jednou a klasifikuje (fotka / plochý ceník);
+     vektorové segmenty (.pdf/.svg) se vkládají beze změny,
+  2. zkusí se bezeztrátový export,
+  3. pak pro klesající strop dpi bisekce JPEG kvality fotek (ceník jde do palety);
+     vyhrává nejvyšší kvalita napříč stropy (300 dpi v q=90 je lepší než plné rozlišení
+     v q=40), nižší strop se proto zkouší jen od kvality o stupeň vyšší než dosavadní,
+  4. každý pokus se skutečně složí do PDF v paměti – měří se přesná výsledná velikost.
+"""
+import io
+from dataclasses import dataclass
+from typing import BinaryIO, List
+
+from config import EXPORT_MAX_SIZE_MB
+from pdf.images import ImageEncoding, LOSSLESS, KIND_FLAT, classify_image, encode_image, fit_to_dpi
+from pdf.export import (
+    component_cell_pt, is_tall_price, iter_price_band_images, load_segment_tile, load_price_image,
+    price_box_pt, render_pdf,
+)
+from pdf.layout import DEFAULT_LAYOUT, LayoutProfile
+from pdf.vector import is_vector_segment, prepare_vector_tile
+from price_table import is_price_table, load_price_table
+
+# Rozsah JPEG kvality a kroky stropu rozlišení (None = plné rozlišení)
+MIN_QUALITY = 40
+MAX_QUALITY = 95
+DPI_STEPS = (None, 300, 220, 150, 110)
+FLAT_PALETTE_COLORS = 256
+
+
+@dataclass(frozen=True)
+class SizeBudgetResult:
+    size_bytes: int
+    max_bytes: int
+    encoding: ImageEncoding
+    fits: bool
+    attempts: int
+
+    def describe(self) -> str:
+        mb = 1024 * 1024
+        state = "vejde se" if self.fits else "NEVEJDE SE"
+        return (
+            f"Velikost {self.size_bytes / mb:.2f} MB (limit {self.max_bytes / mb:.2f} MB, {state}); "
+            f"nastavení: {self.encoding.describe()}; pokusů: {self.attempts}"
+        )
+
+
+def export_pdf_max_size(
+    out_path: str | BinaryIO,
+    order_paths: List[str],
+    margin_cm: float,      # ignorováno
+    gap_cm: float,         # ignorováno
+    title_text: str,
+    info_lines_text: str,
+    date_style: str,
+    use_today: bool,
+    price_image_path: str | None,
+    max_bytes: int | None = None,
+    layout: LayoutProfile = DEFAULT_LAYOUT,
+) -> SizeBudgetResult:
+    """
+    Stejné parametry jako export_pdf + max_bytes (výchozí EXPORT_MAX_SIZE_MB).
+    Zapíše nejkvalitnější variantu, která se vejde; když se nevejde nic,
+    zapíše nejmenší dosaženou a vrátí fits=False.
+    """
+    if max_bytes is None:
+        max_bytes = int(EXPORT_MAX_SIZE_MB * 1024 * 1024)
+
+    _, _, inner_w, cell_h_pt = component_cell_pt(layout)
+    # vektorové segmenty a tabulkový ceník do hledání kódování nevstupují
+    sources = []
+    tile_slots = []   # pro každou dlaždici: VectorTile, nebo index zdroje
+    for p in order_paths:
+        if is_vector_segment(p):
+            tile_slots.append(prepare_vector_tile(p))
+        else:
+            tile_slots.append(len(sources))
+            sources.append((load_segment_tile(p, layout), inner_w, cell_h_pt))
+    price_table = load_price_table(price_image_path) if is_price_table(price_image_path) else None
+    n_tiles = len(sources)
+    if price_table is None:
+        # vysoký ceník = víc pásů, každý vlastní zdroj (a stránka)
+        tall = is_tall_price(price_image_path, layout)
+        parts = iter_price_band_images(price_image_path, layout) if tall else [load_price_image(price_image_path)]
+        for price_im in parts:
+            _, _, pw, ph = price_box_pt(*price_im.size, layout)
+            sources.append((price_im, pw, ph))
+    kinds = [classify_image(im) for im, _, _ in sources]
+
+    scaled = {}    # (index, dpi) -> podvzorkovaný zdroj (resampling je dražší než JPEG)
+    encoded = {}   # (index, klíč kódování) -> PreparedImage – jen pro nejlepší vyhovující pokus
+
+    def enc_key(i: int, enc: ImageEncoding):
+        if kinds[i] == KIND_FLAT:
+            return (i, enc.flat_colors, enc.max_dpi)   # JPEG kvalita ploché obrázky neovlivní
+        return (i, enc.photo_quality, enc.max_dpi)
+
+    def encode(i: int, enc: ImageEncoding):
+        im, bw, bh = sources[i]
+        key = enc_key(i, enc)
+        if key not in encoded:
+            if (i, enc.max_dpi) not in scaled:
+                scaled[(i, enc.max_dpi)] = fit_to_dpi(im, bw, bh, enc.max_dpi, kinds[i])
+            encoded[key] = encode_image(scaled[(i, enc.max_dpi)], bw, bh, enc, kind=kinds[i])
+        return encoded[key]
+
+    def build(enc: ImageEncoding) -> bytes:
+        images = [encode(i, enc) for i in range(len(sources))]
+        if price_table is not None:
+            price = price_table
+        elif tall:
+            price = images[n_tiles:]
+        else:
+            price = images[n_tiles]
+        buf = io.BytesIO()
+        tiles = [images[t] if isinstance(t, int) else t for t in tile_slots]
+        render_pdf(buf, title_text, info_lines_text, date_style, use_today, tiles, price, layout)
+        return buf.getvalue()
+
+    sizes = {}     # ImageEncoding -> velikost PDF v bajtech (PDF samotná se nedrží)
+    kept = None    # nejlepší zatím vyhovující kódování (jeho obrázky se drží pro finální build)
+
+    def fits(enc: ImageEncoding) -> bool:
+        nonlocal kept
+        if enc not in sizes:
+            sizes[enc] = len(build(enc))
+            # každý další vyhovující pokus je lepší než předchozí (vyšší kvalita / bezeztrátově)
+            if sizes[enc] <= max_bytes:
+                kept = enc
+            # zahoď kódování zamítnutých a překonaných pokusů; ploché obrázky v tomto dpi
+            # kvalitu nezohledňují, ty se hodí i dalším pokusům
+            wanted = {enc_key(i, kept) for i in range(len(sources))} if kept is not None else set()
+            wanted.update(enc_key(i, enc) for i in range(len(sources)) if kinds[i] == KIND_FLAT)
+            for key in [k for k in encoded if k not in wanted]:
+                del encoded[key]
+        return sizes[enc] <= max_bytes
+
+    best = LOSSLESS if fits(LOSSLESS) else None
+    if best is None:
+        # pro každý strop dpi nejvyšší kvalita, která se vejde; vyhrává nejvyšší kvalita
+        # napříč kroky (při shodě vyšší dpi) – nižší dpi se zkouší jen s vyšší kvalitou
+        best_q = MIN_QUALITY - 1
+        for dpi in DPI_STEPS:
+            def at(q: int) -> ImageEncoding:
+                return ImageEncoding(photo_quality=q, flat_colors=FLAT_PALETTE_COLORS, max_dpi=dpi)
+
+            lo, hi = best_q + 1, MAX_QUALITY
+            if fits(at(lo)):
+                # bisekce: největší kvalita, která se ještě vejde
+                if fits(at(hi)):
+                    lo = hi
+                while hi - lo > 1:
+                    mid = (lo + hi) // 2
+                    if fits(at(mid)):
+                        lo = mid
+                    else:
+                        hi = mid
+                best, best_q = at(lo), lo
+            # podvzorkované zdroje tohoto kroku už nejsou potřeba (kromě vítěze)
+            for key in [k for k in scaled if k[1] == dpi and (best is None or best.max_dpi != dpi)]:
+                del scaled[key]
+            if best_q >= MAX_QUALITY:
+                break
+
+    if best is None:
+        # nic se nevešlo – vezmi nejmenší vyzkoušenou variantu
+        best = min(sizes, key=sizes.get)
+
+    data = build(best)
+    if hasattr(out_path, "write"):
+        out_path.write(data)
+    else:
+        with open(out_path, "wb") as fh:
+            fh.write(data)
+    return SizeBudgetResult(
+        size_bytes=len(data), max_bytes=max_bytes, encoding=best,
+        fits=len(data) <= max_bytes, attempts=len(sizes),
+    )
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Průběžný zápis PDF do libovolného binárního streamu (soubor, roura, stdout, HTTP odpověď).
+
+Reportlab drží celý dokument v paměti až do save(). Proto se každá stránka vyrenderuje
+jako samostatné malé PDF („fragment“) a StreamingPdfWriter z něj objekty přečísluje,
+hned zapíše a zapomene. Na konci dopíše strom stránek, katalog, xref a trailer.
+Paměť je tak omezená jednou stránkou a první bajty odcházejí hned po titulní straně.
+
+Parser počítá s PDF, jak je píše reportlab (klasická xref tabulka, bez objektových
+streamů) – pro obecná PDF určený není.
+"""
+import datetime
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, List
+
+_REF_RE = re.compile(rb"(\d+) 0 R\b")
+_XREF_ENTRY_RE = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+_PARENT_RE = re.compile(rb"/Parent \d+ 0 R\s*")
+_STREAM_MARK = b">>\nstream\n"
+
+PDF_HEADER = b"%PDF-1.4\n%\x93\x8c\x8b\x9e\n"
+
+
+@dataclass
+class PdfObject:
+    head: bytes                 # slovník / hodnota (zde se přečíslovávají reference)
+    stream: bytes | None = None  # surová data streamu včetně „endstream“
+    _digest: bytes | None = field(default=None, repr=False, compare=False)
+
+    def stream_digest(self) -> bytes:
+        """MD5 streamu (pro /ID) – spočítá se jednou, i když se fragment zapisuje do víc PDF."""
+        if self._digest is None:
+            self._digest = hashlib.md5(self.stream).digest()
+        return self._digest
+
+
+class PdfFragment:
+    """Rozparsované PDF z reportlabu: objekty podle čísla a stránky v pořadí."""
+
+    def __init__(self, objects: Dict[int, PdfObject], pages: List[int], pages_root: int | None = None):
+        self.objects = objects
+        self.pages = pages
+        self.pages_root = pages_root
+
+    @classmethod
+    def parse(cls, data: bytes) -> "PdfFragment":
+        sx = int(data[data.rindex(b"startxref") + 9:].split()[0])
+        trailer_at = data.index(b"trailer", sx)
+        offsets = {}
+        num = 0
+        for line in data[sx:trailer_at].splitlines()[1:]:
+            parts = line.split()
+            if len(parts) == 2:                     # hlavička podsekce „start count“
+                num = int(parts[0])
+                continue
+            m = _XREF_ENTRY_RE.match(line)
+            if m:
+                if m.group(3) == b"n":
+                    offsets[num] = int(m.group(1))
+                num += 1
+
+        bounds = sorted(offsets.values()) + [sx]
+        next_off = {off: bounds[i + 1] for i, off in enumerate(bounds[:-1])}
+        objects = {}
+        for n, off in offsets.items():
+            body = data[off:next_off[off]]
+            body = body[body.index(b"obj") + 3:].strip()
+            if body.endswith(b"endobj"):
+                body = body[:-6].rstrip()
+            i = body.find(_STREAM_MARK)
+            if i >= 0:
+                objects[n] = PdfObject(body[:i + 2], body[i + 2:])
+            else:
+                objects[n] = PdfObject(body)
+
+        trailer = data[trailer_at:]
+        root = int(re.search(rb"/Root (\d+) 0 R", trailer).group(1))
+        pages_ref = int(re.search(rb"/Pages (\d+) 0 R", objects[root].head).group(1))
+        pages = cls._collect_pages(objects, pages_ref)
+        return cls(objects, pages, pages_ref)
+
+    @staticmethod
+    def _collect_pages(objects, node: int) -> List[int]:
+        head = objects[node].head
+        if b"/Type /Pages" not in head:
+            return [node]
+        kids = re.search(rb"/Kids \[([^\]]*)\]", head).group(1)
+        out = []
+        for k in _REF_RE.findall(kids):
+            out.extend(PdfFragment._collect_pages(objects, int(k)))
+        return out
+
+
+def page_parent_errors(data: bytes) -> List[str]:
+    """
+    Kontrola výstupu StreamingPdfWriter (cli.py --stress): /Parent každé stránky musí
+    ukazovat na kořen stromu stránek. Vrací popisy chyb (prázdný seznam = v pořádku).
+    """
+    frag = PdfFragment.parse(data)
+    errors = []
+    for i, page in enumerate(frag.pages, 1):
+        m = re.search(rb"/Parent (\d+) 0 R", frag.objects[page].head)
+        if m is None:
+            errors.append(f"stránka {i}: chybí /Parent")
+        elif int(m.group(1)) != frag.pages_root:
+            errors.append(f"stránka {i}: /Parent {int(m.group(1))} 0 R místo {frag.pages_root} 0 R")
+    return errors
+
+
+def _pdf_date(d: datetime.datetime) -> bytes:
+    return d.strftime("(D:%Y%m%d%H%M%S)").encode("ascii")
+
+
+class StreamingPdfWriter:
+    """
+    Zapisuje stránky z fragmentů průběžně do `fh`. fh nemusí umět seek/tell –
+    pozice se počítají z počtu zapsaných bajtů.
+    Výstup je deterministický: bez creation_date se do Info nezapisují žádná data
+    a /ID je hash obsahu (u streamů jejich otisk) – stejné vstupy => stejné bajty.
+    """
+
+    PAGES_NUM = 1
+    CATALOG_NUM = 2
+
+    def __init__(self, fh: BinaryIO, creation_date: datetime.datetime | None = None):
+        self.fh = fh
+        self.creation_date = creation_date
+        self._pos = 0
+        self._offsets: Dict[int, int] = {}
+        self._next_num = 3
+        self._kids: List[int] = []
+        self._md5 = hashlib.md5()
+        self._write(PDF_HEADER)
+
+    # ---- nízká úroveň ----
+    def _write(self, data: bytes):
+        self.fh.write(data)
+        self._pos += len(data)
+        self._md5.update(data)
+
+    def _alloc(self) -> int:
+        n = self._next_num
+        self._next_num += 1
+        return n
+
+    def _write_obj(self, num: int, head: bytes, stream: bytes | None = None, digest: bytes | None = None):
+        self._offsets[num] = self._pos
+        self._write(b"%d 0 obj\n" % num + head)
+        if stream is not None:
+            # do /ID jde jen otisk streamu – sdílené obrázky se nehashují pro každé PDF znovu
+            self.fh.write(stream)
+            self._pos += len(stream)
+            self._md5.update(digest or hashlib.md5(stream).digest())
+        self._write(b"\nendobj\n")
+
+    # ---- stránky ----
+    def add_fragment(self, data: bytes | PdfFragment) -> List[int]:
+        """Zkopíruje všechny stránky fragmentu (a co potřebují) a hned je zapíše."""
+        frag = data if isinstance(data, PdfFragment) else PdfFragment.parse(data)
+        mapping: Dict[int, int] = {}   # staré číslo -> nové; sdílené objekty fragmentu jen jednou
+        new_pages = []
+        for page in frag.pages:
+            fresh = [n for n in self._closure(frag, page) if n not in mapping]
+            for n in fresh:
+                mapping[n] = self._alloc()
+            for n in fresh:
+                obj = frag.objects[n]
+                head = obj.head
+                if n == page:
+                    head = _PARENT_RE.sub(b"", head)
+                head = _REF_RE.sub(lambda m: b"%d 0 R" % mapping[int(m.group(1))], head)
+                if n == page:
+                    # /Parent až po přečíslování – jinak by se „1 0 R“ přemapovalo na objekt fragmentu
+                    head = head.replace(b"<<", b"<<\n/Parent %d 0 R" % self.PAGES_NUM, 1)
+                self._write_obj(mapping[n], head, obj.stream,
+                                obj.stream_digest() if obj.stream is not None else None)
+            self._kids.append(mapping[page])
+            new_pages.append(mapping[page])
+        self.fh.flush()
+        return new_pages
+
+    @staticmethod
+    def _closure(frag: PdfFragment, page: int) -> List[int]:
+        """Objekty dosažitelné ze stránky (bez zpětného odkazu /Parent)."""
+        seen, order, todo = set(), [], [page]
+        while todo:
+            n = todo.pop()
+            if n in seen:
+                continue
+            seen.add(n)
+            order.append(n)
+            head = frag.objects[n].head
+            if n == page:
+                head = _PARENT_RE.sub(b"", head)
+            todo.extend(int(r) for r in _REF_RE.findall(head))
+        return order
+
+    @property
+    def page_count(self) -> int:
+        return len(self._kids)
+
+    def close(self):
+        """Dopíše strom stránek, katalog, info, xref a trailer. Stream nezavírá."""
+        kids = b" ".join(b"%d 0 R" % k for k in self._kids)
+        self._write_obj(self.PAGES_NUM, b"<<\n/Count %d /Kids [ %s ] /Type /Pages\n>>" % (len(self._kids), kids))
+        self._write_obj(self.CATALOG_NUM, b"<<\n/PageMode /UseNone /Pages %d 0 R /Type /Catalog\n>>" % self.PAGES_NUM)
+        info_num = self._alloc()
+        dates = b""
+        if self.creation_date is not None:
+            date = _pdf_date(self.creation_date)
+            dates = b"/CreationDate %s /ModDate %s " % (date, date)
+        self._write_obj(info_num, b"<<\n%s/Producer (Cenove nabidky) /Trapped /False\n>>" % dates)
+
+        doc_id = self._md5.hexdigest().encode("ascii")
+        size = self._next_num
+        xref_at = self._pos
+        out = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+        for n in range(1, size):
+            off = self._offsets.get(n)
+            out.append(b"%010d 00000 n \n" % off if off is not None else b"0000000000 65535 f \n")
+        out.append(b"trailer\n<<\n/ID [<%s><%s>]\n/Info %d 0 R\n/Root %d 0 R\n/Size %d\n>>\nstartxref\n%d\n%%%%EOF\n"
+                   % (doc_id, doc_id, info_num, self.CATALOG_NUM, size, xref_at))
+        self._write(b"".join(out))
+        self.fh.flush()
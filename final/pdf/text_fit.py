@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Napasování textu do boxu (nadpis titulní strany) – jeden výpočet pro PDF i náhled.
+
+Šířky se neměří znovu pro každý pokus: tabulka šířek znaků fontu (jednotky 1/1000 em,
+stejné jako používá pdfmetrics.stringWidth) dá šířku každého slova jednou a řádek je
+jen součet slov a mezer. Velikost písma se hledá půlením intervalu místo krokování
+po 1 pt a hotové rozvržení se pamatuje podle (text, font, box). Výsledek je bod po bodu
+stejný jako dřívější postupné zmenšování (max_size, max_size − 1, … do min_size).
+"""
+import math
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Tuple
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from fonts import ensure_fonts, face_metrics
+
+# Kolik šířek slov si pamatuje jeden font (nejdéle nepoužité se zahazují)
+WORD_WIDTH_CACHE_ITEMS = 4096
+
+
+class GlyphAdvances:
+    """Šířky znaků jednoho fontu reportlabu; šířky slov se pamatují v omezené LRU."""
+
+    def __init__(self, font_name: str):
+        self.font_name = font_name
+        font = pdfmetrics.getFont(font_name)
+        self._ttf = isinstance(font, TTFont)
+        if self._ttf:
+            self._chars = dict(font.face.charWidths)
+            self._default = font.face.defaultWidth
+        else:
+            self._chars, self._default = {}, None
+        self.units = lru_cache(maxsize=WORD_WIDTH_CACHE_ITEMS)(self._units)
+
+    def _char(self, code: int) -> float:
+        w = self._chars.get(code)
+        if w is None:
+            if self._default is not None:
+                return self._default
+            # Type1: celočíselné šířky z AFM (zaokrouhlení jen smaže chybu násobení 0.001 × 1000)
+            w = self._chars[code] = round(pdfmetrics.stringWidth(chr(code), self.font_name, 1000), 3)
+        return w
+
+    def _units(self, text: str) -> float:
+        """Šířka textu v 1/1000 em (součet přesný – šířky jsou násobky 1/2048 nebo celá čísla)."""
+        return sum(map(self._char, map(ord, text)))
+
+    def width(self, units: float, size: float) -> float:
+        """Šířka v bodech – stejné pořadí operací jako pdfmetrics.stringWidth (kvůli shodě na bit)."""
+        return 0.001 * size * units if self._ttf else units * 0.001 * size
+
+
+_advances = {}
+_advances_lock = threading.Lock()
+
+
+def glyph_advances(font_name: str) -> GlyphAdvances:
+    ensure_fonts()
+    with _advances_lock:
+        adv = _advances.get(font_name)
+        if adv is None:
+            adv = _advances[font_name] = GlyphAdvances(font_name)
+        return adv
+
+
+@dataclass(frozen=True)
+class TextFit:
+    size: float                   # velikost písma v pt
+    lines: Tuple[str, ...]
+    widths: Tuple[float, ...]     # šířky řádků v pt
+    ascent: float
+    descent: float
+    line_height: float
+    fits: bool                    # False = ani v min. velikosti se nevejde
+
+    @property
+    def block_height(self) -> float:
+        return len(self.lines) * self.line_height
+
+
+def _wrap(units: List[float], space: float, limit) -> List[Tuple[int, int, float]]:
+    """Hladové zalamování slov: [(první slovo, za posledním, šířka v jednotkách)]."""
+    lines, start, cur = [], 0, None
+    for i, u in enumerate(units):
+        test = u if cur is None else cur + space + u
+        if limit(test):
+            cur = test
+        else:
+            if cur is not None:
+                lines.append((start, i, cur))
+            start, cur = i, u
+    if cur is not None:
+        lines.append((start, len(units), cur))
+    return lines
+
+
+@lru_cache(maxsize=512)
+def fit_text(text: str, font_name: str, max_w: float, max_h: float, max_size: float, min_size: float,
+             max_lines: int = 2, leading: float = 1.12) -> TextFit:
+    """
+    Největší velikost z max_size, max_size − 1, … (nejníž první ≤ min_size), ve které se text
+    zalomený po slovech vejde do max_lines řádků široké max_w a vysoké max_h.
+    """
+    adv = glyph_advances(font_name)
+    words = text.split()
+    units = [adv.units(w) for w in words]
+    space = adv.units(" ")
+    asc_units, dsc_units = face_metrics(font_name)
+
+    def attempt(size: float):
+        lines = _wrap(units, space, lambda u: adv.width(u, size) <= max_w)
+        asc = asc_units * size / 1000.0
+        dsc = dsc_units * size / 1000.0
+        line_h = (asc + dsc) * leading
+        ok = (len(lines) <= max_lines
+              and all(adv.width(u, size) <= max_w for _, _, u in lines)
+              and len(lines) * line_h <= max_h)
+        return ok, lines, asc, dsc, line_h
+
+    # zmenšením se řádky jen zkracují => „vejde se“ je monotónní a stačí půlení
+    last = max(0, math.ceil(max_size - min_size))
+    lo, hi = 0, last
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if attempt(max_size - mid)[0]:
+            hi = mid
+        else:
+            lo = mid + 1
+    size = max_size - lo
+    ok, lines, asc, dsc, line_h = attempt(size)
+    return TextFit(
+        size=size,
+        lines=tuple(" ".join(words[a:b]) for a, b, _ in lines),
+        widths=tuple(adv.width(u, size) for _, _, u in lines),
+        ascent=asc,
+        descent=dsc,
+        line_height=line_h,
+        fits=ok,
+    )
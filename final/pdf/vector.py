@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Vektorové segmenty (jednostránkové PDF, SVG) místo 2839×1004 PNG.
+
+V exportu se segment vloží jako form XObject se stejným cover ořezem jako bitmapa
+(oříznutí na box dlaždice, na střed) – text zůstane ostrý a PDF je o řád menší.
+  - PDF: stránka přes pdfrw (pip install pdfrw),
+  - SVG: kresba přes svglib (pip install svglib), zabalená do formu canvasu.
+Náhled, obrázky stránek a katalog segment rastrují přes pypdfium2 (SVG přes PDF
+v paměti); rastry se drží v paměti, na disku jen v cache stránek, kterou předá volající
+(parametr `cache`, PageCache exportu; None = na disk nic).
+Bez knihoven vyhodí VectorUnavailable se zprávou, co doinstalovat.
+"""
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+
+from PIL import Image
+
+from pdf.page_cache import PageCache, file_identity, page_key
+
+VECTOR_SUFFIXES = (".pdf", ".svg")
+SEGMENT_SUFFIXES = (".png",) + VECTOR_SUFFIXES
+
+# Kolik rastrů (náhled, galerie) a načtených kreseb držet v paměti
+RASTER_MEMORY_ITEMS = 32
+SOURCE_MEMORY_ITEMS = 16
+
+
+class VectorUnavailable(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class VectorTile:
+    """Vektorový segment pro stránku PDF: jen cesta a rozměr v bodech (kreslí se až na canvas)."""
+    path: str
+    width: float
+    height: float
+
+
+_lock = threading.Lock()
+_sources: "OrderedDict[tuple, object]" = OrderedDict()   # identita -> pdfrw xobject / svglib Drawing
+_rasters: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+
+
+def _lru_put(store: OrderedDict, key, value, limit: int):
+    store[key] = value
+    store.move_to_end(key)
+    while len(store) > limit:
+        store.popitem(last=False)
+
+
+def is_vector_segment(path: str | None) -> bool:
+    return bool(path) and Path(path).suffix.lower() in VECTOR_SUFFIXES
+
+
+def _is_svg(path: str) -> bool:
+    return Path(path).suffix.lower() == ".svg"
+
+
+def _load_source(path: str):
+    """Načtená kresba: pdfrw form XObject první stránky, nebo svglib Drawing (s cache)."""
+    ident = file_identity(path)
+    with _lock:
+        if ident in _sources:
+            _sources.move_to_end(ident)
+            return _sources[ident]
+    if _is_svg(path):
+        try:
+            from svglib.svglib import svg2rlg
+        except ImportError:
+            raise VectorUnavailable("SVG segmenty vyžadují svglib (pip install svglib).") from None
+        src = svg2rlg(path)
+        if src is None:
+            raise ValueError(f"Nepodařilo se načíst SVG: {path}")
+    else:
+        try:
+            from pdfrw import PdfReader
+            from pdfrw.buildxobj import pagexobj
+        except ImportError:
+            raise VectorUnavailable("PDF segmenty vyžadují pdfrw (pip install pdfrw).") from None
+        pages = PdfReader(path).pages
+        if not pages:
+            raise ValueError(f"PDF segment nemá žádnou stránku: {path}")
+        src = pagexobj(pages[0])
+    with _lock:
+        _lru_put(_sources, ident, src, SOURCE_MEMORY_ITEMS)
+    return src
+
+
+def _source_box(src) -> Tuple[float, float, float, float]:
+    """(x0, y0, šířka, výška) kresby v bodech."""
+    if hasattr(src, "BBox"):
+        x0, y0, x1, y1 = (float(v) for v in src.BBox)
+        return x0, y0, x1 - x0, y1 - y0
+    return 0.0, 0.0, float(src.width), float(src.height)
+
+
+def prepare_vector_tile(path: str) -> VectorTile:
+    """Ověří, že segment jde načíst, a vrátí jeho rozměr (běží v procesu přípravy obrázků)."""
+    _, _, w, h = _source_box(_load_source(path))
+    return VectorTile(path, w, h)
+
+
+def _form_name(c, tile: VectorTile) -> str:
+    """Jméno formu na canvasu – stejný segment se v dokumentu uloží jen jednou."""
+    src = _load_source(tile.path)
+    if not _is_svg(tile.path):
+        from pdfrw.toreportlab import makerl
+        return makerl(c, src)
+    name = "VS" + page_key("svg-form", file_identity(tile.path))[:16]
+    if not c.hasForm(name):
+        from reportlab.graphics import renderPDF
+        x0, y0, w, h = _source_box(src)
+        c.beginForm(name, lowerx=0, lowery=0, upperx=w, uppery=h)
+        renderPDF.draw(src, c, 0, 0)
+        c.endForm()
+    return name
+
+
+def draw_vector_tile(c, tile: VectorTile, x: float, y: float, width: float, height: float):
+    """Segment do boxu cover ořezem (jako cover_crop_box u bitmap): zvětšit, vystředit, oříznout."""
+    name = _form_name(c, tile)
+    x0, y0, sw, sh = _source_box(_load_source(tile.path))
+    scale = max(width / sw, height / sh)
+    c.saveState()
+    clip = c.beginPath()
+    clip.rect(x, y, width, height)
+    c.clipPath(clip, stroke=0, fill=0)
+    c.translate(x + (width - sw * scale) / 2, y + (height - sh * scale) / 2)
+    c.scale(scale, scale)
+    if _is_svg(tile.path):
+        c.doForm(name)
+    else:
+        c.translate(-x0, -y0)   # pdfrw form má BBox podle MediaBox stránky
+        c.doForm(name)
+    c.restoreState()
+
+
+# ---- rastr (náhled, galerie, obrázky stránek, katalog) ----------------------
+
+def _pdfium_document(path: str):
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        raise VectorUnavailable("Náhled vektorových segmentů vyžaduje pypdfium2 (pip install pypdfium2).") from None
+    if not _is_svg(path):
+        return pdfium.PdfDocument(path)
+    from reportlab.graphics import renderPDF
+    return pdfium.PdfDocument(renderPDF.drawToString(_load_source(path)))
+
+
+def _render(path: str, scale: float) -> Image.Image:
+    """Stránka segmentu v měřítku scale (px na bod), RGB na bílém pozadí."""
+    doc = _pdfium_document(path)
+    try:
+        return doc[0].render(scale=scale, fill_color=(255, 255, 255, 255)).to_pil().convert("RGB")
+    finally:
+        doc.close()
+
+
+def _cached_raster(path: str, kind: str, size: Tuple[int, int], make,
+                   cache: PageCache | None = None) -> Image.Image:
+    ident = file_identity(path)
+    key = (ident, kind, size)
+    with _lock:
+        if key in _rasters:
+            _rasters.move_to_end(key)
+            return _rasters[key]
+    disk_key = page_key("vector-raster", ident, kind, size)
+    data = cache.get(disk_key) if cache is not None else None
+    if data is not None:
+        im = Image.open(io.BytesIO(data))
+        im.load()
+    else:
+        im = make()
+        if cache is not None:
+            buf = io.BytesIO()
+            im.save(buf, "PNG", compress_level=1)
+            cache.put(disk_key, buf.getvalue())
+    with _lock:
+        _lru_put(_rasters, key, im, RASTER_MEMORY_ITEMS)
+    return im
+
+
+def vector_tile_image(path: str, width_px: int, height_px: int, cache: PageCache | None = None) -> Image.Image:
+    """Segment přesně width_px × height_px s cover ořezem (jako dlaždice v PDF)."""
+    def make():
+        _, _, sw, sh = _source_box(_load_source(path))
+        scale = max(width_px / sw, height_px / sh)
+        im = _render(path, scale)
+        x = max(0, (im.width - width_px) // 2)
+        y = max(0, (im.height - height_px) // 2)
+        im = im.crop((x, y, x + width_px, y + height_px))
+        return im if im.size == (width_px, height_px) else im.resize((width_px, height_px), Image.BILINEAR)
+    return _cached_raster(path, "tile", (width_px, height_px), make, cache)
+
+
+def vector_image(path: str, max_w_px: int, max_h_px: int | None = None,
+                 cache: PageCache | None = None) -> Image.Image:
+    """Celý segment vepsaný do max_w_px × max_h_px (galerie, katalog)."""
+    def make():
+        _, _, sw, sh = _source_box(_load_source(path))
+        scale = max_w_px / sw if max_h_px is None else min(max_w_px / sw, max_h_px / sh)
+        return _render(path, scale)
+    return _cached_raster(path, "fit", (max_w_px, max_h_px or 0), make, cache)
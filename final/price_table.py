@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+Ceník přímo z tabulky (.xlsx / .csv) místo screenshotu – vykreslí se jako vektorový
+text (times.ttf), takže stránka má pár kB, text jde označit a render trvá milisekundy.
+
+Čtení je čistě v Pythonu (zipfile + XML, csv) – Excel ani další knihovny nejsou potřeba.
+Z .xlsx se bere první list: hodnoty, tučné písmo a formát čísel (měna Kč, desetinná místa).
+Rozvržení (layout_price_table) je společné pro PDF i PIL náhled, aby seděly na sebe.
+"""
+import csv
+import io
+import re
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+from xml.etree import ElementTree as ET
+
+from reportlab.pdfbase import pdfmetrics
+
+from fonts import ensure_fonts
+
+TABLE_SUFFIXES = (".xlsx", ".csv")
+
+# Typografie tabulky (v bodech)
+TABLE_FONT_SIZE_PT = 10.0
+TABLE_MIN_FONT_SIZE_PT = 6.0
+TABLE_ROW_HEIGHT_FACTOR = 1.6     # výška řádku = velikost písma × faktor
+TABLE_PADDING_FACTOR = 0.5        # vodorovné odsazení v buňce = velikost písma × faktor
+TABLE_GRID_COLOR_HEX = "#9A9A9A"
+TABLE_BOLD_FILL_HEX = "#E6EEF1"   # podklad tučných řádků (hlavička, součty)
+TABLE_GRID_WIDTH_PT = 0.5
+
+_NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_CELL_REF_RE = re.compile(r"([A-Z]+)(\d+)")
+
+
+@dataclass(frozen=True)
+class PriceTable:
+    """Obsah ceníku: texty buněk (už naformátované), tučnost a zarovnání vpravo (čísla)."""
+    rows: Tuple[Tuple[str, ...], ...]
+    bold: Tuple[Tuple[bool, ...], ...]
+    numeric: Tuple[Tuple[bool, ...], ...]
+
+    @property
+    def n_cols(self) -> int:
+        return len(self.rows[0]) if self.rows else 0
+
+    def row_is_bold(self, r: int) -> bool:
+        cells = [b for b, t in zip(self.bold[r], self.rows[r]) if t]
+        return bool(cells) and all(cells)
+
+
+@dataclass(frozen=True)
+class PriceTableLayout:
+    """Geometrie tabulky v bodech; pages = rozsahy řádků (od, do) pro jednotlivé stránky."""
+    font_size: float
+    row_height: float
+    padding: float
+    col_widths: Tuple[float, ...]
+    pages: Tuple[Tuple[int, int], ...]
+
+    @property
+    def width(self) -> float:
+        return sum(self.col_widths)
+
+
+def is_price_table(path: str | None) -> bool:
+    return bool(path) and Path(path).suffix.lower() in TABLE_SUFFIXES
+
+
+# ---- formát čísel -----------------------------------------------------------
+
+def _format_number(value: float, fmt_code: str = "") -> str:
+    """Česky: mezera jako oddělovač tisíců, desetinná čárka; „Kč“/„%“ podle formátu buňky."""
+    if "%" in fmt_code:
+        value *= 100
+    value = round(value, 9)   # šum floatu (0.07 * 100 = 7.000000000000001)
+    if re.search(r"[0#]", fmt_code):
+        # počet desetinných míst určuje formát buňky („0%“, „#,##0“ => 0; „0.00“ => 2)
+        m = re.search(r"[0#]\.(0+)", fmt_code)
+        decimals = len(m.group(1)) if m else 0
+    else:
+        # General (bez formátu): celá čísla bez desetin, jinak 2 desetinná místa
+        decimals = 0 if value == int(value) else 2
+    text = f"{value:,.{decimals}f}".replace(",", "\u00a0").replace(".", ",")
+    if "%" in fmt_code:
+        text += "\u00a0%"
+    elif "Kč" in fmt_code or "CZK" in fmt_code:
+        text += "\u00a0Kč"
+    elif "€" in fmt_code or "EUR" in fmt_code:
+        text += "\u00a0€"
+    return text
+
+
+# ---- čtení .xlsx ------------------------------------------------------------
+
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - 64)
+    return n - 1
+
+
+def _text_of(el) -> str:
+    return "".join(t.text or "" for t in el.iter("{%s}t" % _NS["m"]))
+
+
+def _read_styles(z: zipfile.ZipFile):
+    """Pro každý styl buňky (index v cellXfs) vrátí (tučné, formátovací kód čísla)."""
+    try:
+        root = ET.fromstring(z.read("xl/styles.xml"))
+    except KeyError:
+        return []
+    num_fmts = {int(f.get("numFmtId")): f.get("formatCode", "")
+                for f in root.findall("m:numFmts/m:numFmt", _NS)}
+    # vestavěné formáty, které v ceníku dávají smysl
+    num_fmts.setdefault(2, "0.00")
+    num_fmts.setdefault(4, "#,##0.00")
+    num_fmts.setdefault(9, "0%")
+    num_fmts.setdefault(10, "0.00%")
+    fonts_bold = [f.find("m:b", _NS) is not None and f.find("m:b", _NS).get("val", "1") not in ("0", "false")
+                  for f in root.findall("m:fonts/m:font", _NS)]
+    styles = []
+    for xf in root.findall("m:cellXfs/m:xf", _NS):
+        font_id = int(xf.get("fontId", 0))
+        bold = fonts_bold[font_id] if font_id < len(fonts_bold) else False
+        styles.append((bold, num_fmts.get(int(xf.get("numFmtId", 0)), "")))
+    return styles
+
+
+def _first_sheet_path(z: zipfile.ZipFile) -> str:
+    wb = ET.fromstring(z.read("xl/workbook.xml"))
+    sheet = wb.find("m:sheets/m:sheet", _NS)
+    rid = sheet.get(_REL_NS)
+    rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels:
+        if rel.get("Id") == rid:
+            target = rel.get("Target").lstrip("/")
+            return target if target.startswith("xl/") else "xl/" + target
+    return "xl/worksheets/sheet1.xml"
+
+
+def read_xlsx(path: str) -> PriceTable:
+    with zipfile.ZipFile(path) as z:
+        try:
+            shared = [_text_of(si) for si in ET.fromstring(z.read("xl/sharedStrings.xml")).findall("m:si", _NS)]
+        except KeyError:
+            shared = []
+        styles = _read_styles(z)
+        sheet = ET.fromstring(z.read(_first_sheet_path(z)))
+
+    cells = {}   # (řádek, sloupec) -> (text, tučné, číslo)
+    for c in sheet.iterfind("m:sheetData/m:row/m:c", _NS):
+        m = _CELL_REF_RE.match(c.get("r", ""))
+        if not m:
+            continue
+        r, col = int(m.group(2)) - 1, _col_index(m.group(1))
+        t = c.get("t", "n")
+        bold, fmt = styles[int(c.get("s", 0))] if styles else (False, "")
+        v = c.find("m:v", _NS)
+        numeric = False
+        if t == "s":
+            text = shared[int(v.text)] if v is not None else ""
+        elif t == "inlineStr":
+            is_el = c.find("m:is", _NS)
+            text = _text_of(is_el) if is_el is not None else ""
+        elif t == "b":
+            text = "ano" if v is not None and v.text == "1" else "ne"
+        elif t in ("str", "e"):
+            text = v.text if v is not None and v.text else ""
+        else:
+            if v is None or v.text is None:
+                text = ""
+            else:
+                text, numeric = _format_number(float(v.text), fmt), True
+        cells[(r, col)] = (text, bold, numeric)
+    return _to_table(cells)
+
+
+# ---- čtení .csv -------------------------------------------------------------
+
+class _SemicolonDialect(csv.excel):
+    delimiter = ";"   # výchozí oddělovač českého Excelu
+
+
+_NUMBER_RE = re.compile(r"^-?[\d\s ]+([.,]\d+)?\s*(Kč|CZK|€|%)?$")
+
+
+def read_csv(path: str) -> PriceTable:
+    raw = Path(path).read_bytes()
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = raw.decode("cp1250", errors="replace")   # export z českého Excelu bývá cp1250
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=";,\t")
+    except csv.Error:
+        dialect = _SemicolonDialect
+    cells = {}
+    for r, row in enumerate(csv.reader(io.StringIO(text), dialect)):
+        for col, val in enumerate(row):
+            val = val.strip()
+            cells[(r, col)] = (val, r == 0, bool(val) and bool(_NUMBER_RE.match(val)))
+    return _to_table(cells)
+
+
+def _to_table(cells: dict) -> PriceTable:
+    """Z řídké mřížky buněk udělá obdélníkovou tabulku bez prázdných krajních řádků/sloupců."""
+    used = [(r, c) for (r, c), (text, _, _) in cells.items() if text]
+    if not used:
+        return PriceTable((), (), ())
+    r0, r1 = min(r for r, _ in used), max(r for r, _ in used)
+    c0, c1 = min(c for _, c in used), max(c for _, c in used)
+    empty = ("", False, False)
+    grid = [[cells.get((r, c), empty) for c in range(c0, c1 + 1)] for r in range(r0, r1 + 1)]
+    return PriceTable(
+        rows=tuple(tuple(x[0] for x in row) for row in grid),
+        bold=tuple(tuple(x[1] for x in row) for row in grid),
+        numeric=tuple(tuple(x[2] for x in row) for row in grid),
+    )
+
+
+def load_price_table(path: str) -> PriceTable:
+    if Path(path).suffix.lower() == ".xlsx":
+        return read_xlsx(path)
+    return read_csv(path)
+
+
+# ---- rozvržení --------------------------------------------------------------
+
+def layout_price_table(table: PriceTable, font_name: str, width_pt: float, max_h_pt: float) -> PriceTableLayout:
+    """
+    Šířky sloupců podle nejdelšího textu; když se tabulka nevejde do width_pt, zmenšuje
+    se písmo (až na TABLE_MIN_FONT_SIZE_PT), jinak se sloupce roztáhnou na celou šířku.
+    Řádky, které se nevejdou do max_h_pt, pokračují na další stránce.
+    """
+    ensure_fonts()
+    fs = TABLE_FONT_SIZE_PT
+    while True:
+        pad = fs * TABLE_PADDING_FACTOR
+        natural = [
+            max((pdfmetrics.stringWidth(row[c], font_name, fs) for row in table.rows), default=0.0) + 2 * pad
+            for c in range(table.n_cols)
+        ]
+        row_h = fs * TABLE_ROW_HEIGHT_FACTOR
+        fits_h = len(table.rows) * row_h <= max_h_pt
+        if (sum(natural) <= width_pt and fits_h) or fs <= TABLE_MIN_FONT_SIZE_PT:
+            break
+        fs = max(TABLE_MIN_FONT_SIZE_PT, fs - 0.5)
+
+    total = sum(natural) or 1.0
+    if total < width_pt:
+        # roztáhnout – navíc prostor dostanou hlavně textové (široké) sloupce
+        col_widths = [w + (width_pt - total) * w / total for w in natural]
+    else:
+        col_widths = [w * width_pt / total for w in natural]
+
+    per_page = max(1, int(max_h_pt // row_h))
+    pages = tuple((i, min(i + per_page, len(table.rows))) for i in range(0, len(table.rows), per_page)) or ((0, 0),)
+    return PriceTableLayout(fs, row_h, pad, tuple(col_widths), pages)
+
+
+def fit_cell_text(text: str, font_name: str, fs: float, max_w: float) -> str:
+    """Zkrátí text „…“, když se nevejde do buňky (jen při minimálním písmu)."""
+    ensure_fonts()
+    if pdfmetrics.stringWidth(text, font_name, fs) <= max_w:
+        return text
+    while text and pdfmetrics.stringWidth(text + "…", font_name, fs) > max_w:
+        text = text[:-1]
+    return text + "…"
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Popis nabídky jako data (JSON/TOML) – pro dávkové generování bez GUI.
+
+Příklad (TOML):
+    title = "Cenová nabídka simulátoru"
+    info = ["Jiří Doležal", "Nad Hrádkem 284", "25226 Kosoř"]
+    date_style = "CZ"           # EN | CZ
+    use_today = true
+    price_image = "cenik.png"   # volitelné; i .xlsx/.csv (vektorová tabulka)
+    segments = ["pool/base.png", "pool/wheel.png"]   # i .pdf/.svg (vkládají se vektorově)
+    # output = "nabidka.pdf"    # volitelné, jinak podle jména specifikace
+    # max_size_mb = 7           # volitelné – export „max. velikost“
+    # linearize = true          # volitelné – „fast web view“ (vyžaduje pikepdf/qpdf)
+    # page_images = true        # volitelné – i obrázky stránek (PNG/JPEG/WebP) do „<jméno>-stranky/“
+    # layout = "siroke.toml"    # volitelné – layout ze souboru (pdf.layout), nebo tabulka [layout]
+
+    # volitelné – víc titulních stran najednou („<jméno>-EN.pdf“, „<jméno>-CZ.pdf“);
+    # ostatní stránky se renderují jen jednou. Chybějící klíče se berou shora.
+    [[cover_variants]]
+    date_style = "EN"
+    [[cover_variants]]
+    date_style = "CZ"
+    title = "Cenová nabídka"
+
+Relativní cesty se berou vůči složce se specifikací.
+"""
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, List
+
+from pdf.layout import DEFAULT_LAYOUT, LayoutProfile, load_layout, load_toml
+
+SPEC_SUFFIXES = (".json", ".toml")
+
+# klíč => klíče, které s ním export neumí splnit (varianty i obrázky stránek jdou přes
+# vlastní cestu exportu bez hledání velikosti a bez linearizace)
+CONFLICTING_KEYS = {
+    "cover_variants": ("linearize", "page_images", "max_size_mb"),
+    "page_images": ("linearize", "max_size_mb"),
+    "max_size_mb": ("linearize",),
+}
+
+
+@dataclass(frozen=True)
+class QuoteSpec:
+    segments: List[str]
+    title: str = ""
+    info: str = ""
+    date_style: str = "EN"
+    use_today: bool = True
+    price_image: str | None = None
+    output: str | None = None
+    max_size_mb: float | None = None
+    linearize: bool = False
+    page_images: bool = False
+    cover_variants: List[dict] = field(default_factory=list)
+    layout: LayoutProfile = DEFAULT_LAYOUT
+    name: str = field(default="nabidka", compare=False)
+
+    @classmethod
+    def from_dict(cls, data: dict, base_dir: Path | None = None, name: str = "nabidka") -> "QuoteSpec":
+        base_dir = Path(base_dir or ".")
+
+        def resolve(p):
+            if p is None:
+                return None
+            p = Path(p).expanduser()
+            return str(p if p.is_absolute() else (base_dir / p))
+
+        info = data.get("info", "")
+        if isinstance(info, (list, tuple)):
+            info = "\n".join(str(x) for x in info)
+        date_style = str(data.get("date_style", "EN")).upper()
+        if date_style not in ("EN", "CZ"):
+            raise ValueError(f"{name}: date_style musí být EN nebo CZ, ne {date_style!r}")
+        segments = data.get("segments", [])
+        if not isinstance(segments, list):
+            raise ValueError(f"{name}: segments musí být seznam cest")
+        max_size = data.get("max_size_mb")
+        variants = data.get("cover_variants", [])
+        if not isinstance(variants, list) or not all(isinstance(v, dict) for v in variants):
+            raise ValueError(f"{name}: cover_variants musí být seznam tabulek")
+        for v in variants:
+            if str(v.get("date_style", date_style)).upper() not in ("EN", "CZ"):
+                raise ValueError(f"{name}: date_style varianty musí být EN nebo CZ")
+        for key, others in CONFLICTING_KEYS.items():
+            clash = [k for k in others if data.get(k)]
+            if data.get(key) and clash:
+                raise ValueError(f"{name}: {key} nejde kombinovat s: {', '.join(clash)}")
+        layout = data.get("layout")
+        try:
+            if isinstance(layout, dict):
+                layout = LayoutProfile.from_dict(layout, name=name)
+            elif layout is not None:
+                layout = load_layout(resolve(layout))
+        except (OSError, ValueError) as e:
+            raise ValueError(f"{name}: layout: {e}") from e
+        return cls(
+            segments=[resolve(p) for p in segments],
+            title=str(data.get("title", "")),
+            info=str(info),
+            date_style=date_style,
+            use_today=bool(data.get("use_today", True)),
+            price_image=resolve(data.get("price_image")),
+            output=data.get("output"),
+            max_size_mb=float(max_size) if max_size is not None else None,
+            linearize=bool(data.get("linearize", False)),
+            page_images=bool(data.get("page_images", False)),
+            cover_variants=[dict(v) for v in variants],
+            layout=layout or DEFAULT_LAYOUT,
+            name=name,
+        )
+
+    def export_kwargs(self) -> dict:
+        """Parametry pro export_pdf / export_pdf_max_size (stejné jako z GUI)."""
+        return dict(
+            order_paths=list(self.segments),
+            margin_cm=0.0,
+            gap_cm=0.0,
+            title_text=self.title,
+            info_lines_text=self.info,
+            date_style=self.date_style,
+            use_today=self.use_today,
+            price_image_path=self.price_image,
+            layout=self.layout,
+        )
+
+    def cover_variant_list(self, out: str | Path) -> list:
+        """CoverVariant pro každou položku cover_variants (výstup „<jméno>-<EN|CZ>.pdf“ nebo output)."""
+        from pdf.cover_variants import CoverVariant, variant_path
+
+        result, labels = [], set()
+        for i, v in enumerate(self.cover_variants):
+            ds = str(v.get("date_style", self.date_style)).upper()
+            info = v.get("info", self.info)
+            if isinstance(info, (list, tuple)):
+                info = "\n".join(str(x) for x in info)
+            if v.get("output"):
+                path = Path(out).with_name(str(v["output"]))
+            else:
+                label = ds if ds not in labels else f"{ds}{i + 1}"
+                labels.add(label)
+                path = variant_path(out, label)
+            result.append(CoverVariant(str(path), str(v.get("title", self.title)), str(info), ds,
+                                       bool(v.get("use_today", self.use_today))))
+        return result
+
+
+def load_spec(path: str | Path) -> QuoteSpec:
+    path = Path(path)
+    if path.suffix.lower() == ".toml":
+        data = load_toml(path)
+    elif path.suffix.lower() == ".json":
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    else:
+        raise ValueError(f"Neznámý formát specifikace: {path.name} (očekávám .json/.toml)")
+    return QuoteSpec.from_dict(data, base_dir=path.parent, name=path.stem)
+
+
+def find_spec_files(path: str | Path) -> List[Path]:
+    """Soubor => [soubor]; složka => všechny *.json/*.toml v ní (seřazené)."""
+    path = Path(path)
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if p.suffix.lower() in SPEC_SUFFIXES)
+    return [path]
+
+
+def export_spec(spec: QuoteSpec, out: str | BinaryIO, workers: int | None = 1, streaming: bool = True,
+                memory_limit_mb: float | None = None, cache: bool = False):
+    """
+    Vyrenderuje nabídku stejnou cestou jako GUI (export_pdf). Vrací SizeBudgetResult
+    pro specifikace s max_size_mb, jinak None. Výchozí je průběžný zápis (streaming),
+    aby dávky a služba držely v paměti jen jednu stránku.
+    page_images: obrázky stránek se zapíšou vedle PDF (jen když je out cesta).
+    cover_variants: místo out se zapíšou varianty vedle něj (jen když je out cesta).
+    memory_limit_mb: úsporný režim běžného exportu (viz pdf.low_memory); s max_size_mb
+    nejde (hledání velikosti drží všechny zdroje v paměti) => ValueError.
+    Nesplnitelné kombinace klíčů odmítá už QuoteSpec.from_dict (CONFLICTING_KEYS).
+    cache: cache stránek a hotových PDF (PAGE_CACHE_DIR, EXPORT_CACHE_DIR) – jen na požádání.
+    """
+    from pdf.export import export_pdf
+
+    if spec.cover_variants and not hasattr(out, "write"):
+        from pdf.cover_variants import export_pdf_variants
+        export_pdf_variants(spec.cover_variant_list(out), list(spec.segments), spec.price_image, workers=workers,
+                            layout=spec.layout, cache=cache, export_cache=cache)
+        return None
+    if spec.page_images and not hasattr(out, "write"):
+        from pdf.multi_export import export_pdf_with_images, page_images_dir
+        export_pdf_with_images(out, page_images_dir(out), **spec.export_kwargs(), workers=workers)
+        return None
+    if spec.max_size_mb:
+        if memory_limit_mb:
+            raise ValueError(f"{spec.name}: max_size_mb nejde kombinovat s úsporným režimem (memory_limit_mb)")
+        from pdf.size_budget import export_pdf_max_size
+        return export_pdf_max_size(out, **spec.export_kwargs(),
+                                   max_bytes=int(spec.max_size_mb * 1024 * 1024))
+    export_pdf(out, **spec.export_kwargs(), workers=workers, streaming=streaming, linearize=spec.linearize,
+               memory_limit_mb=memory_limit_mb, cache=cache, export_cache=cache)
+    return None
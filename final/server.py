@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Volitelná lokální HTTP služba pro render nabídek (pro CRM).
+
+    python server.py --port 8765 --workers 4 --max-queue 32
+
+Endpointy:
+    POST /quotes            tělo = JSON specifikace (viz quote_spec.py)
+                            -> 202 {"job_id": ...}; s ?wait=1 rovnou vrátí PDF
+    GET  /jobs/<id>         stav úlohy (queued | running | done | error)
+    GET  /jobs/<id>/pdf     hotové PDF (409, pokud ještě není)
+    GET  /health            obsazenost fronty
+
+Render běží v poolu „teplých“ procesů – fonty jsou zaregistrované a moduly
+naimportované předem, takže požadavek neplatí start ani registraci fontu.
+Když je fronta plná (--max-queue), služba odpoví 503 + Retry-After; stejně tak, když
+render proces spadne – rozbitý pool se nahradí novým a klient to zkusí znovu.
+Cesty v JSON (segments, price_image, layout) musí ležet pod kořenem (--root,
+SERVER_ROOT_DIR, jinak SEGMENT_POOL_DIR), jinak 403; relativní se berou vůči němu.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+# Jak dlouho držet hotová PDF pro vyzvednutí
+RESULT_TTL_S = 15 * 60
+# Max. velikost těla požadavku (JSON specifikace)
+MAX_BODY_BYTES = 1024 * 1024
+
+
+def _warm_worker():
+    """Inicializace procesu poolu: import exportu + registrace fontu předem."""
+    from PIL import Image
+    import config
+    import pdf.export  # noqa: F401  (import reportlabu, layoutu a fontů)
+
+    Image.init()
+    config.try_register_font()   # registrace fontu předem (jinak až při prvním měření textu)
+
+
+def _noop():
+    return None
+
+
+def server_root(root: str | Path | None = None) -> Path:
+    """Kořen pro cesty ze specifikací: root, jinak SERVER_ROOT_DIR, jinak SEGMENT_POOL_DIR."""
+    from config import SEGMENT_POOL_DIR, SERVER_ROOT_DIR
+
+    return Path(root or SERVER_ROOT_DIR or SEGMENT_POOL_DIR).expanduser().resolve()
+
+
+def check_spec_paths(spec_data: dict, root: Path):
+    """
+    Cesty ve specifikaci (segments, price_image, layout jako soubor) musí po vyřešení
+    (.., symlinky) ležet pod root. Jinak PermissionError; nesmyslné hodnoty => ValueError.
+    """
+    segments = spec_data.get("segments", [])
+    if not isinstance(segments, list):
+        raise ValueError("segments musí být seznam cest")
+    paths = list(segments)
+    for key in ("price_image", "layout"):
+        value = spec_data.get(key)
+        if value is not None and not isinstance(value, dict):
+            paths.append(value)
+    for p in paths:
+        if not isinstance(p, str):
+            raise ValueError(f"cesta musí být text, ne {p!r}")
+        # absolutní cesta root / p přebije => stejná kontrola pro relativní i absolutní
+        if not (root / Path(p).expanduser()).resolve().is_relative_to(root):
+            raise PermissionError(f"cesta mimo kořen služby: {p}")
+
+
+def _render_job(spec_data: dict, root: str) -> bytes:
+    from quote_spec import QuoteSpec, export_spec
+
+    spec = QuoteSpec.from_dict(spec_data, base_dir=Path(root), name="http")
+    buf = io.BytesIO()
+    export_spec(spec, buf, workers=1)
+    return buf.getvalue()
+
+
+class _Job:
+    __slots__ = ("id", "future", "created", "finished")
+
+    def __init__(self, job_id, future):
+        self.id = job_id
+        self.future = future
+        self.created = time.time()
+        self.finished = None
+
+    @property
+    def status(self) -> str:
+        f = self.future
+        if not f.done():
+            return "running" if f.running() else "queued"
+        return "error" if f.exception() is not None else "done"
+
+
+class RenderService:
+    """Fronta úloh nad procesním poolem s omezenou kapacitou (backpressure)."""
+
+    def __init__(self, workers: int, max_queue: int, root: str | Path | None = None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.root = server_root(root)
+        self._pool = self._new_pool()
+        self._jobs: dict[str, _Job] = {}
+        self._lock = threading.Lock()
+        # nahřej všechny procesy hned při startu, ne až na prvním požadavku
+        for f in [self._pool.submit(_noop) for _ in range(workers)]:
+            f.result()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+
+    def _replace_broken(self, pool: ProcessPoolExecutor):
+        """Spadlý proces rozbije celý pool – nahradí ho novým (jen jednou, pod self._lock)."""
+        if self._pool is pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+
+    def _active(self) -> int:
+        return sum(1 for j in self._jobs.values() if not j.future.done())
+
+    def _expire(self):
+        now = time.time()
+        for job_id in [k for k, j in self._jobs.items()
+                       if j.future.done() and now - (j.finished or now) > RESULT_TTL_S]:
+            del self._jobs[job_id]
+
+    def submit(self, spec_data: dict) -> _Job | None:
+        """
+        Zařadí úlohu; None = fronta je plná. Cesty mimo kořen => PermissionError (check_spec_paths),
+        rozbitý pool => BrokenProcessPool (pool se mezitím nahradí, další pokus už projde).
+        """
+        check_spec_paths(spec_data, self.root)
+        with self._lock:
+            self._expire()
+            if self._active() >= self.max_queue:
+                return None
+            pool = self._pool
+            try:
+                future = pool.submit(_render_job, spec_data, str(self.root))
+            except BrokenProcessPool:
+                self._replace_broken(pool)
+                raise
+            job = _Job(uuid.uuid4().hex, future)
+            self._jobs[job.id] = job
+
+        def _done(f, job=job, pool=pool):
+            job.finished = time.time()
+            if not f.cancelled() and isinstance(f.exception(), BrokenProcessPool):
+                with self._lock:
+                    self._replace_broken(pool)
+
+        job.future.add_done_callback(_done)
+        return job
+
+    def get(self, job_id: str) -> _Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"active": self._active(), "max_queue": self.max_queue,
+                    "workers": self.workers, "jobs": len(self._jobs)}
+
+    def shutdown(self):
+        self._pool.shutdown(cancel_futures=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: RenderService = None  # nastaví make_server
+
+    def _send_json(self, code: int, payload: dict, headers: dict | None = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_pdf(self, data: bytes, job_id: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Content-Disposition", f'inline; filename="nabidka_{job_id[:8]}.pdf"')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_result(self, job: _Job):
+        exc = job.future.exception()
+        if isinstance(exc, BrokenProcessPool):
+            return self._send_json(503, {"job_id": job.id, "status": "error",
+                                         "error": "render proces spadl, zkuste znovu"}, {"Retry-After": "1"})
+        if exc is not None:
+            self._send_json(500, {"job_id": job.id, "status": "error", "error": str(exc)})
+        else:
+            self._send_pdf(job.future.result(), job.id)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/quotes":
+            return self._send_json(404, {"error": "neznámý endpoint"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_BODY_BYTES:
+            return self._send_json(413 if length > MAX_BODY_BYTES else 400, {"error": "chybí nebo příliš velké tělo"})
+        try:
+            spec_data = json.loads(self.rfile.read(length).decode("utf-8"))
+            if not isinstance(spec_data, dict):
+                raise ValueError("specifikace musí být JSON objekt")
+        except ValueError as e:
+            return self._send_json(400, {"error": f"neplatný JSON: {e}"})
+
+        try:
+            job = self.service.submit(spec_data)
+        except PermissionError as e:
+            return self._send_json(403, {"error": str(e)})
+        except ValueError as e:
+            return self._send_json(400, {"error": str(e)})
+        except BrokenProcessPool:
+            return self._send_json(503, {"error": "render procesy se restartují, zkuste později"},
+                                   {"Retry-After": "1"})
+        if job is None:
+            return self._send_json(503, {"error": "fronta je plná, zkuste později"}, {"Retry-After": "5"})
+
+        if parse_qs(url.query).get("wait", ["0"])[0] not in ("0", "", "false"):
+            job.future.exception()  # počkej na dokončení
+            return self._send_result(job)
+        self._send_json(202, {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"},
+                        {"Location": f"/jobs/{job.id}"})
+
+    def do_GET(self):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        if parts == ["health"]:
+            return self._send_json(200, self.service.stats())
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.service.get(parts[1])
+            if job is None:
+                return self._send_json(404, {"error": "neznámá úloha"})
+            if len(parts) == 2:
+                payload = {"job_id": job.id, "status": job.status}
+                if job.status == "done":
+                    payload["pdf_url"] = f"/jobs/{job.id}/pdf"
+                elif job.status == "error":
+                    payload["error"] = str(job.future.exception())
+                return self._send_json(200, payload)
+            if parts[2] == "pdf":
+                if not job.future.done():
+                    return self._send_json(409, {"job_id": job.id, "status": job.status}, {"Retry-After": "1"})
+                return self._send_result(job)
+        self._send_json(404, {"error": "neznámý endpoint"})
+
+
+def make_server(host: str, port: int, workers: int, max_queue: int,
+                root: str | Path | None = None) -> ThreadingHTTPServer:
+    handler = type("Handler", (_Handler,), {"service": RenderService(workers, max_queue, root)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Lokální HTTP služba pro render cenových nabídek.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, default=max(1, (multiprocessing.cpu_count() or 2) - 1),
+                    help="počet render procesů")
+    ap.add_argument("--max-queue", type=int, default=32,
+                    help="max. rozpracovaných úloh; nad limit 503 + Retry-After")
+    ap.add_argument("--root", metavar="SLOZKA",
+                    help="kořen cest ve specifikacích (výchozí SERVER_ROOT_DIR, jinak SEGMENT_POOL_DIR)")
+    args = ap.parse_args(argv)
+
+    httpd = make_server(args.host, args.port, args.workers, args.max_queue, args.root)
+    service = httpd.RequestHandlerClass.service
+    print(f"Render služba běží na http://{args.host}:{args.port} ({args.workers} procesů, fronta {args.max_queue}, "
+          f"kořen {service.root})")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        httpd.RequestHandlerClass.service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Profil studeného startu GUI (app.py --startup-profile).
+
+Měří importy stejně jako `python -X importtime` (vlastní čas / kumulativně v µs,
+odsazení podle zanoření), jen přes hák v sys.meta_path – funguje tedy i v PyInstaller
+bundlu, kde -X nejde předat. Po prvním vykreslení okna vypíše:
+- čas do prvního okna (od startu app.py) proti STARTUP_BUDGET_MS,
+- moduly ze STARTUP_DEFERRED_MODULES, které se načetly před prvním oknem (nesmí),
+- nejdražší importy a celý výpis ve formátu -X importtime.
+Výsledek je návratový kód (0 = v rozpočtu), aby šel hlídat v buildu.
+"""
+import importlib.abc
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Tuple
+
+
+@dataclass(frozen=True)
+class ImportRecord:
+    name: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Obal loaderu: změří exec_module, ostatní atributy předává původnímu loaderu."""
+
+    def __init__(self, loader, timer: "ImportTimer", name: str):
+        self._loader = loader
+        self._timer = timer
+        self._name = name
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._timer._enter()
+        t0 = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer._leave(self._name, time.perf_counter() - t0)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """Hák na začátku sys.meta_path: spec hledají ostatní findery, loader se jen obalí."""
+
+    def __init__(self):
+        self.records: List[ImportRecord] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def install(self) -> "ImportTimer":
+        sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = _TimedLoader(spec.loader, self, fullname)
+                    return spec
+            return None
+        finally:
+            self._local.finding = False
+
+    def _enter(self):
+        stack = self._local.__dict__.setdefault("children", [])
+        stack.append(0.0)
+
+    def _leave(self, name: str, elapsed: float):
+        stack = self._local.children
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        with self._lock:
+            self.records.append(ImportRecord(name, len(stack), int((elapsed - children) * 1e6), int(elapsed * 1e6)))
+
+    def importtime_lines(self) -> List[str]:
+        """Výpis jako `python -X importtime` (pořadí dokončení, odsazení podle zanoření)."""
+        lines = ["import time: self [us] | cumulative | imported package"]
+        for r in self.records:
+            lines.append(f"import time: {r.self_us:>9} | {r.cumulative_us:>10} | {'  ' * r.depth}{r.name}")
+        return lines
+
+    def slowest(self, n: int = 15) -> List[ImportRecord]:
+        """Nejdražší importy nejvyšší úrovně i vnořené, podle kumulativního času."""
+        return sorted(self.records, key=lambda r: r.cumulative_us, reverse=True)[:n]
+
+
+def check_startup(elapsed_s: float, timer: ImportTimer | None, budget_ms: float,
+                  deferred: Tuple[str, ...]) -> Tuple[bool, str]:
+    """(v rozpočtu?, zpráva) – čas do prvního okna a moduly, které se měly načíst až později."""
+    elapsed_ms = elapsed_s * 1000.0
+    loaded = [m for m in deferred if m in sys.modules]
+    ok = elapsed_ms <= budget_ms and not loaded
+    lines = [f"Start: první okno za {elapsed_ms:.0f} ms (rozpočet {budget_ms:.0f} ms) – "
+             + ("OK" if ok else "PŘEKROČENO")]
+    if loaded:
+        lines.append("Načteno před prvním oknem (má být až při použití): " + ", ".join(loaded))
+    if timer is not None:
+        total_us = sum(r.cumulative_us for r in timer.records if r.depth == 0)
+        lines.append(f"Importy: {len(timer.records)} modulů, {total_us / 1000:.0f} ms; nejdražší:")
+        for r in timer.slowest():
+            lines.append(f"  {r.cumulative_us / 1000:8.1f} ms  {r.name}")
+    return ok, "\n".join(lines)
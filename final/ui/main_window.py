@@ -3,7 +3,7 @@ from pathlib import Path
 from typing import List
 from datetime import date
 
-from PySide6.QtCore import Qt, QTimer, Slot
+from PySide6.QtCore import Qt, QTimer, Signal, Slot
 from PySide6.QtGui import QPixmap, QImage, QAction
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
@@ -11,18 +11,24 @@ from PySide6.QtWidgets import (
     QFileDialog, QMessageBox, QLineEdit, QTextEdit, QComboBox, QCheckBox, QGroupBox,
     QSplitter
 )
-from PIL.ImageQt import ImageQt
 
 from config import (
     APP_TITLE, SEGMENT_POOL_DIR,
     MARGIN_CM_DEFAULT, GAP_CM_DEFAULT,
-    A4_W_PT, A4_H_PT, PRICE_IMAGE_START_DIR, DEFAULT_EXPORT_DIR
+    A4_W_PT, A4_H_PT, PRICE_IMAGE_START_DIR, DEFAULT_EXPORT_DIR,
+    SPECULATIVE_EXPORT, SPECULATIVE_EXPORT_DELAY_MS, SPECULATIVE_EXPORT_MAX_MB,
 )
-from widgets.clickable_image import ClickableImage
 from workers.preview_worker import PreviewWorker, PreviewEmitter
-from pdf.export import export_pdf
+from workers.speculative_export import SpeculativeEmitter, SpeculativeExportWorker, speculative_pool
+from pdf.layout import DEFAULT_LAYOUT, LayoutProfile, load_layout
+
+# PDF stack (reportlab, pdf.export…), PIL/ImageQt a galerie se importují až při použití
+# (náhled, export, načtení segmentů) – okno se tak ukáže bez nich; viz app.py --startup-profile.
+
 
 class MainWindow(QMainWindow):
+    first_painted = Signal()   # první vykreslení okna (konec studeného startu)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle(APP_TITLE)
@@ -30,12 +36,24 @@ class MainWindow(QMainWindow):
 
         self.price_image_path: str = ""
         self.preview_pages = []
+        self.layout_profile: LayoutProfile = DEFAULT_LAYOUT
 
         self._preview_timer = QTimer(self)
         self._preview_timer.setSingleShot(True)
         self._preview_timer.setInterval(140)
         self._preview_timer.timeout.connect(self.build_preview_async)
 
+        # Spekulativní export: (klíč nabídky, hotové PDF) – platí, jen dokud se klíč nezmění
+        self._spec_result: tuple[str, bytes] | None = None
+        self._spec_running = False
+        self._spec_timer = QTimer(self)
+        self._spec_timer.setSingleShot(True)
+        self._spec_timer.setInterval(SPECULATIVE_EXPORT_DELAY_MS)
+        self._spec_timer.timeout.connect(self.start_speculative_export)
+        self._spec_pool = speculative_pool(self)
+        self._spec_emitter = SpeculativeEmitter()
+        self._spec_emitter.finished.connect(self.accept_speculative_export)
+
         # --- Horní panel (bez okrajů/mezery) ---
         top_bar = QWidget(); lay_top = QHBoxLayout(top_bar)
         btn_load = QPushButton("Načíst složku se segmenty (PNG)")
@@ -64,7 +82,7 @@ class MainWindow(QMainWindow):
         left_box = QWidget(); left_lay = QVBoxLayout(left_box); left_lay.addWidget(QLabel("Galerie segmentů")); left_lay.addWidget(self.gallery_scroll)
 
         mid_box = QWidget(); lay_mid = QVBoxLayout(mid_box)
-        lay_mid.addWidget(QLabel("Vybrané (pořadí) – 4/stranu"))
+        self.lbl_order = QLabel(); lay_mid.addWidget(self.lbl_order)
         self.order_list = QListWidget(); lay_mid.addWidget(self.order_list)
         row_btns = QHBoxLayout(); btn_up = QPushButton("Nahoru"); btn_dn = QPushButton("Dolů"); btn_rm = QPushButton("Odebrat")
         row_btns.addWidget(btn_up); row_btns.addWidget(btn_dn); row_btns.addWidget(btn_rm); lay_mid.addLayout(row_btns)
@@ -83,6 +101,7 @@ class MainWindow(QMainWindow):
         central = QWidget(); v = QVBoxLayout(central); v.addWidget(top_bar); v.addWidget(cover_box); v.addWidget(splitter); self.setCentralWidget(central)
 
         self._make_menu()
+        self._update_layout_label()
 
         # Signály
         btn_load.clicked.connect(self.load_segments_dialog)
@@ -102,8 +121,16 @@ class MainWindow(QMainWindow):
         self._emitter = PreviewEmitter()
         self._emitter.pages_ready.connect(self.accept_preview_pages)
 
-        if SEGMENT_POOL_DIR.exists():
-            self.load_segments_dir(SEGMENT_POOL_DIR)
+        # pool segmentů se načte až po prvním vykreslení okna (paintEvent)
+        self._first_paint_done = False
+
+    def paintEvent(self, e):
+        super().paintEvent(e)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            self.first_painted.emit()
+            if SEGMENT_POOL_DIR.exists():
+                QTimer.singleShot(0, lambda: self.load_segments_dir(SEGMENT_POOL_DIR))
 
     # ---- Menu ----
     def _make_menu(self):
@@ -111,26 +138,38 @@ class MainWindow(QMainWindow):
         act_open = QAction("Načíst složku…", self); act_open.triggered.connect(self.load_segments_dialog)
         act_price = QAction("Načíst ceníkový obrázek…", self); act_price.triggered.connect(self.load_price_image)
         act_pdf = QAction("Export PDF…", self); act_pdf.triggered.connect(self.export_pdf)
-        m.addAction(act_open); m.addAction(act_price); m.addSeparator(); m.addAction(act_pdf)
+        act_pdf_max = QAction("Export PDF (max. velikost pro e-mail)…", self); act_pdf_max.triggered.connect(self.export_pdf_max_size)
+        act_pdf_web = QAction("Export PDF (rychlé zobrazení na webu)…", self); act_pdf_web.triggered.connect(self.export_pdf_linearized)
+        act_pdf_img = QAction("Export PDF + obrázky stránek…", self); act_pdf_img.triggered.connect(self.export_pdf_with_images)
+        act_pdf_var = QAction("Export PDF (EN + CZ titulní strana)…", self); act_pdf_var.triggered.connect(self.export_pdf_date_variants)
+        act_merge = QAction("Hromadná korespondence (CSV příjemců)…", self); act_merge.triggered.connect(self.export_mail_merge)
+        act_draft = QAction("Rychlý koncept PDF (z náhledu)…", self); act_draft.triggered.connect(self.export_draft_pdf)
+        act_layout = QAction("Načíst layout…", self); act_layout.triggered.connect(self.load_layout_dialog)
+        act_layout_def = QAction("Výchozí layout", self); act_layout_def.triggered.connect(lambda: self.set_layout(DEFAULT_LAYOUT))
+        m.addAction(act_open); m.addAction(act_price); m.addAction(act_layout); m.addAction(act_layout_def); m.addSeparator(); m.addAction(act_pdf); m.addAction(act_pdf_max); m.addAction(act_pdf_web); m.addAction(act_pdf_img); m.addAction(act_pdf_var); m.addAction(act_merge)
+        m.addSeparator(); m.addAction(act_draft)
 
     # ---- Galerie ----
     def load_segments_dialog(self):
-        d = QFileDialog.getExistingDirectory(self, "Vyber složku se segmenty (PNG)")
+        d = QFileDialog.getExistingDirectory(self, "Vyber složku se segmenty (PNG/PDF/SVG)")
         if d: self.load_segments_dir(Path(d))
 
     def load_segments_dir(self, directory: Path):
+        from pdf.vector import SEGMENT_SUFFIXES
+        from widgets.clickable_image import ClickableImage
+
         for w in self._items: w.setParent(None)
         self._items.clear(); self._item_by_path.clear(); self.order_list.clear()
 
         if not directory.exists() or not directory.is_dir():
             QMessageBox.critical(self, "Chyba", f"Adresář neexistuje:\n{directory}"); return
 
-        pngs = sorted(p for p in directory.iterdir() if p.suffix.lower() == ".png")
-        if not pngs:
-            QMessageBox.information(self, "Info", f"Žádné PNG v:\n{directory}"); return
+        segments = sorted(p for p in directory.iterdir() if p.suffix.lower() in SEGMENT_SUFFIXES)
+        if not segments:
+            QMessageBox.information(self, "Info", f"Žádné segmenty (PNG/PDF/SVG) v:\n{directory}"); return
 
         tgt = self._current_target_width()
-        for p in pngs:
+        for p in segments:
             try:
                 item = ClickableImage(p, tgt)
             except Exception as e:
@@ -217,6 +256,9 @@ class MainWindow(QMainWindow):
 
     # ---- Náhled (debounce + worker) ----
     def schedule_preview(self):
+        # vstupy se mění => připravené PDF neplatí
+        self._spec_timer.stop()
+        self._spec_result = None
         self._preview_timer.start()
 
     def _order_paths(self) -> List[str]:
@@ -233,7 +275,8 @@ class MainWindow(QMainWindow):
             date_style=self.combo_date.currentText(),
             use_today=self.chk_today.isChecked(),
             emitter=self._emitter,
-            width_px=1100
+            width_px=1100,
+            layout=self.layout_profile,
         )
         from PySide6.QtCore import QThreadPool
         QThreadPool.globalInstance().start(worker)
@@ -247,12 +290,46 @@ class MainWindow(QMainWindow):
         self.page_combo.setCurrentIndex(0)
         self.page_combo.blockSignals(False)
         self.show_preview_page()
+        if SPECULATIVE_EXPORT:
+            self._spec_timer.start()   # náhled je hotový – po chvíli klidu připravit PDF
+
+    # ---- Spekulativní export (na pozadí, nízká priorita) ----
+    def start_speculative_export(self):
+        from pdf.export import quote_key
+        kwargs = self._export_kwargs()
+        key = quote_key(**kwargs)
+        if self._spec_result is not None and self._spec_result[0] == key:
+            return
+        if self._spec_running:
+            return   # po doběhnutí se výsledek porovná s aktuálním klíčem
+        self._spec_running = True
+        self._spec_pool.start(SpeculativeExportWorker(key, kwargs, self._spec_emitter))
+
+    @Slot(str, object)
+    def accept_speculative_export(self, key: str, data):
+        from pdf.export import quote_key
+        self._spec_running = False
+        current = quote_key(**self._export_kwargs())
+        if key != current:
+            if SPECULATIVE_EXPORT:
+                self._spec_timer.start()   # mezitím se něco změnilo – zkusit znovu po klidu
+            return
+        if data is not None and len(data) <= SPECULATIVE_EXPORT_MAX_MB * 1024 * 1024:
+            self._spec_result = (key, data)
+
+    def _take_speculative_pdf(self) -> bytes | None:
+        """Hotové PDF z pozadí, pokud odpovídá aktuálním vstupům (včetně změn souborů na disku)."""
+        if self._spec_result is None:
+            return None
+        from pdf.export import quote_key
+        key, data = self._spec_result
+        return data if key == quote_key(**self._export_kwargs()) else None
 
     def show_preview_page(self):
         if not self.preview_pages:
             self.preview_label.clear(); return
         idx = max(0, self.page_combo.currentIndex())
-        from PIL import Image
+        from PIL.ImageQt import ImageQt
         pil_img = self.preview_pages[idx]
         qimg = QImage(ImageQt(pil_img.convert("RGBA")))
         pm = QPixmap.fromImage(qimg)
@@ -269,16 +346,36 @@ class MainWindow(QMainWindow):
         start_dir = str(PRICE_IMAGE_START_DIR) if PRICE_IMAGE_START_DIR and PRICE_IMAGE_START_DIR.exists() else ""
         p, _ = QFileDialog.getOpenFileName(
             self,
-            "Vyber obrázek s cenovou tabulkou",
+            "Vyber obrázek nebo tabulku s ceníkem",
             start_dir,  # <- startovní adresář
-            "Obrázky (*.png *.jpg *.jpeg *.webp *.tif *.tiff)"
+            "Ceník (*.png *.jpg *.jpeg *.webp *.tif *.tiff *.xlsx *.csv);;"
+            "Obrázky (*.png *.jpg *.jpeg *.webp *.tif *.tiff);;Tabulky (*.xlsx *.csv)"
         )
         if p:
             self.price_image_path = p
             self.schedule_preview()
 
+    # ---- Layout ----
+    def load_layout_dialog(self):
+        p, _ = QFileDialog.getOpenFileName(self, "Vyber layout", "", "Layout (*.toml *.json)")
+        if not p:
+            return
+        try:
+            self.set_layout(load_layout(p))
+        except Exception as e:
+            QMessageBox.critical(self, "Chyba", f"Nepodařilo se načíst layout:\n{e}")
+
+    def set_layout(self, layout: LayoutProfile):
+        """Nový layout platí hned – náhled i exporty (layout je součástí klíče nabídky)."""
+        self.layout_profile = layout
+        self._update_layout_label()
+        self.schedule_preview()
+
+    def _update_layout_label(self):
+        self.lbl_order.setText(f"Vybrané (pořadí) – {self.layout_profile.segments_per_page}/stranu, layout: {self.layout_profile.name}")
+
     # ---- PDF ----
-    def export_pdf(self):
+    def _ask_export_path(self) -> str:
         # navrhni název v DEFAULT_EXPORT_DIR
         try:
             DEFAULT_EXPORT_DIR.mkdir(parents=True, exist_ok=True)
@@ -289,21 +386,119 @@ class MainWindow(QMainWindow):
         out, _ = QFileDialog.getSaveFileName(
             self, "Uložit PDF", str(suggested), "PDF (*.pdf)"
         )
+        return out
+
+    def _export_kwargs(self) -> dict:
+        return dict(
+            order_paths=self._order_paths(),
+            margin_cm=0.0,
+            gap_cm=0.0,
+            title_text=self.edit_title.text(),
+            info_lines_text=self.edit_info.toPlainText(),
+            date_style=self.combo_date.currentText(),
+            use_today=self.chk_today.isChecked(),
+            price_image_path=self.price_image_path or None,
+            layout=self.layout_profile,
+        )
+
+    def export_pdf(self):
+        out = self._ask_export_path()
         if not out:
             return
         try:
-            export_pdf(
-                out_path=out,
-                order_paths=self._order_paths(),
-                margin_cm=0.0,
-                gap_cm=0.0,
-                title_text=self.edit_title.text(),
-                info_lines_text=self.edit_info.toPlainText(),
-                date_style=self.combo_date.currentText(),
-                use_today=self.chk_today.isChecked(),
-                price_image_path=self.price_image_path or None,
-            )
+            ready = self._take_speculative_pdf()
+            if ready is not None:
+                Path(out).write_bytes(ready)
+                print(f"[OK] PDF export dokončen (připravený na pozadí): {out}")
+                return
+            from pdf.export import export_pdf
+            export_pdf(out_path=out, **self._export_kwargs(), cache=True, export_cache=True)
             print(f"[OK] PDF export dokončen: {out}")
         except Exception as e:
             from PySide6.QtWidgets import QMessageBox
-            QMessageBox.critical(self, "Chyba", f"Nepodařilo se vytvořit PDF:\n{e}")
\ No newline at end of file
+            QMessageBox.critical(self, "Chyba", f"Nepodařilo se vytvořit PDF:\n{e}")
+
+    def export_pdf_linearized(self):
+        out = self._ask_export_path()
+        if not out:
+            return
+        try:
+            from pdf.export import export_pdf
+            export_pdf(out_path=out, **self._export_kwargs(), linearize=True, cache=True, export_cache=True)
+            print(f"[OK] PDF export (linearizovaný) dokončen: {out}")
+        except Exception as e:
+            QMessageBox.critical(self, "Chyba", f"Nepodařilo se vytvořit PDF:\n{e}")
+
+    def export_pdf_with_images(self):
+        out = self._ask_export_path()
+        if not out:
+            return
+        try:
+            from pdf.multi_export import export_pdf_with_images, page_images_dir
+            images = export_pdf_with_images(out, page_images_dir(out), **self._export_kwargs())
+            print(f"[OK] PDF export dokončen: {out} + {len(images)} obrázků stránek v {page_images_dir(out)}")
+        except Exception as e:
+            QMessageBox.critical(self, "Chyba", f"Nepodařilo se vytvořit PDF:\n{e}")
+
+    def export_pdf_date_variants(self):
+        out = self._ask_export_path()
+        if not out:
+            return
+        from pdf.cover_variants import date_variants, export_pdf_variants
+        kw = self._export_kwargs()
+        variants = date_variants(out, kw["title_text"], kw["info_lines_text"], kw["use_today"])
+        try:
+            export_pdf_variants(variants, kw["order_paths"], kw["price_image_path"], layout=kw["layout"],
+                                cache=True, export_cache=True)
+            print("[OK] PDF export dokončen: " + ", ".join(v.out_path for v in variants))
+        except Exception as e:
+            QMessageBox.critical(self, "Chyba", f"Nepodařilo se vytvořit PDF:\n{e}")
+
+    def export_draft_pdf(self):
+        if self._preview_timer.isActive() or not self.preview_pages:
+            QMessageBox.information(self, "Koncept PDF", "Náhled se ještě připravuje – zkus to za chvíli.")
+            return
+        out = self._ask_export_path()
+        if not out:
+            return
+        try:
+            from pdf.draft import export_draft_pdf
+            n = export_draft_pdf(out, list(self.preview_pages))
+            print(f"[OK] Koncept PDF z náhledu: {out} ({n} stran)")
+        except Exception as e:
+            QMessageBox.critical(self, "Chyba", f"Nepodařilo se vytvořit PDF:\n{e}")
+
+    def export_mail_merge(self):
+        csv_path, _ = QFileDialog.getOpenFileName(self, "CSV s příjemci", str(DEFAULT_EXPORT_DIR), "CSV (*.csv)")
+        if not csv_path:
+            return
+        out_dir = QFileDialog.getExistingDirectory(self, "Složka pro nabídky", str(DEFAULT_EXPORT_DIR))
+        if not out_dir:
+            return
+        from pdf.mail_merge import export_mail_merge, read_recipients
+        kw = self._export_kwargs()
+        try:
+            recipients = read_recipients(csv_path, kw["title_text"], kw["date_style"], kw["use_today"])
+            written = export_mail_merge(recipients, out_dir, kw["order_paths"], kw["price_image_path"],
+                                        layout=kw["layout"], cache=True)
+        except Exception as e:
+            QMessageBox.critical(self, "Chyba", f"Nepodařilo se vytvořit PDF:\n{e}")
+            return
+        print(f"[OK] Hromadná korespondence: {len(written)} nabídek v {out_dir}")
+        QMessageBox.information(self, "Hromadná korespondence", f"Vytvořeno {len(written)} nabídek v:\n{out_dir}")
+
+    def export_pdf_max_size(self):
+        out = self._ask_export_path()
+        if not out:
+            return
+        try:
+            from pdf.size_budget import export_pdf_max_size
+            result = export_pdf_max_size(out_path=out, **self._export_kwargs())
+        except Exception as e:
+            QMessageBox.critical(self, "Chyba", f"Nepodařilo se vytvořit PDF:\n{e}")
+            return
+        print(f"[OK] PDF export (max. velikost) dokončen: {out} – {result.describe()}")
+        if result.fits:
+            QMessageBox.information(self, "Export PDF", result.describe())
+        else:
+            QMessageBox.warning(self, "Export PDF", result.describe())
\ No newline at end of file
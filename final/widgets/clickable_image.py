@@ -1,15 +1,22 @@
 # -*- coding: utf-8 -*-
 from pathlib import Path
 from PySide6.QtCore import Qt, QSize, Signal
-from PySide6.QtGui import QPixmap
+from PySide6.QtGui import QPixmap, QImage, QImageReader
 from PySide6.QtWidgets import QFrame, QLabel, QVBoxLayout
 
+from pdf.vector import is_vector_segment, vector_image
+
+# Šířka, na kterou se do galerie rastruje vektorový segment (PDF/SVG)
+VECTOR_GALLERY_WIDTH_PX = 1200
+
 class ClickableImage(QFrame):
     """
     Klikatelný widget s obrázkem:
       - červený rámeček při označení (QSS)
       - škálování na cílovou šířku
       - signál toggled(path, is_selected)
+      - bitmapa se dekóduje až při prvním vykreslení (rozměr z hlavičky souboru),
+        takže velký pool segmentů nezdrží otevření galerie
     """
     toggled = Signal(str, bool)
 
@@ -29,8 +36,13 @@ class ClickableImage(QFrame):
         """)
 
         self._image_path = Path(image_path)
-        self._original = QPixmap(str(self._image_path))
-        if self._original.isNull():
+        self._original: QPixmap | None = None
+        if is_vector_segment(str(self._image_path)):
+            self._load_original()
+            self._source_size = self._original.size()
+        else:
+            self._source_size = QImageReader(str(self._image_path)).size()
+        if self._source_size.isEmpty():
             raise ValueError(f"Nepodařilo se načíst obrázek: {self._image_path}")
 
         self._label = QLabel(alignment=Qt.AlignCenter)
@@ -45,6 +57,16 @@ class ClickableImage(QFrame):
 
         self.set_target_width(target_width)
 
+    def _load_original(self) -> None:
+        if is_vector_segment(str(self._image_path)):
+            from PIL.ImageQt import ImageQt
+            im = vector_image(str(self._image_path), VECTOR_GALLERY_WIDTH_PX).convert("RGBA")
+            self._original = QPixmap.fromImage(QImage(ImageQt(im)))
+        else:
+            self._original = QPixmap(str(self._image_path))
+        if self._original.isNull():
+            raise ValueError(f"Nepodařilo se načíst obrázek: {self._image_path}")
+
     @property
     def image_path(self) -> Path:
         return self._image_path
@@ -64,10 +86,27 @@ class ClickableImage(QFrame):
 
     def set_target_width(self, width: int) -> None:
         width = max(1, int(width))
+        self._target_width = width
+        if self._original is None:
+            # ještě nedekódováno – jen rezervuj místo podle poměru stran z hlavičky
+            src = self._source_size
+            self._label.setFixedSize(width, max(1, round(width * src.height() / src.width())))
+            return
         scaled = self._original.scaledToWidth(width, Qt.SmoothTransformation)
         self._label.setPixmap(scaled)
         self._label.setFixedSize(scaled.size())
 
+    def paintEvent(self, event) -> None:
+        # kreslí se jen widgety ve viditelné části galerie => dekódují se jen ty
+        if self._original is None:
+            try:
+                self._load_original()
+            except ValueError as e:
+                print(f"Přeskakuji '{self._image_path.name}': {e}")
+                self._original = QPixmap()
+            self.set_target_width(self._target_width)
+        super().paintEvent(event)
+
     def mousePressEvent(self, event) -> None:
         if event.button() == Qt.LeftButton:
             new_state = not self.is_selected
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Spekulativní export: když se vstupy chvíli nemění, PDF se na pozadí vyrenderuje
+do paměti pod klíčem nabídky (pdf.export.quote_key). „Export PDF…“ pak hotové
+bajty jen zapíše; při jakékoli změně se výsledek zahodí.
+
+Běží ve vlastním poolu s jedním vláknem s nejnižší prioritou a bez procesního poolu
+(workers=1), aby nebrzdil náhled.
+"""
+import io
+
+from PySide6.QtCore import QObject, QRunnable, QThread, QThreadPool, Signal
+
+
+class SpeculativeEmitter(QObject):
+    finished = Signal(str, object)  # (klíč nabídky, bytes | None při chybě)
+
+
+class SpeculativeExportWorker(QRunnable):
+    def __init__(self, key: str, export_kwargs: dict, emitter: SpeculativeEmitter):
+        super().__init__()
+        self.key = key
+        self.export_kwargs = export_kwargs
+        self.emitter = emitter
+
+    def run(self):
+        from pdf.export import export_pdf   # až tady – start GUI PDF stack nenačítá
+        buf = io.BytesIO()
+        try:
+            export_pdf(buf, **self.export_kwargs, workers=1, streaming=True)
+            data = buf.getvalue()
+        except Exception as e:
+            print(f"[INFO] Spekulativní export selhal: {e}")
+            data = None
+        self.emitter.finished.emit(self.key, data)
+
+
+def speculative_pool(parent: QObject | None = None) -> QThreadPool:
+    """Pool pro spekulativní export: jedno vlákno, nejnižší priorita."""
+    pool = QThreadPool(parent)
+    pool.setMaxThreadCount(1)
+    pool.setThreadPriority(QThread.LowestPriority)
+    return pool